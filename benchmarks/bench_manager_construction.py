@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark `Manager` construction with and without the backend validation cache.
+
+A fake `micromamba` executable is used so the benchmark doesn't need network
+access, which means it only works on Unix-like systems. Run it with:
+
+    python benchmarks/bench_manager_construction.py
+"""
+
+import argparse
+import os
+from pathlib import Path
+import stat
+import tempfile
+import time
+
+from envs_manager.backends import api
+from envs_manager.manager import Manager
+
+
+FAKE_MICROMAMBA = """#!/bin/sh
+echo 1.5.10
+"""
+
+
+def create_fake_micromamba(root_path):
+    bin_directory = Path(root_path) / "conda-like" / "bin"
+    bin_directory.mkdir(parents=True)
+    executable = bin_directory / "micromamba"
+    executable.write_text(FAKE_MICROMAMBA)
+    executable.chmod(executable.stat().st_mode | stat.S_IEXEC)
+    return bin_directory
+
+
+def clear_validation_cache(bin_directory):
+    api._validation_cache.clear()
+    try:
+        os.remove(bin_directory / api.VALIDATION_CACHE_FILENAME)
+    except FileNotFoundError:
+        pass
+
+
+def bench(root_path, iterations, cached):
+    bin_directory = Path(root_path) / "conda-like" / "bin"
+    timings = []
+    for __ in range(iterations):
+        if not cached:
+            clear_validation_cache(bin_directory)
+        start = time.perf_counter()
+        Manager("conda-like", root_path=root_path, env_name="bench")
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_path:
+        create_fake_micromamba(root_path)
+        uncached = bench(root_path, options.iterations, cached=False)
+        cached = bench(root_path, options.iterations, cached=True)
+
+    print(f"Manager construction without validation cache: {uncached * 1e3:.3f} ms")
+    print(f"Manager construction with validation cache:    {cached * 1e3:.3f} ms")
+    print(f"Speedup: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
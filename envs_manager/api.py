@@ -3,3 +3,4 @@
 # SPDX-License-Identifier: MIT
 
 from .manager import Manager, ManagerActionResult, ManagerActions, ManagerOptions
+from .batch import BatchActionResult, BatchEntry, run_batch
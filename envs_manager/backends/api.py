@@ -4,12 +4,36 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+from contextvars import ContextVar
+import json
 import logging
+import os
 from pathlib import Path
+import shutil
 import subprocess
-from typing import TypedDict
+import threading
+from typing import TYPE_CHECKING, Callable, TypedDict
 
-import requests
+from envs_manager.backends.clone import clone_prefix
+from envs_manager.backends.env_index import (
+    ENVIRONMENT_INDEX_FILENAME,
+    EnvironmentIndex,
+    EnvironmentInfo,
+)
+from envs_manager.backends.exports import EXPORTS_DIRECTORY_NAME
+from envs_manager.backends.package_cache import get_cache_directory
+from envs_manager.backends.package_info_cache import (
+    PYPI_SOURCE,
+    PackageInfoCache,
+    get_package_info_cache,
+)
+from envs_manager.backends.trash import TRASH_DIRECTORY_NAME, Trash
+
+
+if TYPE_CHECKING:
+    import requests
 
 
 logger = logging.getLogger("envs-manager")
@@ -18,8 +42,99 @@
 PYPI_API_PACKAGE_INFO_URL = "https://pypi.org/pypi/{package_name}/json"
 ANACONDA_API_PACKAGE_INFO = "https://api.anaconda.org/package/{channel}/{package_name}"
 
+# Max number of concurrent requests done to get packages info
+PACKAGE_INFO_MAX_WORKERS = int(os.environ.get("ENVS_MANAGER_PACKAGE_INFO_WORKERS", 16))
+
+# Connect and read timeout in seconds for each package info request
+PACKAGE_INFO_REQUEST_TIMEOUT = (5, 15)
+
+# File in the bin directory where the backend executable validation is saved
+VALIDATION_CACHE_FILENAME = "validation-cache.json"
+
+_session = None
+_session_lock = threading.Lock()
+
+# Function called with each line of output of the commands run in the current
+# context. See `output_callback`.
+_output_callback: ContextVar[Callable[[str], None] | None] = ContextVar(
+    "output_callback", default=None
+)
+
+# Validation results of backend executables, keyed by their path, size and
+# modification time
+_validation_cache = {}
+_validation_cache_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def output_callback(callback: Callable[[str], None] | None):
+    """
+    Context manager to receive the output of commands while they run.
+
+    While the context is active, `run_command` calls `callback` with each line
+    of output (of both stdout and stderr) of streamable commands as soon as it's
+    available, instead of waiting for them to finish. The result returned by
+    `run_command` is the same with or without callback.
+
+    Parameters
+    ----------
+    callback : Callable[[str], None] or None
+        Function to call with each output line, without its line ending.
+    """
+    token = _output_callback.set(callback)
+    try:
+        yield
+    finally:
+        _output_callback.reset(token)
+
+
+def _run_streamed_command(
+    command, callback, capture_output=True, run_env=None, cwd=None
+) -> subprocess.CompletedProcess:
+    """
+    Run a command like `subprocess.run(..., check=True, text=True)` while
+    calling `callback` with each of its stdout and stderr lines.
+    """
+    callback_lock = threading.Lock()
+
+    def read_lines(pipe, lines):
+        for line in pipe:
+            lines.append(line)
+            with callback_lock:
+                callback(line.rstrip("\r\n"))
+
+    stdout_lines = []
+    stderr_lines = []
+    with subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        env=run_env,
+        cwd=cwd,
+    ) as process:
+        # Both pipes are read at the same time, so the command doesn't block
+        # when one of them is full
+        stderr_reader = threading.Thread(
+            target=read_lines, args=(process.stderr, stderr_lines), daemon=True
+        )
+        stderr_reader.start()
+        read_lines(process.stdout, stdout_lines)
+        stderr_reader.join()
+
+    stdout = "".join(stdout_lines) if capture_output else None
+    stderr = "".join(stderr_lines)
+    if process.returncode:
+        raise subprocess.CalledProcessError(
+            process.returncode, command, output=stdout, stderr=stderr
+        )
+    return subprocess.CompletedProcess(
+        command, process.returncode, stdout=stdout, stderr=stderr
+    )
+
 
-def run_command(command, capture_output=True, run_env=None, cwd=None):
+def run_command(command, capture_output=True, run_env=None, cwd=None, streamable=True):
     """
     Run commands using `subprocess.run`
 
@@ -32,6 +147,11 @@ def run_command(command, capture_output=True, run_env=None, cwd=None):
         is True.
     run_env : dict, optional
         Process environment to use when running the command. The default is None.
+    streamable : bool, optional
+        If the command output can be streamed to the callback set with
+        `output_callback`. Commands whose output is meant to be parsed (e.g.
+        JSON) should set this to False, so it isn't sent to the callback. The
+        default is True.
 
     Returns
     -------
@@ -39,6 +159,16 @@ def run_command(command, capture_output=True, run_env=None, cwd=None):
         The completed process result object.
 
     """
+    callback = _output_callback.get()
+    if streamable and callback is not None:
+        return _run_streamed_command(
+            command,
+            callback,
+            capture_output=capture_output,
+            run_env=run_env,
+            cwd=cwd,
+        )
+
     if capture_output:
         result = subprocess.run(
             command,
@@ -55,7 +185,90 @@ def run_command(command, capture_output=True, run_env=None, cwd=None):
     return result
 
 
-def get_package_info(package_name, channel=None):
+def get_session() -> requests.Session:
+    """
+    Get the HTTP session shared to query package info.
+
+    The session keeps a pool of connections per host big enough to be used by
+    `PACKAGE_INFO_MAX_WORKERS` threads at the same time, so connections (and
+    their TLS handshakes) are reused between requests.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Imported here because `requests` takes a while to import and it's
+            # not needed for most actions
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            adapter = HTTPAdapter(
+                pool_connections=4, pool_maxsize=PACKAGE_INFO_MAX_WORKERS
+            )
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _request_package_info(url, package_name, source, cache=None):
+    """
+    Request package metadata from `url`, using the cache entry stored for
+    `(package_name, source)` if it's still fresh or can be revalidated.
+
+    Returns
+    -------
+    response_json : dict or None
+        The JSON response or None if the package was not found.
+    """
+    entry = cache.get(package_name, source) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        cache.record("hits")
+        return entry.payload
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    response = get_session().get(
+        url, headers=headers, timeout=PACKAGE_INFO_REQUEST_TIMEOUT
+    )
+    if cache is None:
+        return response.json()
+
+    cache.record("network_requests")
+    if entry is not None and response.status_code == 304:
+        cache.record("revalidations")
+        cache.touch(package_name, source)
+        return entry.payload
+
+    cache.record("misses")
+    response_json = response.json()
+
+    # The PyPI JSON API endpoint returns `{"message": "Not Found"}` in case a
+    # package was not found. Those results are also cached to avoid querying
+    # again for packages that are only available in conda channels.
+    # Only the `info` key is kept since `releases` and `urls` can be huge and
+    # are not needed.
+    if source == PYPI_SOURCE:
+        payload = (
+            None if "message" in response_json else {"info": response_json["info"]}
+        )
+    else:
+        payload = response_json
+    cache.put(
+        package_name,
+        source,
+        payload,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+    return payload if payload is not None else response_json
+
+
+def get_package_info(package_name, channel=None, cache=None):
     """
     Get package information from the PyPI JSON API and fallback to the
     Anaconda package info API endpoint if needed and a channel is provided.
@@ -67,6 +280,9 @@ def get_package_info(package_name, channel=None):
     channel : str, optional
         In case of fallback to the Anaconda endpoint check package info for
         the given package channel. The default is None.
+    cache : PackageInfoCache, optional
+        Cache used to avoid querying the APIs again for packages whose info was
+        already retrieved. The default is None, which means no caching.
 
     Returns
     -------
@@ -74,22 +290,64 @@ def get_package_info(package_name, channel=None):
         Information about the package (e.g. metadata like its summary).
     """
     package_info_url = PYPI_API_PACKAGE_INFO_URL.format(package_name=package_name)
-    package_info = requests.get(package_info_url).json()
+    package_info = _request_package_info(
+        package_info_url, package_name, PYPI_SOURCE, cache=cache
+    )
 
     # Here the `message` key is checked since the PyPI JSON API endpoint returns
     # `{"message": "Not Found"}` in case a package was not found.
     # The fallback to the Ananconda API package info endpoint is only done if a `channel` is provided
     # Without a channel the Anaconda endpoint can't be used.
-    if "message" in package_info and channel:
+    if (package_info is None or "message" in package_info) and channel:
         package_info_url = ANACONDA_API_PACKAGE_INFO.format(
             channel=channel, package_name=package_name
         )
-        package_info = {"info": requests.get(package_info_url).json()}
-    elif "message" in package_info:
+        package_info = {
+            "info": _request_package_info(
+                package_info_url, package_name, channel, cache=cache
+            )
+        }
+    elif package_info is None or "message" in package_info:
         package_info = None
     return package_info
 
 
+def get_packages_info(packages, cache=None, max_workers=PACKAGE_INFO_MAX_WORKERS):
+    """
+    Get information for several packages concurrently.
+
+    Parameters
+    ----------
+    packages : list[tuple[str, str | None]]
+        List of `(package_name, channel)` pairs to query. See `get_package_info`.
+    cache : PackageInfoCache, optional
+        Cache to use for the queries. The default is None.
+    max_workers : int, optional
+        Max number of requests done at the same time. The default is
+        `PACKAGE_INFO_MAX_WORKERS`.
+
+    Returns
+    -------
+    packages_info : list[dict | None]
+        Information about each package, in the same order of `packages`. None is
+        returned for packages that were not found or whose query failed.
+    """
+
+    def get_info(package):
+        package_name, channel = package
+        try:
+            return get_package_info(package_name, channel=channel, cache=cache)
+        except Exception as error:
+            logger.debug(f"Unable to get info for {package_name}: {error}")
+            return None
+
+    if not packages:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(packages))) as executor:
+        return list(executor.map(get_info, packages))
+
+
 class BackendActionResult(TypedDict):
     """Dictionary to report the result of a backend's action."""
 
@@ -103,6 +361,17 @@ class BackendActionResult(TypedDict):
 class BackendInstance:
     ID = ""
 
+    # Name of the executable used by the backend, if it needs one
+    EXECUTABLE_NAME: str | None = None
+
+    # Environment variable used to set the package cache of the backend tool
+    # and name of its directory in the shared cache
+    PACKAGE_CACHE_VARIABLE: str | None = None
+    PACKAGE_CACHE_NAME: str | None = None
+
+    # Directories of an environment with scripts that can contain its path
+    PREFIX_SCAN_DIRECTORIES: tuple[str, ...] = ("bin", "Scripts")
+
     def __init__(
         self,
         environment_path: str,
@@ -118,11 +387,154 @@ def __init__(
 
     @property
     def python_executable_path(self) -> str:
+        return self.get_python_executable_path(self.environment_path)
+
+    def get_python_executable_path(self, environment_path: str | Path) -> str:
+        """Get the path to the Python interpreter of an environment."""
         raise NotImplementedError
 
+    @property
+    def cache_directory(self) -> str:
+        """Shared directory where caches are saved."""
+        return str(get_cache_directory(Path(self.bin_directory).parent.parent))
+
+    @property
+    def package_cache_path(self) -> str | None:
+        """Directory where the backend tool caches the packages it downloads."""
+        return self.get_package_cache_path(self.cache_directory)
+
+    @classmethod
+    def get_package_cache_path(cls, cache_directory: str | Path) -> str | None:
+        """
+        Get the package cache of the backend tool for a shared cache directory.
+
+        It's the `PACKAGE_CACHE_NAME` directory in `cache_directory`, unless
+        the tool cache was set with its `PACKAGE_CACHE_VARIABLE`.
+        """
+        if cls.PACKAGE_CACHE_VARIABLE is None:
+            return None
+        return os.environ.get(cls.PACKAGE_CACHE_VARIABLE) or str(
+            Path(cache_directory) / cls.PACKAGE_CACHE_NAME
+        )
+
+    def run_command(
+        self, command, capture_output=True, run_env=None, cwd=None, streamable=True
+    ):
+        """
+        Run a command of the backend tool with the shared package cache.
+
+        See `run_command` for the parameters.
+        """
+        run_env = dict(os.environ if run_env is None else run_env)
+        if self.PACKAGE_CACHE_VARIABLE is not None:
+            run_env[self.PACKAGE_CACHE_VARIABLE] = self.package_cache_path
+        return run_command(
+            command,
+            capture_output=capture_output,
+            run_env=run_env,
+            cwd=cwd,
+            streamable=streamable,
+        )
+
+    def get_environment_packages(self) -> set[str]:
+        """Get identifiers of the packages installed in the environment."""
+        return set()
+
+    def get_package_cache_entries(self, since: float | None = None) -> dict[str, Path]:
+        """
+        Get the packages saved in the backend package cache.
+
+        Parameters
+        ----------
+        since : float, optional
+            Only get the packages saved or modified after this time. The default
+            is None.
+
+        Returns
+        -------
+        entries : dict[str, Path]
+            Mapping of entry names to their path.
+        """
+        return {}
+
+    @property
+    def package_info_cache(self) -> PackageInfoCache:
+        """Persistent cache for the packages metadata retrieved from the network."""
+        return get_package_info_cache(self.cache_directory)
+
     def validate(self) -> bool:
         pass
 
+    def get_cached_validation(self, executable: str) -> dict | None:
+        """
+        Get the cached validation info of a backend executable.
+
+        The info is looked up in memory first and then in the bin directory, and
+        it's only valid if the executable has the same size and modification time
+        it had when it was validated. This avoids running the executable to
+        check its version each time the backend is instantiated.
+
+        Parameters
+        ----------
+        executable : str
+            Path to the backend executable.
+
+        Returns
+        -------
+        validation_info : dict or None
+            Info saved with `set_cached_validation` or None if there is no valid
+            cached info.
+        """
+        try:
+            key = self._executable_signature(executable)
+        except OSError:
+            return None
+
+        with _validation_cache_lock:
+            if key in _validation_cache:
+                return _validation_cache[key]
+
+            cache_path = Path(self.bin_directory) / VALIDATION_CACHE_FILENAME
+            try:
+                with open(cache_path) as cache_file:
+                    cached = json.load(cache_file).get(executable)
+            except (OSError, ValueError):
+                return None
+
+            if cached is None or tuple(cached["signature"]) != key:
+                return None
+
+            _validation_cache[key] = cached["info"]
+            return cached["info"]
+
+    def set_cached_validation(self, executable: str, validation_info: dict):
+        """Save the validation info of a backend executable in memory and disk."""
+        try:
+            key = self._executable_signature(executable)
+        except OSError:
+            return
+
+        with _validation_cache_lock:
+            _validation_cache[key] = validation_info
+
+            cache_path = Path(self.bin_directory) / VALIDATION_CACHE_FILENAME
+            try:
+                with open(cache_path) as cache_file:
+                    cache = json.load(cache_file)
+            except (OSError, ValueError):
+                cache = {}
+
+            cache[executable] = dict(signature=list(key), info=validation_info)
+            try:
+                with open(cache_path, "w") as cache_file:
+                    json.dump(cache, cache_file)
+            except OSError as error:
+                logger.debug(f"Unable to save validation cache: {error}")
+
+    def _executable_signature(self, executable: str) -> tuple[str, int, int]:
+        stat = os.stat(executable)
+        return (executable, stat.st_size, stat.st_mtime_ns)
+
     def find_backend_executable(self, exec_name: str):
         """Return the backend executable in bin_directory, if available."""
         cmd_list = [exec_name, f"{exec_name}.exe"]
@@ -133,6 +545,21 @@ def find_backend_executable(self, exec_name: str):
 
         return
 
+    @classmethod
+    def is_installed(cls, bin_directory: str | Path) -> bool:
+        """
+        Check if the backend executable is available in `bin_directory`.
+
+        Unlike `validate`, this never installs the executable.
+        """
+        if cls.EXECUTABLE_NAME is None:
+            return True
+
+        return any(
+            (Path(bin_directory) / cmd).exists()
+            for cmd in [cls.EXECUTABLE_NAME, f"{cls.EXECUTABLE_NAME}.exe"]
+        )
+
     def install_backend_executable(self):
         """Install the backend executable in bin_directory."""
         raise NotImplementedError
@@ -145,8 +572,121 @@ def create_environment(
     ) -> BackendActionResult:
         raise NotImplementedError
 
+    @property
+    def exports_directory(self) -> str:
+        """Directory where exports are saved when no export file is given."""
+        return str(Path(self.bin_directory).parent.parent / EXPORTS_DIRECTORY_NAME)
+
+    @property
+    def trash(self) -> Trash:
+        """Trash where deleted environments are moved before purging them."""
+        return Trash(Path(self.bin_directory).parent.parent / TRASH_DIRECTORY_NAME)
+
     def delete_environment(self, force: bool = False) -> BackendActionResult:
-        raise NotImplementedError
+        """
+        Delete the environment.
+
+        The environment directory is moved to the trash, which is immediate,
+        and its files are removed by the trash purger in the background. The
+        backend tools are not run to remove it, so backends that register their
+        environments (like conda-like in `~/.conda/environments.txt`) have to
+        unregister them before calling this.
+
+        Parameters
+        ----------
+        force : bool, optional
+            Kept for compatibility, deleting never asks for confirmation. The
+            default is False.
+        """
+        if not Path(self.environment_path).is_dir():
+            return BackendActionResult(
+                status=False,
+                output=f"Environment {self.environment_path} doesn't exist",
+            )
+
+        try:
+            trash_path = self.trash.move(self.environment_path)
+        except OSError as error:
+            # E.g. files in use on Windows
+            logger.error(error, exc_info=True)
+            return BackendActionResult(status=False, output=str(error))
+
+        logger.info(f"Deleted environment located at {self.environment_path}")
+        if trash_path is not None:
+            self.trash.purge()
+        return BackendActionResult(status=True, output=None)
+
+    def get_package_files(self) -> dict[str, str | None]:
+        """
+        Get the files of the environment installed unchanged from packages or
+        known to contain its path.
+
+        Returns
+        -------
+        package_files : dict[str, str | None]
+            Mapping of paths relative to the environment to `text` or `binary`
+            for the files that contain its path, or None for the files that are
+            never modified in place (and can be hardlinked).
+        """
+        return {}
+
+    def clone_environment(
+        self, target_path: str, force: bool = False
+    ) -> BackendActionResult:
+        """
+        Clone the environment without downloading or installing packages.
+
+        Files are reflinked when possible and the ones that contain the
+        environment path are copied with it replaced by `target_path`. When
+        reflinks are not supported, only the files that are never modified in
+        place (see `get_package_files`) are hardlinked and the rest are copied.
+
+        Parameters
+        ----------
+        target_path : str
+            Path where the environment will be cloned.
+        force : bool, optional
+            Replace `target_path` if it already exists. The default is False.
+
+        Returns
+        -------
+        BackendActionResult
+            Result of the action. Its output has the number of files that were
+            reflinked, hardlinked, copied and rewritten.
+        """
+        if not Path(self.environment_path).is_dir():
+            return BackendActionResult(
+                status=False,
+                output=f"Environment {self.environment_path} doesn't exist",
+            )
+
+        if Path(target_path).exists():
+            if not force:
+                return BackendActionResult(
+                    status=False, output=f"{target_path} already exists"
+                )
+            self.trash.move(target_path)
+            self.trash.purge()
+
+        try:
+            package_files = self.get_package_files()
+            counts = clone_prefix(
+                self.environment_path,
+                target_path,
+                prefix_files={
+                    path: mode for path, mode in package_files.items() if mode
+                },
+                scan_directories=self.PREFIX_SCAN_DIRECTORIES,
+                linkable_files={
+                    path for path, mode in package_files.items() if mode is None
+                },
+            )
+            logger.info(f"Cloned {self.environment_path} to {target_path}")
+            return BackendActionResult(status=True, output=counts)
+        except Exception as error:
+            logger.error(error, exc_info=True)
+            shutil.rmtree(target_path, ignore_errors=True)
+            return BackendActionResult(status=False, output=str(error))
 
     def activate_environment(self):
         raise NotImplementedError
@@ -155,8 +695,20 @@ def deactivate_environment(self):
         raise NotImplementedError
 
     def export_environment(
-        self, export_file_path: str | None = None
+        self, export_file_path: str | None = None, lock: bool = False
     ) -> BackendActionResult:
+        """
+        Export the environment.
+
+        Parameters
+        ----------
+        export_file_path : str, optional
+            File where the export is saved. The default is None.
+        lock : bool, optional
+            Export the exact packages installed, with their hashes, so the
+            environment can be imported without solving its dependencies. The
+            default is False.
+        """
         raise NotImplementedError
 
     def import_environment(
@@ -186,9 +738,47 @@ def update_packages(
     def list_packages(self) -> BackendActionResult:
         raise NotImplementedError
 
-    def list_environments(self) -> BackendActionResult:
+    def list_environments(self, details: bool = False) -> BackendActionResult:
+        raise NotImplementedError
+
+    def get_environment_markers(self, environment_path: Path) -> list[Path]:
+        """
+        Get the files or directories whose modification time changes when an
+        environment is modified.
+        """
         raise NotImplementedError
 
+    def describe_environment(self, environment_path: Path) -> EnvironmentInfo:
+        """Compute the metadata of an environment reading it from disk."""
+        raise NotImplementedError
+
+    @property
+    def environment_index(self) -> EnvironmentIndex:
+        """Index with the metadata of the backend environments."""
+        return EnvironmentIndex(
+            Path(self.bin_directory).parent / ENVIRONMENT_INDEX_FILENAME
+        )
+
+    def get_environments_info(
+        self, environments: dict[str, str]
+    ) -> dict[str, EnvironmentInfo]:
+        """
+        Get the metadata of `environments` from the environment index.
+
+        Parameters
+        ----------
+        environments : dict[str, str]
+            Mapping of environment names to their paths.
+
+        Returns
+        -------
+        environments_info : dict[str, EnvironmentInfo]
+            Mapping of environment names to their metadata.
+        """
+        return self.environment_index.update(
+            environments, self.get_environment_markers, self.describe_environment
+        )
+
     def create_kernelspec(
         self,
         name: str,
@@ -0,0 +1,525 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Download and install the executables used by the backends.
+
+The artifacts to download for each tool and platform are pinned in a manifest
+(`bootstrap-manifest.json` next to this module, or the file set in
+`ENVS_MANAGER_BOOTSTRAP_MANIFEST`) with their URL, SHA-256 hash and the archive
+members to extract.
+
+The hashes are pinned with `pin_manifest` (`python -m
+envs_manager.backends.bootstrap --pin`), which also replaces redirecting URLs
+with the URL of the file they point to. Artifacts without a pinned hash are
+installed with a warning, or refused if `ENVS_MANAGER_BOOTSTRAP_REQUIRE_PINNED`
+is set.
+
+Artifacts are first looked up in a local directory (set with
+`ENVS_MANAGER_BOOTSTRAP_ARTIFACTS` or `set_artifacts_source`), to install the
+executables on machines without internet access. Local artifacts are verified
+like downloaded ones.
+
+Downloads are streamed to a `.part` file in chunks, so memory use doesn't
+depend on the artifact size, and are resumed with HTTP range requests when a
+previous attempt was interrupted. Only the members listed in the manifest are
+extracted from the downloaded archive.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import platform
+import shutil
+import stat
+import sys
+import tarfile
+import time
+from typing import TypedDict
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+import zipfile
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Manifest with the pinned artifacts of each tool
+BOOTSTRAP_MANIFEST = os.environ.get(
+    "ENVS_MANAGER_BOOTSTRAP_MANIFEST",
+    str(Path(__file__).parent / "bootstrap-manifest.json"),
+)
+
+# Local directory or `file://` URL with the artifacts to use before downloading
+BOOTSTRAP_ARTIFACTS = os.environ.get("ENVS_MANAGER_BOOTSTRAP_ARTIFACTS")
+
+# Refuse to install artifacts that have no pinned hash in the manifest, instead
+# of installing them unverified
+BOOTSTRAP_REQUIRE_PINNED = os.environ.get(
+    "ENVS_MANAGER_BOOTSTRAP_REQUIRE_PINNED", ""
+).lower() in ("1", "true", "yes")
+
+# Seconds to wait to connect to the server and between received chunks
+DOWNLOAD_TIMEOUT = (
+    10,
+    float(os.environ.get("ENVS_MANAGER_DOWNLOAD_TIMEOUT", 60)),
+)
+
+# Number of attempts for a download before giving up
+DOWNLOAD_RETRIES = int(os.environ.get("ENVS_MANAGER_DOWNLOAD_RETRIES", 5))
+
+# Size of the chunks written to disk while downloading and hashing
+CHUNK_SIZE = 1024 * 1024
+
+_artifacts_source: str | None = None
+
+
+class BootstrapError(Exception):
+    """Raised when a backend executable couldn't be downloaded or installed."""
+
+
+class BootstrapArtifact(TypedDict):
+    """Dictionary with a pinned artifact of the bootstrap manifest."""
+
+    url: str
+    """URL to download the artifact from."""
+
+    sha256: str | None
+    """Expected SHA-256 hash of the artifact."""
+
+    members: list[str]
+    """Patterns of the archive members to extract."""
+
+    filename: str
+    """Name of the artifact in local artifact directories. Optional, the
+    default is the last component of `url`."""
+
+
+def get_platform() -> str:
+    """Get the conda platform name (e.g. `linux-64`) of the running system."""
+    machine = platform.machine().lower()
+    if os.name == "nt":
+        return "win-64"
+    elif sys.platform == "darwin":
+        if machine in ("arm64", "aarch64"):
+            return "osx-arm64"
+        return "osx-64"
+    else:
+        if machine in ("x86_64", "amd64"):
+            return "linux-64"
+        elif machine in ("arm64", "aarch64"):
+            return "linux-aarch64"
+        return "linux-ppc64le"
+
+
+def set_artifacts_source(source: str | Path | None):
+    """
+    Set the local directory or `file://` URL with the bootstrap artifacts.
+
+    It takes precedence over `ENVS_MANAGER_BOOTSTRAP_ARTIFACTS`. Use None to
+    unset it.
+    """
+    global _artifacts_source
+    _artifacts_source = None if source is None else str(source)
+
+
+def get_artifacts_directory() -> Path | None:
+    """Get the local directory with the bootstrap artifacts, if set."""
+    source = _artifacts_source or BOOTSTRAP_ARTIFACTS
+    if not source:
+        return None
+    return url_to_path(source) if source.startswith("file:") else Path(source)
+
+
+def url_to_path(url: str) -> Path:
+    """Convert a `file://` URL to a path."""
+    parsed_url = urlparse(url)
+    path = url2pathname(parsed_url.path)
+    if parsed_url.netloc and parsed_url.netloc != "localhost":
+        path = f"//{parsed_url.netloc}{path}"
+    return Path(path)
+
+
+def get_artifact_filename(artifact: BootstrapArtifact) -> str:
+    """Get the name of an artifact in local artifact directories."""
+    return artifact.get("filename") or artifact["url"].rstrip("/").rsplit("/", 1)[-1]
+
+
+def load_manifest(path: str | Path | None = None) -> dict:
+    """Load the bootstrap manifest, `BOOTSTRAP_MANIFEST` by default."""
+    path = BOOTSTRAP_MANIFEST if path is None else path
+    try:
+        with open(path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError) as error:
+        raise BootstrapError(f"Unable to read bootstrap manifest {path}: {error}")
+
+    if manifest.get("version") != 1:
+        raise BootstrapError(f"Unsupported bootstrap manifest version in {path}")
+    return manifest
+
+
+def get_artifacts(
+    tool: str, platform_name: str | None = None, manifest: dict | None = None
+) -> list[BootstrapArtifact]:
+    """
+    Get the artifacts that need to be installed for a tool.
+
+    Parameters
+    ----------
+    tool : str
+        Name of the tool in the manifest (e.g. `micromamba`).
+    platform_name : str, optional
+        Conda platform name. The default is the running platform.
+    manifest : dict, optional
+        Bootstrap manifest. The default is the one loaded with `load_manifest`.
+    """
+    platform_name = get_platform() if platform_name is None else platform_name
+    manifest = load_manifest() if manifest is None else manifest
+
+    artifacts = manifest.get("tools", {}).get(tool, {}).get(platform_name)
+    if not artifacts:
+        raise BootstrapError(f"No {tool} artifacts available for {platform_name}")
+    return artifacts
+
+
+def file_sha256(path: str | Path) -> str:
+    """Compute the SHA-256 hash of a file, reading it in chunks."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def download(
+    url: str,
+    path: str | Path,
+    sha256: str | None = None,
+    retries: int = DOWNLOAD_RETRIES,
+    timeout: tuple[float, float] = DOWNLOAD_TIMEOUT,
+    require_pinned: bool | None = None,
+) -> Path:
+    """
+    Download a file, resuming previous interrupted downloads, and verify it.
+
+    Data is streamed to `<path>.part`, which is renamed to `path` once the
+    download finished and its hash matches `sha256`.
+
+    Parameters
+    ----------
+    url : str
+        URL to download. `file://` URLs are copied.
+    path : str or Path
+        Path where the file is saved.
+    sha256 : str, optional
+        Expected SHA-256 hash of the file. If None, the file is not verified
+        (or not downloaded at all if `require_pinned` is True).
+    retries : int, optional
+        Number of attempts before giving up. The default is `DOWNLOAD_RETRIES`.
+    timeout : tuple[float, float], optional
+        Connect and read timeouts in seconds. The default is `DOWNLOAD_TIMEOUT`.
+    require_pinned : bool, optional
+        Refuse to download the file if `sha256` is None. The default is None,
+        which uses `BOOTSTRAP_REQUIRE_PINNED`.
+
+    Raises
+    ------
+    BootstrapError
+        If the file couldn't be downloaded, its hash doesn't match or it has no
+        hash and `require_pinned` is True.
+    """
+    require_pinned = (
+        BOOTSTRAP_REQUIRE_PINNED if require_pinned is None else require_pinned
+    )
+    if sha256 is None and require_pinned:
+        raise BootstrapError(
+            f"{url} has no pinned SHA-256 hash in the bootstrap manifest. Pin it "
+            f"with `python -m envs_manager.backends.bootstrap --pin`."
+        )
+
+    path = Path(path)
+    part_path = path.with_name(path.name + ".part")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if url.startswith("file:"):
+        try:
+            shutil.copyfile(url_to_path(url), part_path)
+        except OSError as error:
+            raise BootstrapError(f"Unable to copy {url}: {error}")
+    else:
+        _download_part(url, part_path, retries, timeout)
+
+    digest = file_sha256(part_path)
+    if sha256 is None:
+        logger.warning(
+            f"{url} is not pinned in the bootstrap manifest, installing it "
+            f"without verifying it ({digest})"
+        )
+    elif digest != sha256.lower():
+        part_path.unlink()
+        raise BootstrapError(
+            f"SHA-256 mismatch for {url}: expected {sha256}, got {digest}"
+        )
+
+    os.replace(part_path, path)
+    return path
+
+
+def _download_part(
+    url: str, part_path: Path, retries: int, timeout: tuple[float, float]
+) -> str:
+    """
+    Download `url` to `part_path`, resuming from the data already saved.
+
+    Returns
+    -------
+    url : str
+        URL of the downloaded file, after following redirects.
+    """
+    import requests
+
+    for attempt in range(1, retries + 1):
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with requests.get(
+                url, headers=headers, stream=True, timeout=timeout
+            ) as response:
+                if response.status_code == 416:
+                    # The previous attempt already got the whole file
+                    return response.url
+                response.raise_for_status()
+
+                # Servers that don't support ranges send the whole file again
+                mode = "ab" if offset and response.status_code == 206 else "wb"
+                with open(part_path, mode) as part_file:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        part_file.write(chunk)
+            return response.url
+        except requests.RequestException as error:
+            if attempt == retries:
+                raise BootstrapError(f"Unable to download {url}: {error}")
+            logger.info(f"Download of {url} interrupted ({error}), retrying")
+            time.sleep(min(2**attempt, 30))
+
+
+def extract_members(
+    archive_path: str | Path, patterns: list[str], target_directory: str | Path
+) -> list[Path]:
+    """
+    Extract the archive members matching `patterns` to `target_directory`.
+
+    Members are saved with their base name, without their parent directories.
+    Tar archives are read as a stream, so they are never fully loaded in memory.
+
+    Returns
+    -------
+    paths : list[Path]
+        Paths of the extracted files.
+
+    Raises
+    ------
+    BootstrapError
+        If no member matches one of the patterns.
+    """
+    target_directory = Path(target_directory)
+    target_directory.mkdir(parents=True, exist_ok=True)
+    extracted = []
+    matched_patterns = set()
+
+    def save(name, source, mode):
+        for pattern in patterns:
+            if fnmatch.fnmatch(name, pattern):
+                matched_patterns.add(pattern)
+                break
+        else:
+            return
+
+        target_path = target_directory / Path(name).name
+        temp_path = target_path.with_name(target_path.name + ".tmp")
+        with open(temp_path, "wb") as target_file:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                target_file.write(chunk)
+        if mode & stat.S_IXUSR:
+            temp_path.chmod(temp_path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP)
+        os.replace(temp_path, target_path)
+        extracted.append(target_path)
+
+    try:
+        if zipfile.is_zipfile(archive_path):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    with archive.open(info) as source:
+                        save(info.filename, source, info.external_attr >> 16)
+        else:
+            with tarfile.open(archive_path, "r|*") as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    save(member.name, archive.extractfile(member), member.mode)
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as error:
+        raise BootstrapError(f"Unable to extract {archive_path}: {error}")
+
+    missing = set(patterns) - matched_patterns
+    if missing:
+        raise BootstrapError(
+            f"Members {', '.join(sorted(missing))} not found in {archive_path}"
+        )
+    return extracted
+
+
+def bootstrap_executable(
+    tool: str,
+    target_directory: str | Path,
+    platform_name: str | None = None,
+    manifest: dict | None = None,
+) -> list[Path]:
+    """
+    Download the artifacts of a tool and extract their members.
+
+    Artifacts available in the local artifacts directory are used instead of
+    downloading them. Downloads are kept in `target_directory` until their
+    members are extracted, so an interrupted bootstrap is resumed the next time
+    it runs.
+
+    Parameters
+    ----------
+    tool : str
+        Name of the tool in the manifest (e.g. `micromamba`).
+    target_directory : str or Path
+        Directory where the members are extracted.
+    platform_name : str, optional
+        Conda platform name. The default is the running platform.
+    manifest : dict, optional
+        Bootstrap manifest. The default is the one loaded with `load_manifest`.
+
+    Returns
+    -------
+    paths : list[Path]
+        Paths of the extracted files.
+    """
+    target_directory = Path(target_directory)
+    artifacts_directory = get_artifacts_directory()
+    extracted = []
+    for artifact in get_artifacts(tool, platform_name, manifest):
+        filename = get_artifact_filename(artifact)
+        archive_path = target_directory / filename
+
+        url = artifact["url"]
+        if artifacts_directory is not None:
+            local_path = artifacts_directory / filename
+            if local_path.is_file():
+                url = local_path.absolute().as_uri()
+            else:
+                logger.info(f"{filename} not found in {artifacts_directory}")
+
+        logger.info(f"Getting {tool} from {url}")
+        download(url, archive_path, sha256=artifact.get("sha256"))
+        extracted += extract_members(
+            archive_path, artifact["members"], target_directory
+        )
+        archive_path.unlink()
+
+    return extracted
+
+
+def pin_manifest(
+    path: str | Path | None = None, tools: list[str] | None = None
+) -> dict:
+    """
+    Download the artifacts of a bootstrap manifest and pin their hashes.
+
+    Artifact URLs that redirect (e.g. to the latest build of a version) are
+    replaced with the URL of the downloaded file, so the pinned hash keeps
+    matching. The manifest file is updated in place.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        Manifest to update. The default is `BOOTSTRAP_MANIFEST`.
+    tools : list[str], optional
+        Tools whose artifacts are pinned. The default is None, which pins all
+        of them.
+
+    Returns
+    -------
+    manifest : dict
+        The updated manifest.
+    """
+    import tempfile
+
+    path = BOOTSTRAP_MANIFEST if path is None else path
+    manifest = load_manifest(path)
+    with tempfile.TemporaryDirectory() as temp_directory:
+        part_path = Path(temp_directory) / "artifact.part"
+        for tool, platforms in manifest.get("tools", {}).items():
+            if tools is not None and tool not in tools:
+                continue
+            for platform_name, artifacts in platforms.items():
+                for artifact in artifacts:
+                    logger.info(f"Pinning {tool} for {platform_name}")
+                    part_path.unlink(missing_ok=True)
+                    url = _download_part(
+                        artifact["url"], part_path, DOWNLOAD_RETRIES, DOWNLOAD_TIMEOUT
+                    )
+                    artifact["url"] = url
+                    artifact["sha256"] = file_sha256(part_path)
+
+    temp_path = Path(f"{path}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+        manifest_file.write("\n")
+    os.replace(temp_path, path)
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m envs_manager.backends.bootstrap",
+        description="Maintain the bootstrap manifest of the backend executables.",
+    )
+    parser.add_argument(
+        "--pin",
+        action="store_true",
+        help="Download the artifacts and pin their URL and SHA-256 hash.",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Fail if any artifact has no pinned SHA-256 hash.",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=BOOTSTRAP_MANIFEST,
+        help="Manifest file to update. Defaults to the bundled one.",
+    )
+    parser.add_argument("tools", nargs="*", help="Tools to pin. Defaults to all.")
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if options.pin:
+        pin_manifest(options.manifest, options.tools or None)
+    elif options.check:
+        unpinned = [
+            f"{tool} ({platform_name})"
+            for tool, platforms in load_manifest(options.manifest)["tools"].items()
+            for platform_name, artifacts in platforms.items()
+            for artifact in artifacts
+            if not artifact.get("sha256")
+            and (not options.tools or tool in options.tools)
+        ]
+        if unpinned:
+            sys.exit(f"Unpinned bootstrap artifacts: {', '.join(unpinned)}")
+    else:
+        parser.print_help()
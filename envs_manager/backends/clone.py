@@ -0,0 +1,316 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Utilities to clone environments without downloading or installing packages.
+
+Files are cloned with reflinks (copy-on-write copies) where the filesystem
+supports them and copied otherwise. Hardlinks are only used for the files known
+to be never modified in place, like the payload of conda packages (which conda
+already hardlinks from its package cache), since changing a hardlinked file in
+the clone would change it in the source too. Files that contain the environment
+prefix are always copied, and the prefix is replaced in the copy.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import sys
+
+if os.name != "nt":
+    import fcntl
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Files in these directories (e.g. the `history` file) are modified in place by
+# the backends, so they are never linked.
+COPIED_DIRECTORIES = {"conda-meta"}
+
+# Max size of the files checked for the prefix in the scanned directories. Larger
+# files are binaries whose prefix is handled with their conda placeholder info.
+SCAN_MAX_SIZE = 1024 * 1024
+
+# Linux ioctl to clone a file (see `man ioctl_ficlone`)
+FICLONE = 0x40049409
+
+TEXT_MODE = "text"
+BINARY_MODE = "binary"
+
+_clonefile = None
+if sys.platform == "darwin":
+    try:
+        _clonefile = ctypes.CDLL(
+            ctypes.util.find_library("c"), use_errno=True
+        ).clonefile
+    except (OSError, AttributeError):
+        pass
+
+
+class _LinkStrategy:
+    """
+    Track which ways of linking files work between two directories.
+
+    Once reflinks or hardlinks fail because the filesystem doesn't support them,
+    they are not tried again for the rest of the clone.
+    """
+
+    def __init__(self):
+        self.reflinks = os.name != "nt"
+        self.hardlinks = True
+        self.counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+
+    def link(self, source: str, target: str, hardlink: bool = False):
+        if self.reflinks:
+            try:
+                _reflink(source, target)
+                self.counts["reflink"] += 1
+                return
+            except OSError as error:
+                if os.path.lexists(target):
+                    os.unlink(target)
+                if error.errno in (
+                    errno.EOPNOTSUPP,
+                    errno.ENOTTY,
+                    errno.EXDEV,
+                    errno.EINVAL,
+                    errno.ENOSYS,
+                    errno.ENOTSUP,
+                ):
+                    self.reflinks = False
+                else:
+                    raise
+
+        if hardlink and self.hardlinks:
+            try:
+                os.link(source, target)
+                self.counts["hardlink"] += 1
+                return
+            except OSError as error:
+                if error.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    self.hardlinks = False
+                else:
+                    raise
+
+        shutil.copy2(source, target)
+        self.counts["copy"] += 1
+
+
+def _reflink(source: str, target: str):
+    if _clonefile is not None:
+        if _clonefile(os.fsencode(source), os.fsencode(target), 0) != 0:
+            error_number = ctypes.get_errno()
+            raise OSError(error_number, os.strerror(error_number))
+        return
+
+    if os.name == "nt":
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported")
+
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+    shutil.copystat(source, target)
+
+
+def replace_prefix_binary(data: bytes, old_prefix: bytes, new_prefix: bytes) -> bytes:
+    """
+    Replace a prefix in a binary file keeping its size.
+
+    The prefix is replaced in each null terminated string that contains it, and
+    the string is padded with null bytes (or the padding it already has is
+    reduced) to keep its length, as conda does when installing packages.
+
+    Raises
+    ------
+    ValueError
+        If the new prefix doesn't fit in a string.
+    """
+
+    def replace(match):
+        string = match.group()
+        occurrences = string.count(old_prefix)
+        padding = (len(old_prefix) - len(new_prefix)) * occurrences
+        new_string = string.replace(old_prefix, new_prefix)
+        if padding >= 0:
+            return new_string + b"\0" * padding
+
+        # Use the extra nulls after the string, if there are enough of them
+        trailing_nulls = len(match.group(2))
+        if trailing_nulls + padding < 1:
+            raise ValueError(
+                f"The new prefix is too long to be replaced in a binary file "
+                f"({len(new_prefix)} bytes, at most "
+                f"{len(old_prefix) + (trailing_nulls - 1) // occurrences} bytes "
+                f"can be used)"
+            )
+        return new_string[: len(new_string) + padding]
+
+    pattern = re.compile(re.escape(old_prefix) + rb"([^\0]*?)(\0+)")
+    return pattern.sub(replace, data)
+
+
+def _prefix_variants(prefix: str) -> list[bytes]:
+    variants = [prefix]
+    if os.name == "nt":
+        variants.append(prefix.replace("\\", "/"))
+    return [variant.encode("utf-8") for variant in variants]
+
+
+def _rewrite_file(
+    source: str, target: str, old_prefix: str, new_prefix: str, mode: str
+) -> bool:
+    with open(source, "rb") as source_file:
+        data = source_file.read()
+
+    old_variants = _prefix_variants(old_prefix)
+    new_variants = _prefix_variants(new_prefix)
+    contains_prefix = any(variant in data for variant in old_variants)
+
+    if contains_prefix:
+        for old_variant, new_variant in zip(old_variants, new_variants):
+            if mode == BINARY_MODE:
+                data = replace_prefix_binary(data, old_variant, new_variant)
+            else:
+                data = data.replace(old_variant, new_variant)
+
+    with open(target, "wb") as target_file:
+        target_file.write(data)
+    shutil.copymode(source, target)
+    return contains_prefix
+
+
+def _contains_prefix(path: str, size: int, prefix: str) -> str | None:
+    """Check if a file contains `prefix` and return its mode in that case."""
+    if size > SCAN_MAX_SIZE:
+        return None
+
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+
+    if any(variant in data for variant in _prefix_variants(prefix)):
+        return BINARY_MODE if b"\0" in data else TEXT_MODE
+    return None
+
+
+def clone_prefix(
+    source: str | Path,
+    target: str | Path,
+    prefix_files: dict[str, str] | None = None,
+    scan_directories: tuple[str, ...] = (),
+    linkable_files: set[str] | None = None,
+) -> dict[str, int]:
+    """
+    Clone the environment at `source` to `target`.
+
+    Parameters
+    ----------
+    source : str or Path
+        Path to the environment to clone.
+    target : str or Path
+        Path where the environment will be cloned. It must not exist.
+    prefix_files : dict[str, str], optional
+        Files known to contain the `source` prefix, as a mapping of paths
+        relative to `source` to `text` or `binary` (e.g. the files with a prefix
+        placeholder in conda packages). The default is None.
+    scan_directories : tuple[str, ...], optional
+        Directories relative to `source` whose files (but not subdirectories)
+        are checked for the `source` prefix, like the ones with entry point
+        scripts. The default is ().
+    linkable_files : set[str], optional
+        Files relative to `source` that are never modified in place, so they
+        can be hardlinked when reflinks are not supported. The other files are
+        copied in that case. The default is None.
+
+    Returns
+    -------
+    counts : dict[str, int]
+        Number of files that were reflinked, hardlinked, copied and rewritten.
+    """
+    source = os.path.abspath(source)
+    target = os.path.abspath(target)
+    prefix_files = {
+        os.path.normcase(os.path.normpath(path)): mode
+        for path, mode in (prefix_files or {}).items()
+    }
+    scan_directories = {
+        os.path.normcase(os.path.normpath(path)) for path in scan_directories
+    }
+    linkable_files = {
+        os.path.normcase(os.path.normpath(path)) for path in linkable_files or ()
+    }
+
+    strategy = _LinkStrategy()
+    rewritten = 0
+    os.makedirs(target)
+
+    for directory, dirnames, filenames in os.walk(source):
+        relative_directory = os.path.relpath(directory, source)
+        target_directory = os.path.join(target, relative_directory)
+        normalized_directory = os.path.normcase(relative_directory)
+        copy_directory = (
+            relative_directory == os.curdir
+            or os.path.basename(directory) in COPIED_DIRECTORIES
+        )
+
+        # Symlinks to directories are not followed by `os.walk`, so they are
+        # handled here with the other links.
+        names = list(filenames)
+        for dirname in list(dirnames):
+            if os.path.islink(os.path.join(directory, dirname)):
+                dirnames.remove(dirname)
+                names.append(dirname)
+            else:
+                os.mkdir(os.path.join(target_directory, dirname))
+
+        for name in names:
+            source_path = os.path.join(directory, name)
+            target_path = os.path.join(target_directory, name)
+            relative_path = os.path.normcase(
+                os.path.normpath(os.path.join(relative_directory, name))
+            )
+
+            if os.path.islink(source_path):
+                link_target = os.readlink(source_path)
+                if os.path.isabs(link_target) and (
+                    link_target == source or link_target.startswith(source + os.sep)
+                ):
+                    link_target = target + link_target[len(source) :]
+                os.symlink(link_target, target_path)
+                continue
+
+            mode = prefix_files.get(relative_path)
+            if mode is None and normalized_directory in scan_directories:
+                mode = _contains_prefix(
+                    source_path, os.stat(source_path).st_size, source
+                )
+
+            if mode is not None or copy_directory:
+                if _rewrite_file(
+                    source_path, target_path, source, target, mode or TEXT_MODE
+                ):
+                    rewritten += 1
+                else:
+                    strategy.counts["copy"] += 1
+            else:
+                strategy.link(
+                    source_path,
+                    target_path,
+                    hardlink=relative_path in linkable_files,
+                )
+
+        shutil.copystat(directory, target_directory)
+
+    counts = dict(strategy.counts, rewritten=rewritten)
+    logger.debug(f"Cloned {source} to {target}: {counts}")
+    return counts
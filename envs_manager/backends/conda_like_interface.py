@@ -2,26 +2,31 @@
 #
 # SPDX-License-Identifier: MIT
 
-import json
 import logging
 import os
 from pathlib import Path
-import platform
-import shutil
 import subprocess
-import sys
-import tarfile
 
 from packaging.version import parse
-import requests
-import yaml
 
+from envs_manager.backends import conda_meta
 from envs_manager.backends.api import (
     BackendActionResult,
     BackendInstance,
-    get_package_info,
+    get_packages_info,
     run_command,
 )
+from envs_manager.backends.bootstrap import (
+    BootstrapError,
+    bootstrap_executable,
+    get_platform,
+)
+from envs_manager.backends.env_index import (
+    EnvironmentInfo,
+    directory_size,
+    last_modified,
+)
+from envs_manager.backends.package_cache import list_cache_entries
 
 MICROMAMBA_VARIANT = "micromamba"
 CONDA_VARIANT = "conda"
@@ -32,6 +37,9 @@
 
 class CondaLikeInterface(BackendInstance):
     ID = "conda-like"
+    EXECUTABLE_NAME = "micromamba"
+    PACKAGE_CACHE_VARIABLE = "CONDA_PKGS_DIRS"
+    PACKAGE_CACHE_NAME = "conda-pkgs"
 
     def __init__(self, environment_path, envs_directory, bin_directory):
         super().__init__(environment_path, envs_directory, bin_directory)
@@ -39,12 +47,11 @@ def __init__(self, environment_path, envs_directory, bin_directory):
         # This is needed for Micromamba
         os.environ["MAMBA_ROOT_PREFIX"] = str(Path(self.envs_directory).parent)
 
-    @property
-    def python_executable_path(self):
+    def get_python_executable_path(self, environment_path):
         if os.name == "nt":
-            python_executable_path = Path(self.environment_path) / "python.exe"
+            python_executable_path = Path(environment_path) / "python.exe"
         else:
-            python_executable_path = Path(self.environment_path) / "bin" / "python"
+            python_executable_path = Path(environment_path) / "bin" / "python"
 
         return str(python_executable_path)
 
@@ -58,9 +65,14 @@ def validate(self):
             )
 
         if self.external_executable:
+            cached_validation = self.get_cached_validation(self.external_executable)
+            if cached_validation is not None:
+                self.executable_variant = cached_validation["executable_variant"]
+                return True
+
             command = [self.external_executable, "--version"]
             try:
-                result = run_command(command, capture_output=True)
+                result = run_command(command, capture_output=True, streamable=False)
                 version = result.stdout.split()
                 if len(version) <= 1:
                     # We don't support Micromamba 2.0+ because it's not very reliable
@@ -74,6 +86,10 @@ def validate(self):
                         self.executable_variant = version[0]
                     else:
                         return False
+                self.set_cached_validation(
+                    self.external_executable,
+                    dict(executable_variant=self.executable_variant),
+                )
                 return True
             except Exception as error:
                 logger.error(error.stderr)
@@ -81,72 +97,10 @@ def validate(self):
         return False
 
     def install_backend_executable(self):
-        # OS route for the Micromamba URL
-        machine = platform.machine()
-        if os.name == "nt":
-            os_route = "win-64"
-        elif sys.platform == "darwin":
-            if machine == "arm64" or machine == "aarch64":
-                os_route = "osx-arm64"
-            else:
-                os_route = "osx-64"
-        else:
-            if machine == "x86_64":
-                os_route = "linux-64"
-            elif machine == "aarch64":
-                os_route = "linux-aarch64"
-            else:
-                os_route = "linux-ppc64le"
-
-        # Download compressed Micromamba file
-        bin_directory_as_path = Path(self.bin_directory)
-        compressed_file = "micromamba.tar.bz2"
-        path_to_compressed_file = bin_directory_as_path / compressed_file
-
-        req = requests.get(f"https://micro.mamba.pm/api/micromamba/{os_route}/1.5.10")
-        with open(path_to_compressed_file, "wb") as f:
-            f.write(req.content)
-
-        # Extract micromamba from compressed file
-        with tarfile.open(path_to_compressed_file, "r:bz2") as tar:
-            tar.extractall(path=self.bin_directory)
-
-        # Move micromamba to the location we need
-        exec_extension = ".exe" if os.name == "nt" else ""
-        end_path = (
-            bin_directory_as_path / "Library" / "bin" / "micromamba.exe"
-            if os.name == "nt"
-            else bin_directory_as_path / "bin" / "micromamba"
-        )
-        shutil.move(end_path, bin_directory_as_path / f"micromamba{exec_extension}")
-
-        # On Windows we also need the VS14 runtime because micromamba is linked against
-        # it
-        if os.name == "nt":
-            path_to_compressed_vs_runtime = (
-                "vs2015_runtime-14.28.29325-h8ebdc22_9.tar.bz2"
-            )
-            req = requests.get(
-                f"https://anaconda.org/conda-forge/vs2015_runtime/14.28.29325/download/"
-                f"win-64/{path_to_compressed_vs_runtime}"
-            )
-            with open(path_to_compressed_vs_runtime, "wb") as f:
-                f.write(req.content)
-
-            with tarfile.open(path_to_compressed_vs_runtime, "r:bz2") as tar:
-                tar.extractall(path=self.bin_directory)
-
-        # Clean up
         try:
-            os.remove(path_to_compressed_file)
-            shutil.rmtree(bin_directory_as_path / "info")
-            if os.name == "nt":
-                os.remove(path_to_compressed_vs_runtime)
-                shutil.rmtree(bin_directory_as_path / "Library")
-            else:
-                shutil.rmtree(bin_directory_as_path / "bin")
-        except Exception:
-            pass
+            bootstrap_executable("micromamba", self.bin_directory)
+        except BootstrapError as error:
+            logger.error(error)
 
     def create_environment(self, packages=None, channels=None, force=False):
         command = [self.external_executable, "create", "-p", self.environment_path]
@@ -163,7 +117,7 @@ def create_environment(self, packages=None, channels=None, force=False):
             command += ["-y"]
 
         try:
-            result = run_command(command, capture_output=True)
+            result = self.run_command(command, capture_output=True)
             logger.info(result.stdout)
             return BackendActionResult(status=True, output=result.stdout)
         except subprocess.CalledProcessError as error:
@@ -172,24 +126,17 @@ def create_environment(self, packages=None, channels=None, force=False):
             return BackendActionResult(status=False, output=str(error))
 
     def delete_environment(self, force=False):
-        command = [
-            self.external_executable,
-            "remove",
-            "-p",
-            self.environment_path,
-            "--all",
-        ]
-        if force:
-            command += ["-y"]
-
+        # Moving the environment to the trash doesn't unregister it like
+        # `micromamba remove --all` does, so it's removed from the registered
+        # environments first to keep `micromamba env list` and conda in sync.
         try:
-            result = run_command(command, capture_output=True)
-            logger.info(result.stdout)
-            return BackendActionResult(status=True, output=result.stdout)
-        except subprocess.CalledProcessError as error:
-            return BackendActionResult(status=False, output=error.stderr)
-        except Exception as error:
-            return BackendActionResult(status=False, output=str(error))
+            conda_meta.unregister_environment(self.environment_path)
+        except OSError as error:
+            logger.warning(f"Unable to unregister {self.environment_path}: {error}")
+        return super().delete_environment(force=force)
+
+    def get_package_files(self):
+        return conda_meta.read_package_files(self.environment_path)
 
     def activate_environment(self):
         raise NotImplementedError()
@@ -197,7 +144,10 @@ def activate_environment(self):
     def deactivate_environment(self):
         raise NotImplementedError()
 
-    def export_environment(self, export_file_path=None):
+    def export_environment(self, export_file_path=None, lock=False):
+        if lock:
+            return self._export_explicit_lock(export_file_path)
+
         command = [
             self.external_executable,
             "env",
@@ -207,7 +157,7 @@ def export_environment(self, export_file_path=None):
             "--from-history",
         ]
         try:
-            result = run_command(command, capture_output=True)
+            result = self.run_command(command, capture_output=True, streamable=False)
             if export_file_path:
                 with open(export_file_path, "w") as exported_file:
                     exported_file.write(result.stdout)
@@ -219,7 +169,23 @@ def export_environment(self, export_file_path=None):
         except Exception as error:
             return BackendActionResult(status=False, output=str(error))
 
+    def _export_explicit_lock(self, export_file_path=None):
+        try:
+            lock = conda_meta.explicit_lock(self.environment_path)
+            if export_file_path:
+                with open(export_file_path, "w") as exported_file:
+                    exported_file.write(lock)
+            logger.info(lock)
+            return BackendActionResult(status=True, output=lock)
+        except Exception as error:
+            logger.error(error)
+            return BackendActionResult(status=False, output=str(error))
+
     def import_environment(self, import_file_path, force=False):
+        lock_platform = conda_meta.read_explicit_lock_platform(import_file_path)
+        if lock_platform is not None:
+            return self._import_explicit_lock(import_file_path, lock_platform, force)
+
         if self.executable_variant == MICROMAMBA_VARIANT:
             command = [
                 self.external_executable,
@@ -242,7 +208,7 @@ def import_environment(self, import_file_path, force=False):
             command += ["-y"]
 
         try:
-            result = run_command(command, capture_output=True)
+            result = self.run_command(command, capture_output=True)
             logger.info(result.stdout)
             return BackendActionResult(status=True, output=result.stdout)
         except subprocess.CalledProcessError as error:
@@ -257,6 +223,37 @@ def import_environment(self, import_file_path, force=False):
         except Exception as error:
             return BackendActionResult(status=False, output=str(error))
 
+    def _import_explicit_lock(self, import_file_path, lock_platform, force=False):
+        # Packages are installed from their URLs without solving, so the lock
+        # only works on the platform where it was exported
+        if lock_platform and lock_platform != get_platform():
+            msg = (
+                f"The lock file was exported for {lock_platform} and can't be "
+                f"installed on {get_platform()}"
+            )
+            logger.error(msg)
+            return BackendActionResult(status=False, output=msg)
+
+        command = [
+            self.external_executable,
+            "create",
+            "-p",
+            self.environment_path,
+            f"--file={import_file_path}",
+        ]
+        if force:
+            command += ["-y"]
+
+        try:
+            result = self.run_command(command, capture_output=True)
+            logger.info(result.stdout)
+            return BackendActionResult(status=True, output=result.stdout)
+        except subprocess.CalledProcessError as error:
+            logger.error(error.stderr)
+            return BackendActionResult(status=False, output=error.stderr)
+        except Exception as error:
+            return BackendActionResult(status=False, output=str(error))
+
     def install_packages(
         self,
         packages,
@@ -280,7 +277,7 @@ def install_packages(
                 command += ["-c"] + [channel]
 
         try:
-            result = run_command(command, capture_output=capture_output)
+            result = self.run_command(command, capture_output=capture_output)
             if capture_output:
                 logger.info(result.stdout or result.stderr)
             return BackendActionResult(
@@ -302,7 +299,7 @@ def uninstall_packages(self, packages, force=False, capture_output=False):
         if force:
             command += ["-y"]
         try:
-            result = run_command(command, capture_output=capture_output)
+            result = self.run_command(command, capture_output=capture_output)
             if capture_output:
                 logger.info(result.stdout or result.stderr)
             return BackendActionResult(
@@ -326,7 +323,7 @@ def update_packages(self, packages, force=False, capture_output=False):
         if force:
             command += ["-y"]
         try:
-            result = run_command(command, capture_output=capture_output)
+            result = self.run_command(command, capture_output=capture_output)
             if capture_output:
                 logger.info(result.stdout)
                 if "All requested packages already installed" in result.stdout:
@@ -342,85 +339,97 @@ def update_packages(self, packages, force=False, capture_output=False):
             return BackendActionResult(status=False, output=str(error))
 
     def list_packages(self):
-        command = [self.external_executable, "list", "-p", self.environment_path]
-        result = run_command(command, capture_output=True)
-        result_lines = result.stdout.split("\n")
-
-        export_env_result = self.export_environment()
-        if export_env_result["status"]:
-            packages_requested = yaml.load(
-                export_env_result["output"], Loader=yaml.FullLoader
-            )["dependencies"]
-            packages_requested = [
-                package.split("[")[0].split("=")[0] for package in packages_requested
-            ]
-        else:
-            packages_requested = []
-
-        if self.executable_variant == MICROMAMBA_VARIANT:
-            skip_lines = 4
-        else:
-            skip_lines = 3
+        records = conda_meta.read_records(self.environment_path)
+        if records is None:
+            msg = f"No conda environment found at {self.environment_path}"
+            logger.error(msg)
+            return BackendActionResult(status=False, output=msg)
+
+        packages_requested = conda_meta.read_requested_specs(self.environment_path)
+
+        # Only query the packages info API for packages whose description is not
+        # available in the packages cache
+        missing_descriptions = [
+            (record["name"], conda_meta.channel_name(record.get("channel")))
+            for record in records
+            if not record["about"].get("summary")
+        ]
+        packages_info = dict(
+            zip(
+                [package_name for package_name, __ in missing_descriptions],
+                get_packages_info(missing_descriptions, cache=self.package_info_cache),
+            )
+        )
 
         formatted_packages = []
         formatted_list = dict(
             environment=self.environment_path, packages=formatted_packages
         )
-        for package in result_lines[skip_lines:-1]:
-            package_info = package.split()
-            package_name = package_info[0]
-            package_build = None if len(package_info) <= 2 else package_info[2]
-            package_channel = None if len(package_info) <= 3 else package_info[3]
-            package_full_info = get_package_info(package_name, channel=package_channel)
-            package_description = (
-                package_full_info["info"]["summary"] if package_full_info else None
-            )
-            package_requested = package_name in packages_requested
+        for record in records:
+            package_name = record["name"]
+            package_channel = conda_meta.channel_name(record.get("channel"))
+            package_description = record["about"].get("summary")
+            if not package_description:
+                package_full_info = packages_info.get(package_name)
+                package_description = (
+                    package_full_info["info"]["summary"] if package_full_info else None
+                )
             formatted_package = dict(
                 name=package_name,
-                version=package_info[1],
-                build=package_build,
+                version=record["version"],
+                build=record.get("build"),
                 channel=package_channel,
                 description=package_description,
-                requested=package_requested,
+                requested=package_name in packages_requested,
             )
             formatted_packages.append(formatted_package)
+            logger.info(
+                f"{package_name} {record['version']} {record.get('build', '')} "
+                f"{package_channel or ''}".strip()
+            )
 
-        logger.info(result.stdout)
         return BackendActionResult(status=True, output=formatted_list)
 
-    def list_environments(self):
-        environments = {}
-        first_environment = False
-        command = [self.external_executable, "env", "list", "--json"]
+    def get_environment_packages(self):
+        conda_meta_path = Path(self.environment_path) / "conda-meta"
+        return {record_path.stem for record_path in conda_meta_path.glob("*.json")}
+
+    def get_package_cache_entries(self, since=None):
+        return list_cache_entries(self.package_cache_path, since=since)
 
+    def list_environments(self, details=False):
+        # Environments are looked up directly in the envs directory instead of
+        # running `env list`, which enumerates all the environments known to
+        # the executable (not only the ones in the envs directory).
+        environments = {}
         envs_directory = Path(self.envs_directory)
         envs_directory.mkdir(parents=True, exist_ok=True)
 
-        try:
-            result = run_command(command, capture_output=True)
-            logger.debug(result.stdout)
-
-            result_json = json.loads(result.stdout)
-            logger.debug(result_json)
-
-            logger.info(f"# {self.ID} environments")
-            for env_dir in result_json["envs"]:
-                env_dir_path = Path(env_dir)
-                if envs_directory in env_dir_path.parents:
-                    if not first_environment:
-                        first_environment = True
-                    environments[env_dir_path.name] = str(env_dir_path)
-                    logger.info(f"{env_dir_path.name} - {str(env_dir_path)}")
-
-            if not first_environment:
-                logger.info(
-                    f"No environments found for {self.ID} in {self.envs_directory}"
-                )
-
-            return BackendActionResult(status=True, output=environments)
-        except subprocess.CalledProcessError as error:
-            logger.error(error.stderr)
-            return BackendActionResult(status=False, output=error.stderr)
-        except Exception as error:
-            return BackendActionResult(status=False, output=str(error))
+        logger.info(f"# {self.ID} environments")
+        for env_dir_path in sorted(envs_directory.iterdir()):
+            if (env_dir_path / "conda-meta").is_dir():
+                environments[env_dir_path.name] = str(env_dir_path)
+                logger.info(f"{env_dir_path.name} - {str(env_dir_path)}")
+
+        if not environments:
+            logger.info(f"No environments found for {self.ID} in {self.envs_directory}")
+
+        if details:
+            environments = self.get_environments_info(environments)
+        return BackendActionResult(status=True, output=environments)
+
+    def get_environment_markers(self, environment_path):
+        # `conda-meta` changes when packages are added or removed and its
+        # `history` file is appended on every transaction.
+        conda_meta_path = environment_path / "conda-meta"
+        return [conda_meta_path, conda_meta_path / "history"]
+
+    def describe_environment(self, environment_path):
+        return EnvironmentInfo(
+            path=str(environment_path),
+            python_version=conda_meta.python_version(environment_path),
+            package_count=conda_meta.count_records(environment_path),
+            disk_size=directory_size(environment_path),
+            last_modified=last_modified(self.get_environment_markers(environment_path)),
+            healthy=Path(self.get_python_executable_path(environment_path)).is_file(),
+        )
@@ -0,0 +1,460 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""Utilities to read the metadata of conda environments directly from disk."""
+
+from __future__ import annotations
+
+import ast
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+from pathlib import Path
+import re
+from urllib.parse import urlparse
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Number of records from which `conda-meta` is read using a thread pool
+PARALLEL_READ_THRESHOLD = 64
+
+# Max number of threads used to read `conda-meta` records
+MAX_READ_WORKERS = 8
+
+SUBDIRS = (
+    "noarch",
+    "linux-32",
+    "linux-64",
+    "linux-aarch64",
+    "linux-armv6l",
+    "linux-armv7l",
+    "linux-ppc64le",
+    "linux-s390x",
+    "osx-64",
+    "osx-arm64",
+    "win-32",
+    "win-64",
+    "win-arm64",
+)
+
+# Line that starts the package URLs in explicit lock files
+EXPLICIT_MARKER = "@EXPLICIT"
+
+# File where conda and micromamba register the environments they create
+ENVIRONMENTS_FILE = str(Path("~", ".conda", "environments.txt").expanduser())
+
+_HISTORY_SPECS_REGEX = re.compile(r"^# (update|remove|neutered) specs: (.*)$")
+_SPEC_NAME_REGEX = re.compile(r"[\s=<>!~\[(]")
+
+
+def channel_name(channel: str | None) -> str | None:
+    """
+    Get the channel name from the channel info saved in a `conda-meta` record.
+
+    Records can save the channel as a name (e.g. `conda-forge`) or as a URL
+    (e.g. `https://conda.anaconda.org/conda-forge/linux-64`).
+    """
+    if not channel or "://" not in channel:
+        return channel or None
+
+    parts = [part for part in urlparse(channel).path.split("/") if part]
+    if parts and parts[-1] in SUBDIRS:
+        parts = parts[:-1]
+    return parts[-1] if parts else channel
+
+
+def spec_name(spec: str) -> str:
+    """Get the package name of a match spec (e.g. `python` for `python>=3.10`)."""
+    spec = spec.split("::")[-1].strip()
+    return _SPEC_NAME_REGEX.split(spec, maxsplit=1)[0]
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError) as error:
+        logger.debug(f"Unable to read {path}: {error}")
+        return None
+
+
+def _read_record(record_path: Path) -> dict | None:
+    record = _read_json(record_path)
+    if record is None:
+        return None
+
+    about = None
+    extracted_package_dir = record.get("extracted_package_dir")
+    if extracted_package_dir:
+        about = _read_json(Path(extracted_package_dir) / "info" / "about.json")
+
+    record["about"] = about or {}
+    return record
+
+
+def read_records(prefix: str | Path) -> list[dict] | None:
+    """
+    Read the `conda-meta` records of the packages installed in `prefix`.
+
+    The `about.json` file of each package is also read from the package cache
+    (if available) and saved in the `about` key of its record.
+
+    Parameters
+    ----------
+    prefix : str or Path
+        Path to the environment.
+
+    Returns
+    -------
+    records : list[dict] or None
+        Records sorted by package name, or None if `prefix` is not a conda
+        environment.
+    """
+    conda_meta = Path(prefix) / "conda-meta"
+    if not conda_meta.is_dir():
+        return None
+
+    record_paths = list(conda_meta.glob("*.json"))
+    if len(record_paths) >= PARALLEL_READ_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as executor:
+            records = list(executor.map(_read_record, record_paths))
+    else:
+        records = [_read_record(record_path) for record_path in record_paths]
+
+    records = [record for record in records if record and "name" in record]
+    records.sort(key=lambda record: record["name"])
+    return records
+
+
+def read_requested_specs(prefix: str | Path) -> dict[str, str]:
+    """
+    Get the specs explicitly requested for `prefix` from its `conda-meta/history`.
+
+    Parameters
+    ----------
+    prefix : str or Path
+        Path to the environment.
+
+    Returns
+    -------
+    requested_specs : dict[str, str]
+        Mapping of package name to the last spec requested for it.
+    """
+    requested_specs = {}
+    history_path = Path(prefix) / "conda-meta" / "history"
+
+    try:
+        with open(history_path, encoding="utf-8") as history_file:
+            lines = history_file.readlines()
+    except OSError:
+        return requested_specs
+
+    for line in lines:
+        match = _HISTORY_SPECS_REGEX.match(line.strip())
+        if not match:
+            continue
+
+        action, specs = match.groups()
+        try:
+            specs = ast.literal_eval(specs)
+        except (ValueError, SyntaxError):
+            specs = [spec.strip() for spec in specs.strip("[]").split(",")]
+
+        for spec in specs:
+            spec = spec.strip().strip("'\"")
+            name = spec_name(spec)
+            if not name:
+                continue
+            if action == "remove":
+                requested_specs.pop(name, None)
+            else:
+                requested_specs[name] = spec
+
+    return requested_specs
+
+
+def count_records(prefix: str | Path) -> int:
+    """Get the number of packages installed in `prefix` without reading them."""
+    try:
+        return sum(
+            1
+            for entry in os.scandir(Path(prefix) / "conda-meta")
+            if entry.name.endswith(".json")
+        )
+    except OSError:
+        return 0
+
+
+def python_version(prefix: str | Path) -> str | None:
+    """Get the version of Python installed in `prefix`, if any."""
+    for record_path in (Path(prefix) / "conda-meta").glob("python-[0-9]*.json"):
+        record = _read_json(record_path)
+        if record and record.get("name") == "python":
+            return record.get("version")
+    return None
+
+
+def unregister_environment(
+    prefix: str | Path, environments_file: str | Path | None = None
+) -> bool:
+    """
+    Remove `prefix` from the environments registered by conda and micromamba.
+
+    Parameters
+    ----------
+    prefix : str or Path
+        Path to the environment.
+    environments_file : str or Path, optional
+        File with the registered environments. The default is
+        `ENVIRONMENTS_FILE`.
+
+    Returns
+    -------
+    unregistered : bool
+        Whether `prefix` was registered.
+    """
+    environments_file = Path(
+        ENVIRONMENTS_FILE if environments_file is None else environments_file
+    )
+    try:
+        lines = environments_file.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return False
+
+    normalized_prefix = os.path.normcase(os.path.abspath(prefix))
+    kept_lines = [
+        line
+        for line in lines
+        if not line.strip()
+        or os.path.normcase(os.path.abspath(line.strip())) != normalized_prefix
+    ]
+    if len(kept_lines) == len(lines):
+        return False
+
+    temp_path = environments_file.with_name(
+        f"{environments_file.name}.{os.getpid()}.tmp"
+    )
+    temp_path.write_text("".join(f"{line}\n" for line in kept_lines), encoding="utf-8")
+    os.replace(temp_path, environments_file)
+    return True
+
+
+def read_package_files(prefix: str | Path) -> dict[str, str | None]:
+    """
+    Get the files installed in `prefix` from its packages.
+
+    Parameters
+    ----------
+    prefix : str or Path
+        Path to the environment.
+
+    Returns
+    -------
+    package_files : dict[str, str | None]
+        Mapping of paths relative to `prefix` to the mode (`text` or `binary`)
+        of the files where the prefix was written when installing them, or None
+        for the ones installed unchanged, according to the `paths_data` of the
+        `conda-meta` records. Symlinks and directories are not included.
+    """
+    record_paths = list((Path(prefix) / "conda-meta").glob("*.json"))
+    if len(record_paths) >= PARALLEL_READ_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as executor:
+            records = list(executor.map(_read_json, record_paths))
+    else:
+        records = [_read_json(record_path) for record_path in record_paths]
+
+    package_files = {}
+    for record in records:
+        if not record:
+            continue
+        for path_info in record.get("paths_data", {}).get("paths", []):
+            if "_path" not in path_info:
+                continue
+            if path_info.get("path_type", "hardlink") != "hardlink":
+                continue
+            package_files[path_info["_path"]] = (
+                path_info.get("file_mode", "text")
+                if path_info.get("prefix_placeholder")
+                else None
+            )
+
+    return package_files
+
+
+def _sort_by_dependencies(records: list[dict]) -> list[dict]:
+    """Sort records so packages come after the packages they depend on."""
+    records_by_name = {record["name"]: record for record in records}
+    sorted_records = []
+    visited = set()
+
+    def visit(record):
+        stack = [(record, iter(record.get("depends", [])))]
+        visited.add(record["name"])
+        while stack:
+            current, dependencies = stack[-1]
+            for dependency in dependencies:
+                dependency_record = records_by_name.get(spec_name(dependency))
+                if dependency_record and dependency_record["name"] not in visited:
+                    visited.add(dependency_record["name"])
+                    stack.append(
+                        (
+                            dependency_record,
+                            iter(dependency_record.get("depends", [])),
+                        )
+                    )
+                    break
+            else:
+                stack.pop()
+                sorted_records.append(current)
+
+    for record in records:
+        if record["name"] not in visited:
+            visit(record)
+    return sorted_records
+
+
+def _record_subdir(record: dict) -> str | None:
+    subdir = record.get("subdir")
+    if not subdir and record.get("url"):
+        subdir = record["url"].rsplit("/", 2)[-2]
+    return subdir if subdir in SUBDIRS else None
+
+
+def read_pip_distributions(
+    prefix: str | Path, records: list[dict] | None = None
+) -> list[str]:
+    """
+    Get the Python distributions installed in `prefix` that are not part of its
+    conda packages (e.g. the ones installed with pip).
+
+    Parameters
+    ----------
+    prefix : str or Path
+        Path to the environment.
+    records : list[dict], optional
+        Records of `prefix`. The default is None, which reads them.
+
+    Returns
+    -------
+    distributions : list[str]
+        Sorted `name==version` of each distribution.
+    """
+    prefix = Path(prefix)
+    records = read_records(prefix) if records is None else records
+    conda_paths = set()
+    for record in records or []:
+        for path in record.get("files", []):
+            conda_paths.add(path)
+            conda_paths.add(path.rsplit("/", 1)[0])
+
+    distributions = []
+    site_packages = [prefix / "Lib" / "site-packages"] if os.name == "nt" else []
+    site_packages += prefix.glob("lib/python*/site-packages")
+    for directory in site_packages:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            stem, extension = os.path.splitext(entry.name)
+            relative_path = Path(entry.path).relative_to(prefix).as_posix()
+            if (
+                extension in (".dist-info", ".egg-info")
+                and relative_path not in conda_paths
+                and "-" in stem
+            ):
+                name, version = stem.split("-")[:2]
+                distributions.append(f"{name}=={version}")
+    return sorted(distributions)
+
+
+def explicit_lock(prefix: str | Path, platform: str | None = None) -> str:
+    """
+    Get an explicit lock with the packages installed in `prefix`.
+
+    It uses the `@EXPLICIT` format of `conda list --explicit --md5`: the URL of
+    each package with its MD5 hash, in dependency order. Conda and Micromamba
+    install these files without solving, reusing the packages in their cache
+    whose hashes match.
+
+    Python distributions installed with pip can't be locked in this format, so
+    they are listed in comments to show that the lock doesn't recreate them.
+
+    Parameters
+    ----------
+    prefix : str or Path
+        Path to the environment.
+    platform : str, optional
+        Conda platform of the environment (e.g. `linux-64`), used only if its
+        packages are all `noarch`. The default is None, which leaves the
+        platform out of the lock in that case. Otherwise the platform is the
+        `subdir` of the packages, since locks can only be installed on the
+        platform they were made for.
+
+    Raises
+    ------
+    ValueError
+        If `prefix` is not a conda environment, a package has no URL or the
+        packages are from several platforms.
+    """
+    records = read_records(prefix)
+    if records is None:
+        raise ValueError(f"{prefix} is not a conda environment")
+
+    subdirs = {_record_subdir(record) for record in records} - {None, "noarch"}
+    if len(subdirs) > 1:
+        raise ValueError(
+            f"The packages of {prefix} are from several platforms: "
+            f"{', '.join(sorted(subdirs))}"
+        )
+    platform = subdirs.pop() if subdirs else platform
+
+    lines = [
+        "# This file may be used to create an environment using:",
+        "# $ conda create --prefix <env> --file <this file>",
+    ]
+    if platform:
+        lines.append(f"# platform: {platform}")
+    lines += [
+        f"# Not locked, installed with pip: {distribution}"
+        for distribution in read_pip_distributions(prefix, records)
+    ]
+    lines.append(EXPLICIT_MARKER)
+    for record in _sort_by_dependencies(records):
+        url = record.get("url")
+        if not url:
+            raise ValueError(f"No URL is known for {record['name']}")
+        md5 = record.get("md5")
+        lines.append(f"{url}#{md5}" if md5 else url)
+
+    return "\n".join(lines) + "\n"
+
+
+def read_explicit_lock_platform(path: str | Path) -> str | None:
+    """
+    Get the platform of an explicit lock file.
+
+    Returns
+    -------
+    platform : str or None
+        Platform of the lock, `""` if it doesn't say, or None if `path` is not
+        an explicit lock.
+    """
+    platform = ""
+    try:
+        with open(path, encoding="utf-8") as lock_file:
+            for line in lock_file:
+                line = line.strip()
+                if line == EXPLICIT_MARKER:
+                    return platform
+                elif line.startswith("# platform:"):
+                    platform = line.split(":", 1)[1].strip()
+                elif line and not line.startswith("#"):
+                    return None
+    except (OSError, UnicodeDecodeError):
+        pass
+    return None
@@ -0,0 +1,237 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Index with the metadata of the environments of a backend.
+
+The metadata of an environment is only computed again when the modification time
+of one of its marker files (e.g. `conda-meta`, `pixi.lock` or `pyvenv.cfg`)
+changes, so listing environments with their metadata doesn't need to run any
+command or walk the environments each time.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Callable, TypedDict
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# File under the backend root path where the index is saved
+ENVIRONMENT_INDEX_FILENAME = "envs-index.json"
+
+# Version of the index format, to discard indexes saved by other versions
+ENVIRONMENT_INDEX_VERSION = 1
+
+_index_lock = threading.Lock()
+
+
+class EnvironmentInfo(TypedDict):
+    """Dictionary with the metadata of an environment."""
+
+    path: str
+    """Path to the environment."""
+
+    python_version: str | None
+    """Version of the Python interpreter installed in the environment."""
+
+    package_count: int
+    """Number of packages installed in the environment."""
+
+    disk_size: int
+    """Size in bytes of the files in the environment."""
+
+    last_modified: float | None
+    """Last time the environment was modified, as a timestamp."""
+
+    healthy: bool
+    """True if the environment has a Python interpreter, False otherwise."""
+
+
+def directory_size(path: str | Path) -> int:
+    """
+    Get the size in bytes of the files in a directory tree.
+
+    Symlinks are not followed and hardlinked files (e.g. from a package cache)
+    are only counted once.
+    """
+    size = 0
+    seen_inodes = set()
+    pending = [str(path)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                        continue
+
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                if stat.st_nlink > 1:
+                    inode = (stat.st_dev, stat.st_ino)
+                    if inode in seen_inodes:
+                        continue
+                    seen_inodes.add(inode)
+                size += stat.st_size
+
+    return size
+
+
+def find_site_packages(prefix: str | Path) -> list[Path]:
+    """Get the `site-packages` directories of the environment at `prefix`."""
+    prefix = Path(prefix)
+    return [
+        path
+        for path in [prefix / "Lib" / "site-packages"]
+        + list(prefix.glob("lib/python*/site-packages"))
+        if path.is_dir()
+    ]
+
+
+def count_distributions(
+    site_packages: list[Path], exclude_installers: tuple[str, ...] = ()
+) -> int:
+    """
+    Get the number of Python distributions installed in `site_packages`.
+
+    Parameters
+    ----------
+    site_packages : list[Path]
+        Directories where distributions are installed.
+    exclude_installers : tuple[str, ...], optional
+        Don't count distributions installed by these tools (e.g. `conda`, whose
+        packages are already counted from `conda-meta`). The default is ().
+    """
+    count = 0
+    for directory in site_packages:
+        for dist_info in directory.glob("*.dist-info"):
+            if exclude_installers:
+                try:
+                    installer = (dist_info / "INSTALLER").read_text().strip()
+                except OSError:
+                    installer = None
+                if installer in exclude_installers:
+                    continue
+            count += 1
+    return count
+
+
+def markers_signature(markers: list[Path]) -> list[int | None]:
+    """Get the modification times of `markers`, with None for missing ones."""
+    signature = []
+    for marker in markers:
+        try:
+            signature.append(marker.stat().st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def last_modified(markers: list[Path]) -> float | None:
+    """Get the most recent modification time of `markers`, if any exists."""
+    mtimes = [mtime for mtime in markers_signature(markers) if mtime is not None]
+    return max(mtimes) / 1e9 if mtimes else None
+
+
+class EnvironmentIndex:
+    """
+    Persistent index of environments metadata saved as a JSON file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the index file.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def update(
+        self,
+        environments: dict[str, str],
+        get_markers: Callable[[Path], list[Path]],
+        describe: Callable[[Path], EnvironmentInfo],
+    ) -> dict[str, EnvironmentInfo]:
+        """
+        Get the metadata of `environments`, refreshing the stale entries.
+
+        Entries of environments that are not in `environments` anymore are
+        removed from the index.
+
+        Parameters
+        ----------
+        environments : dict[str, str]
+            Mapping of environment names to their paths.
+        get_markers : Callable[[Path], list[Path]]
+            Function that returns the files or directories whose modification
+            time changes when an environment is modified.
+        describe : Callable[[Path], EnvironmentInfo]
+            Function that computes the metadata of an environment.
+
+        Returns
+        -------
+        environments_info : dict[str, EnvironmentInfo]
+            Mapping of environment names to their metadata.
+        """
+        with _index_lock:
+            entries = self._load()
+            updated_entries = {}
+            environments_info = {}
+            changed = False
+
+            for name, env_path in environments.items():
+                signature = markers_signature(get_markers(Path(env_path)))
+                entry = entries.get(env_path)
+                if entry is None or entry["signature"] != signature:
+                    logger.debug(f"Refreshing index entry for {env_path}")
+                    entry = dict(signature=signature, info=describe(Path(env_path)))
+                    changed = True
+
+                updated_entries[env_path] = entry
+                environments_info[name] = entry["info"]
+
+            if changed or updated_entries.keys() != entries.keys():
+                self._save(updated_entries)
+
+        return environments_info
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as index_file:
+                index = json.load(index_file)
+            if index.get("version") == ENVIRONMENT_INDEX_VERSION:
+                return index["environments"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return {}
+
+    def _save(self, entries: dict):
+        # The index is written to a temporary file and then moved, so other
+        # processes never read an incomplete index.
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as index_file:
+                json.dump(
+                    dict(version=ENVIRONMENT_INDEX_VERSION, environments=entries),
+                    index_file,
+                )
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            logger.debug(f"Unable to save environments index: {error}")
+            temp_path.unlink(missing_ok=True)
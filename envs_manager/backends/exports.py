@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Export archives saved for later download.
+
+Exports that produce an archive (like Pixi ones) are written to a file instead
+of being returned in the action result. When no file is given, they are saved
+in the `exports` directory of the backends root with a random ID, which the
+Jupyter extension uses to stream them from its download endpoint. Those files
+are removed after `EXPORTS_MAX_AGE` seconds.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+import re
+import time
+from typing import TypedDict
+import uuid
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Name of the exports directory in the backends root path
+EXPORTS_DIRECTORY_NAME = "exports"
+
+# Seconds to keep the exports saved in the exports directory
+EXPORTS_MAX_AGE = float(os.environ.get("ENVS_MANAGER_EXPORTS_MAX_AGE", 3600))
+
+# Format of the names of the exports saved in the exports directory
+EXPORT_ID_REGEX = r"[0-9a-f]{32}\.[a-z]+"
+
+
+class ExportInfo(TypedDict):
+    """Dictionary with the location of an exported archive."""
+
+    path: str
+    """Path to the archive."""
+
+    size: int
+    """Size in bytes of the archive."""
+
+    export_id: str | None
+    """ID to download the archive, if it was saved in the exports directory."""
+
+
+def new_export_path(exports_directory: str | Path, suffix: str) -> Path:
+    """
+    Get the path for a new export in the exports directory.
+
+    Expired exports are removed first, so the directory doesn't keep growing.
+    """
+    exports_directory = Path(exports_directory)
+    exports_directory.mkdir(parents=True, exist_ok=True)
+    remove_expired_exports(exports_directory)
+    return exports_directory / f"{uuid.uuid4().hex}{suffix}"
+
+
+def get_export_path(exports_directory: str | Path, export_id: str) -> Path | None:
+    """Get the path of an export in the exports directory, if it exists."""
+    if not re.fullmatch(EXPORT_ID_REGEX, export_id):
+        return None
+
+    path = Path(exports_directory) / export_id
+    return path if path.is_file() else None
+
+
+def remove_expired_exports(
+    exports_directory: str | Path, max_age: float = EXPORTS_MAX_AGE
+):
+    """Remove the exports older than `max_age` seconds."""
+    now = time.time()
+    try:
+        entries = list(os.scandir(exports_directory))
+    except OSError:
+        return
+
+    for entry in entries:
+        try:
+            if now - entry.stat().st_mtime > max_age:
+                os.unlink(entry.path)
+        except OSError as error:
+            logger.debug(f"Unable to remove export {entry.path}: {error}")
@@ -0,0 +1,354 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Shared package cache for the backends.
+
+All backends keep the packages they download under the same cache tree
+(`<backends root>/cache` or `ENVS_MANAGER_CACHE_DIR`), with a directory per tool
+since Micromamba, Pixi and pip use different cache formats:
+
+* `conda-pkgs`: Micromamba packages directory (`CONDA_PKGS_DIRS`).
+* `pixi`: Pixi cache, including its conda packages and PyPI wheels
+  (`PIXI_CACHE_DIR`).
+* `pip`: pip cache (`PIP_CACHE_DIR`).
+
+Environments created with the same backend share downloads, even across
+backends root paths if `ENVS_MANAGER_CACHE_DIR` points to the same directory.
+
+The cache usage of the operations that install packages is saved in a log so
+the hit rate of the last operations can be reported. An operation is counted as
+a miss for each package downloaded to the cache and as a hit for each other
+package installed in the environment. Downloaded packages are the cache entries
+modified after the operation started, so the cache is only listed once per
+operation.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator, TypedDict
+
+from envs_manager.backends.env_index import directory_size
+
+if TYPE_CHECKING:
+    from envs_manager.backends.api import BackendInstance
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Directory for the shared cache. By default it's the `cache` directory under
+# the backends root path.
+CACHE_DIRECTORY = os.environ.get("ENVS_MANAGER_CACHE_DIR")
+
+# File in the cache directory where the usage of the last operations is saved
+CACHE_USAGE_LOG_FILENAME = "cache-usage.jsonl"
+
+# Number of operations kept in the cache usage log
+CACHE_USAGE_LOG_SIZE = int(os.environ.get("ENVS_MANAGER_CACHE_USAGE_LOG_SIZE", 1000))
+
+# Seconds subtracted from the start time of an operation when looking for the
+# cache entries it downloaded, for filesystems with a coarse modification time
+CACHE_MTIME_SLACK = 1.0
+
+# First bytes of zip files, like wheels, to tell them apart from other entries
+# of the pip HTTP cache (e.g. index pages)
+ZIP_MAGIC = b"PK\x03\x04"
+
+_log_lock = threading.Lock()
+
+
+class CacheUsage(TypedDict):
+    """Dictionary with the cache usage of an operation."""
+
+    backend: str
+    """Backend that ran the operation."""
+
+    action: str
+    """Name of the operation."""
+
+    installed: int
+    """Number of packages added to the environment."""
+
+    downloaded: int
+    """Number of packages added to the cache."""
+
+    downloaded_bytes: int
+    """Size in bytes of the packages added to the cache."""
+
+    time: float
+    """Time when the operation finished."""
+
+
+class CacheUsageLog:
+    """
+    Log with the cache usage of the last operations, saved as JSON lines.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the log file.
+    max_size : int, optional
+        Number of operations kept. The default is `CACHE_USAGE_LOG_SIZE`.
+    """
+
+    def __init__(self, path: str | Path, max_size: int = CACHE_USAGE_LOG_SIZE):
+        self.path = Path(path)
+        self.max_size = max_size
+
+    def append(self, usage: CacheUsage):
+        with _log_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as log_file:
+                    log_file.write(json.dumps(usage) + "\n")
+
+                # The log is trimmed once it has twice the entries it keeps, so
+                # it isn't rewritten after each operation.
+                entries = self.read()
+                if len(entries) > 2 * self.max_size:
+                    temp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                    with open(temp_path, "w", encoding="utf-8") as log_file:
+                        for entry in entries[-self.max_size :]:
+                            log_file.write(json.dumps(entry) + "\n")
+                    os.replace(temp_path, self.path)
+            except OSError as error:
+                logger.debug(f"Unable to save cache usage: {error}")
+
+    def read(self, last: int | None = None) -> list[CacheUsage]:
+        """Read the usage of the `last` operations (all of them if None)."""
+        entries = []
+        try:
+            with open(self.path, encoding="utf-8") as log_file:
+                for line in log_file:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return entries[-last:] if last else entries
+
+
+def get_cache_directory(root_path: str | Path) -> Path:
+    """Get the shared cache directory for a backends root path."""
+    if CACHE_DIRECTORY:
+        return Path(CACHE_DIRECTORY)
+    return Path(root_path) / "cache"
+
+
+def list_cache_entries(
+    directory: str | Path, since: float | None = None
+) -> dict[str, Path]:
+    """
+    Get the packages saved in a conda packages directory.
+
+    Packages are saved both as archives and extracted directories, so the
+    archive extensions are removed to count each package once. Directories
+    that are not extracted packages (without `info/index.json`), like the
+    repodata `cache`, are skipped.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Packages directory.
+    since : float, optional
+        Only get the packages modified after this time. The default is None.
+
+    Returns
+    -------
+    entries : dict[str, Path]
+        Mapping of package names (e.g. `python-3.10.0-h0_0`) to their archive
+        or, if it was removed, extracted directory.
+    """
+    entries = {}
+    try:
+        for entry in os.scandir(directory):
+            name = entry.name
+            for extension in (".conda", ".tar.bz2"):
+                if name.endswith(extension):
+                    name = name[: -len(extension)]
+                    break
+            else:
+                if (
+                    name in entries
+                    or not entry.is_dir()
+                    or not os.path.isfile(
+                        os.path.join(entry.path, "info", "index.json")
+                    )
+                ):
+                    continue
+            if since is not None and entry.stat().st_mtime < since:
+                continue
+            entries[name] = Path(entry.path)
+    except OSError:
+        pass
+    return entries
+
+
+def list_cache_files(
+    directory: str | Path,
+    suffix: str = "",
+    since: float | None = None,
+    magic: bytes | None = None,
+) -> dict[str, Path]:
+    """
+    Get the files saved in a cache directory tree, like the pip HTTP cache.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Cache directory.
+    suffix : str, optional
+        Only get the files with this suffix. The default is "".
+    since : float, optional
+        Only get the files modified after this time. The default is None.
+    magic : bytes, optional
+        Only get the files that start with these bytes (e.g. `ZIP_MAGIC` for
+        wheels). The default is None.
+
+    Returns
+    -------
+    entries : dict[str, Path]
+        Mapping of paths relative to `directory` to their full path.
+    """
+    entries = {}
+    pending = [str(directory)]
+    while pending:
+        try:
+            scanned_entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+
+        for entry in scanned_entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                    continue
+                if not entry.name.endswith(suffix):
+                    continue
+                if since is not None and entry.stat().st_mtime < since:
+                    continue
+                if magic is not None:
+                    with open(entry.path, "rb") as file:
+                        if file.read(len(magic)) != magic:
+                            continue
+            except OSError:
+                continue
+            entries[os.path.relpath(entry.path, directory)] = Path(entry.path)
+    return entries
+
+
+@contextlib.contextmanager
+def track_cache_usage(backend_instance: BackendInstance, action: str) -> Iterator[None]:
+    """
+    Context manager to save the cache usage of an operation in the usage log.
+
+    Parameters
+    ----------
+    backend_instance : BackendInstance
+        Backend instance that runs the operation.
+    action : str
+        Name of the operation.
+    """
+    start = time.time()
+    try:
+        packages_before = backend_instance.get_environment_packages()
+    except Exception as error:
+        logger.debug(f"Unable to track cache usage: {error}")
+        yield
+        return
+
+    yield
+
+    try:
+        installed = backend_instance.get_environment_packages() - packages_before
+        downloaded = backend_instance.get_package_cache_entries(
+            since=start - CACHE_MTIME_SLACK
+        )
+        downloaded_bytes = 0
+        for path in downloaded.values():
+            if path.is_dir():
+                downloaded_bytes += directory_size(path)
+            else:
+                downloaded_bytes += path.stat().st_size
+
+        usage = CacheUsage(
+            backend=backend_instance.ID,
+            action=action,
+            installed=len(installed),
+            downloaded=len(downloaded),
+            downloaded_bytes=downloaded_bytes,
+            time=time.time(),
+        )
+        CacheUsageLog(
+            Path(backend_instance.cache_directory) / CACHE_USAGE_LOG_FILENAME
+        ).append(usage)
+    except Exception as error:
+        logger.debug(f"Unable to track cache usage: {error}")
+
+
+def cache_report(
+    cache_directory: str | Path,
+    backends: dict[str, str | Path],
+    last: int = 100,
+) -> dict:
+    """
+    Get the size, per backend usage and hit rate of the shared cache.
+
+    Parameters
+    ----------
+    cache_directory : str or Path
+        Shared cache directory.
+    backends : dict[str, str or Path]
+        Mapping of backend IDs to their package cache directories.
+    last : int, optional
+        Number of operations used to compute the hit rate. The default is 100.
+
+    Returns
+    -------
+    report : dict
+        Total `size` of the cache and `backends` with the `directory` and `size`
+        of each backend cache, and per backend and total `hits`, `misses`,
+        `hit_rate` and `downloaded_bytes` in the last operations.
+    """
+    operations = CacheUsageLog(Path(cache_directory) / CACHE_USAGE_LOG_FILENAME).read(
+        last
+    )
+
+    def usage_stats(entries):
+        misses = sum(min(entry["downloaded"], entry["installed"]) for entry in entries)
+        installed = sum(entry["installed"] for entry in entries)
+        hits = installed - misses
+        return dict(
+            operations=len(entries),
+            hits=hits,
+            misses=misses,
+            hit_rate=hits / installed if installed else None,
+            downloaded_bytes=sum(entry["downloaded_bytes"] for entry in entries),
+        )
+
+    backends_report = {}
+    for backend, directory in backends.items():
+        backends_report[backend] = dict(
+            directory=str(directory),
+            size=directory_size(directory) if Path(directory).is_dir() else 0,
+            **usage_stats(
+                [entry for entry in operations if entry["backend"] == backend]
+            ),
+        )
+
+    return dict(
+        directory=str(cache_directory),
+        size=directory_size(cache_directory) if Path(cache_directory).is_dir() else 0,
+        backends=backends_report,
+        **usage_stats(operations),
+    )
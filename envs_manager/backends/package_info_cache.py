@@ -0,0 +1,248 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+
+logger = logging.getLogger("envs-manager")
+
+
+PACKAGE_INFO_CACHE_TTL = float(
+    os.environ.get("ENVS_MANAGER_PACKAGE_INFO_TTL", 7 * 24 * 60 * 60)
+)
+PACKAGE_INFO_CACHE_NEGATIVE_TTL = float(
+    os.environ.get("ENVS_MANAGER_PACKAGE_INFO_NEGATIVE_TTL", 24 * 60 * 60)
+)
+PACKAGE_INFO_CACHE_MAX_ENTRIES = int(
+    os.environ.get("ENVS_MANAGER_PACKAGE_INFO_MAX_ENTRIES", 20000)
+)
+PACKAGE_INFO_CACHE_FILENAME = "package_info.sqlite3"
+
+# Source used as `channel` value for entries coming from the PyPI JSON API
+PYPI_SOURCE = ""
+
+_CACHES: dict[str, PackageInfoCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+class CacheEntry:
+    """Package metadata stored in the cache together with its HTTP validators."""
+
+    def __init__(self, payload, etag=None, last_modified=None, fetched_at=0.0):
+        self.payload = payload
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def negative(self) -> bool:
+        """True if the entry records that the package was not found."""
+        return self.payload is None
+
+
+class PackageInfoCache:
+    """
+    Persistent cache for package metadata backed by a SQLite database.
+
+    Entries are keyed by `(package_name, channel)`, where the channel is
+    `PYPI_SOURCE` for metadata coming from the PyPI JSON API. Entries expire
+    after `ttl` seconds (`negative_ttl` for packages that were not found) and
+    are evicted in least recently used order once `max_entries` is exceeded.
+
+    Access times are kept strictly increasing, so the eviction order doesn't
+    depend on the resolution of the system clock.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl: float = PACKAGE_INFO_CACHE_TTL,
+        negative_ttl: float = PACKAGE_INFO_CACHE_NEGATIVE_TTL,
+        max_entries: int = PACKAGE_INFO_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.network_requests = 0
+
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS package_info (
+                    name TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    payload TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (name, channel)
+                )
+                """
+            )
+        (self._last_access,) = self._connection.execute(
+            "SELECT COALESCE(MAX(accessed_at), 0) FROM package_info"
+        ).fetchone()
+
+    def _access_time(self) -> float:
+        # Must be called with `_lock` held
+        self._last_access = max(time.time(), self._last_access + 1e-6)
+        return self._last_access
+
+    def get(self, package_name: str, channel: str = PYPI_SOURCE) -> CacheEntry | None:
+        """
+        Get the cached entry for a package, expired or not.
+
+        Parameters
+        ----------
+        package_name : str
+            Package name to query.
+        channel : str, optional
+            Channel of the package. The default is `PYPI_SOURCE`.
+
+        Returns
+        -------
+        entry : CacheEntry or None
+            The cached entry or None if the package is not in the cache.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload, etag, last_modified, fetched_at FROM package_info "
+                "WHERE name = ? AND channel = ?",
+                (package_name, channel),
+            ).fetchone()
+            if row is None:
+                return None
+
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE package_info SET accessed_at = ? "
+                    "WHERE name = ? AND channel = ?",
+                    (self._access_time(), package_name, channel),
+                )
+
+        payload, etag, last_modified, fetched_at = row
+        return CacheEntry(
+            json.loads(payload) if payload is not None else None,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+        )
+
+    def put(
+        self,
+        package_name: str,
+        channel: str,
+        payload: dict | None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        """
+        Store package metadata in the cache.
+
+        A `payload` of None records that the package was not found.
+        """
+        with self._lock, self._connection:
+            now = self._access_time()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO package_info VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    package_name,
+                    channel,
+                    json.dumps(payload) if payload is not None else None,
+                    etag,
+                    last_modified,
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def touch(self, package_name: str, channel: str = PYPI_SOURCE):
+        """Mark an entry as fresh after a successful revalidation."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE package_info SET fetched_at = ?, accessed_at = ? "
+                "WHERE name = ? AND channel = ?",
+                (time.time(), self._access_time(), package_name, channel),
+            )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Check if an entry can be used without revalidating it."""
+        ttl = self.negative_ttl if entry.negative else self.ttl
+        return time.time() - entry.fetched_at < ttl
+
+    def record(self, counter: str):
+        """Increment one of the cache counters (e.g. `hits` or `misses`)."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM package_info")
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.network_requests = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache counters and the number of stored entries."""
+        with self._lock:
+            (entries,) = self._connection.execute(
+                "SELECT COUNT(*) FROM package_info"
+            ).fetchone()
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            revalidations=self.revalidations,
+            network_requests=self.network_requests,
+            entries=entries,
+        )
+
+    def _evict(self):
+        (entries,) = self._connection.execute(
+            "SELECT COUNT(*) FROM package_info"
+        ).fetchone()
+        excess = entries - self.max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM package_info WHERE rowid IN ("
+                "SELECT rowid FROM package_info ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            logger.debug(f"Evicted {excess} entries from the package info cache")
+
+
+def get_package_info_cache(cache_directory: str | Path) -> PackageInfoCache:
+    """
+    Get the package info cache stored in `cache_directory`.
+
+    Instances are shared per directory so counters are aggregated between
+    backend instances that use the same backends root.
+    """
+    path = str(Path(cache_directory) / PACKAGE_INFO_CACHE_FILENAME)
+    with _CACHES_LOCK:
+        if path not in _CACHES:
+            _CACHES[path] = PackageInfoCache(path)
+        return _CACHES[path]
@@ -0,0 +1,272 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Hash-pinned lock files for Python environments.
+
+Locks are pip requirements files with every distribution installed in the
+environment pinned to its exact version and the SHA-256 hashes of its wheels,
+so they can be installed with `pip install --no-deps --require-hashes`, which
+doesn't resolve dependencies and verifies every downloaded file.
+
+Hashes are taken from the simple index pages (PEP 503) of the configured
+package index, which list the files of every platform, so locks can be
+installed on other platforms too. The hashes of the wheels saved in the pip
+cache are added to them, and are the only ones used when the index can't be
+reached. Distributions locked only with cached hashes are noted in the lock,
+since it may not be installable on other platforms then.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import email.parser
+import hashlib
+import logging
+import html
+import os
+from pathlib import Path
+import re
+from urllib.parse import urljoin
+import zipfile
+
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    canonicalize_version,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+
+from envs_manager.backends.api import (
+    PACKAGE_INFO_MAX_WORKERS,
+    PACKAGE_INFO_REQUEST_TIMEOUT,
+    get_session,
+)
+from envs_manager.backends.env_index import find_site_packages
+from envs_manager.backends.package_cache import ZIP_MAGIC
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Package index whose simple pages are used to get the hashes that are not cached
+PACKAGE_INDEX_URL = os.environ.get("PIP_INDEX_URL", "https://pypi.org/simple")
+
+# Links to distribution files in simple index pages
+SIMPLE_INDEX_LINK_REGEX = re.compile(
+    r"<a\s[^>]*href=[\"']([^\"']+)[\"']", re.IGNORECASE
+)
+
+# Option used in requirements files to pin the hash of a distribution
+HASH_OPTION = "--hash"
+
+
+def _normalize(name: str, version: str) -> tuple[str, str]:
+    return canonicalize_name(name), canonicalize_version(version)
+
+
+def read_distributions(prefix: str | Path) -> tuple[dict, list[str]]:
+    """
+    Get the distributions installed in the environment at `prefix`.
+
+    Returns
+    -------
+    distributions : dict[tuple[str, str], str]
+        Mapping of normalized `(name, version)` pairs to the requirement that
+        pins the distributions installed from an index (e.g. `numpy==2.0.0`).
+    unlocked : list[str]
+        Distributions that were not installed from an index (e.g. editable or
+        local ones), so they can't be locked.
+    """
+    distributions = {}
+    unlocked = []
+    parser = email.parser.HeaderParser()
+    for site_packages in find_site_packages(prefix):
+        for dist_info in site_packages.glob("*.dist-info"):
+            try:
+                with open(dist_info / "METADATA", encoding="utf-8") as metadata_file:
+                    metadata = parser.parse(metadata_file)
+            except OSError:
+                continue
+
+            name, version = metadata["Name"], metadata["Version"]
+            if not name or not version:
+                continue
+
+            if (dist_info / "direct_url.json").exists():
+                unlocked.append(f"{name}=={version}")
+            else:
+                distributions[_normalize(name, version)] = f"{name}=={version}"
+
+    return distributions, sorted(unlocked)
+
+
+def find_cached_hashes(
+    cache_path: str | Path, distributions: set[tuple[str, str]]
+) -> dict[tuple[str, str], set[str]]:
+    """
+    Get the hashes of the wheels of `distributions` saved in the pip cache.
+
+    pip saves downloaded wheels as HTTP cache entries named after their URL,
+    so the distribution of each entry is read from its `.dist-info` directory.
+
+    Parameters
+    ----------
+    cache_path : str or Path
+        pip cache directory.
+    distributions : set[tuple[str, str]]
+        Normalized `(name, version)` pairs to look for.
+    """
+    hashes: dict[tuple[str, str], set[str]] = {}
+    for directory in ("http-v2", "http"):
+        for path, __, filenames in os.walk(Path(cache_path) / directory):
+            for filename in filenames:
+                if directory == "http-v2" and not filename.endswith(".body"):
+                    continue
+
+                entry_path = os.path.join(path, filename)
+                try:
+                    with open(entry_path, "rb") as entry_file:
+                        if entry_file.read(len(ZIP_MAGIC)) != ZIP_MAGIC:
+                            continue
+                    with zipfile.ZipFile(entry_path) as wheel:
+                        dist_info = next(
+                            (
+                                name.split("/")[0]
+                                for name in wheel.namelist()
+                                if name.split("/")[0].endswith(".dist-info")
+                            ),
+                            None,
+                        )
+                except (OSError, zipfile.BadZipFile):
+                    continue
+
+                if dist_info is None or "-" not in dist_info:
+                    continue
+                name, version = dist_info[: -len(".dist-info")].split("-", 1)
+                key = _normalize(name, version)
+                if key not in distributions:
+                    continue
+
+                sha256 = hashlib.sha256()
+                with open(entry_path, "rb") as entry_file:
+                    for chunk in iter(lambda: entry_file.read(1024 * 1024), b""):
+                        sha256.update(chunk)
+                hashes.setdefault(key, set()).add(sha256.hexdigest())
+
+    return hashes
+
+
+def _parse_filename(filename: str) -> tuple[str, str] | None:
+    try:
+        if filename.endswith(".whl"):
+            name, version, *__ = parse_wheel_filename(filename)
+        else:
+            name, version = parse_sdist_filename(filename)
+    except (InvalidSdistFilename, InvalidWheelFilename):
+        return None
+    return _normalize(name, str(version))
+
+
+def get_release_hashes(
+    name: str, version: str, index_url: str = PACKAGE_INDEX_URL
+) -> set[str]:
+    """
+    Get the SHA-256 hashes of the files of a release from a package index.
+
+    The hashes are read from the `#sha256=` fragments of the links in the
+    simple index page of the package, which every index compatible with pip
+    provides.
+    """
+    url = f"{index_url.rstrip('/')}/{canonicalize_name(name)}/"
+    response = get_session().get(url, timeout=PACKAGE_INFO_REQUEST_TIMEOUT)
+    response.raise_for_status()
+
+    key = _normalize(name, version)
+    hashes = set()
+    for href in SIMPLE_INDEX_LINK_REGEX.findall(response.text):
+        link, __, fragment = html.unescape(urljoin(url, href)).partition("#")
+        if not fragment.startswith("sha256="):
+            continue
+        filename = link.rsplit("/", 1)[-1]
+        if _parse_filename(filename) == key:
+            hashes.add(fragment[len("sha256=") :])
+    return hashes
+
+
+def write_lock(prefix: str | Path, cache_path: str | Path | None = None) -> str:
+    """
+    Get a hash-pinned lock with the distributions installed in `prefix`.
+
+    Parameters
+    ----------
+    prefix : str or Path
+        Path to the environment.
+    cache_path : str or Path, optional
+        pip cache directory whose wheel hashes are added to the ones of the
+        package index, or used instead if the index can't be reached. The
+        default is None.
+
+    Raises
+    ------
+    ValueError
+        If the hashes of some distribution couldn't be found.
+    """
+    distributions, unlocked = read_distributions(prefix)
+    hashes = find_cached_hashes(cache_path, set(distributions)) if cache_path else {}
+
+    def get_hashes(key):
+        try:
+            return get_release_hashes(*distributions[key].split("==", 1))
+        except Exception as error:
+            logger.warning(f"Unable to get hashes for {distributions[key]}: {error}")
+            return None
+
+    cache_only = []
+    if distributions:
+        keys = list(distributions)
+        with ThreadPoolExecutor(
+            max_workers=min(PACKAGE_INFO_MAX_WORKERS, len(keys))
+        ) as executor:
+            for key, release_hashes in zip(keys, executor.map(get_hashes, keys)):
+                if release_hashes is None and hashes.get(key):
+                    cache_only.append(distributions[key])
+                hashes[key] = hashes.get(key, set()) | (release_hashes or set())
+
+    not_found = sorted(distributions[key] for key in distributions if not hashes[key])
+    if not_found:
+        raise ValueError(f"Unable to get the hashes of {', '.join(not_found)}")
+
+    lines = ["# This file may be used to create an environment using:"]
+    lines.append("# $ pip install --no-deps --require-hashes -r <this file>")
+    for requirement in unlocked:
+        lines.append(f"# Not locked, not installed from an index: {requirement}")
+    for requirement in sorted(cache_only):
+        lines.append(
+            f"# Only hashes of this platform, the index couldn't be reached: "
+            f"{requirement}"
+        )
+    for key in sorted(distributions):
+        lines.append(f"{distributions[key]} \\")
+        lines += [
+            f"    {HASH_OPTION}=sha256:{sha256} \\" for sha256 in sorted(hashes[key])
+        ]
+        lines[-1] = lines[-1][: -len(" \\")]
+
+    return "\n".join(lines) + "\n"
+
+
+def is_lock(path: str | Path) -> bool:
+    """Check if the requirements file at `path` pins hashes."""
+    try:
+        with open(path, encoding="utf-8") as requirements_file:
+            return any(
+                line.lstrip().startswith(HASH_OPTION)
+                or f" {HASH_OPTION}" in line.split("#", 1)[0]
+                for line in requirements_file
+            )
+    except (OSError, UnicodeDecodeError):
+        return False
@@ -2,43 +2,235 @@
 #
 # SPDX-License-Identifier: MIT
 
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import io
 import json
 import logging
 import os
 from pathlib import Path
+import re
+import shutil
 import subprocess
+import sys
+import threading
 import zipfile
 
 from packaging.version import parse
-from rattler import AboutJson
-import requests
+from rattler import AboutJson, LockFile
 
+from envs_manager.backends import conda_meta
 from envs_manager.backends.api import BackendInstance, BackendActionResult, run_command
+from envs_manager.backends.bootstrap import BootstrapError, bootstrap_executable
+from envs_manager.backends.env_index import (
+    EnvironmentInfo,
+    count_distributions,
+    directory_size,
+    find_site_packages,
+    last_modified,
+)
+from envs_manager.backends.exports import ExportInfo, new_export_path
+from envs_manager.backends.package_cache import list_cache_entries
+
+try:
+    from rattler import Subdir as Platform
+except ImportError:
+    # Older py-rattler versions
+    from rattler import Platform
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
 
 
 logger = logging.getLogger("envs-manager")
 
+# Max number of threads used to read packages metadata from the Pixi cache
+ABOUT_JSON_MAX_WORKERS = 8
+
+# File in the bin directory where the default Pixi packages cache directory is
+# saved
+DEFAULT_CACHE_DIR_INFO_FILENAME = "pixi-cache-dir.json"
+
+# Default Pixi packages cache directories per bin directory
+_default_cache_dirs = {}
+_default_cache_dirs_lock = threading.Lock()
+
+# Files read from the archives of imported environments
+IMPORT_MEMBERS = ("pixi.toml", "pixi.lock")
+
+# Table headers and workspace name lines in `pixi.toml` files
+_TOML_TABLE_REGEX = re.compile(r"^\s*\[([^\[\]]+)\]\s*(#.*)?$")
+_TOML_NAME_REGEX = re.compile(r"^\s*name\s*=")
+
+# Max uncompressed size in bytes of the files read from an import archive
+IMPORT_MAX_SIZE = int(os.environ.get("ENVS_MANAGER_IMPORT_MAX_SIZE", 64 * 1024 * 1024))
+
+
+def read_import_archive(
+    source, members=IMPORT_MEMBERS, max_size=IMPORT_MAX_SIZE
+) -> dict[str, bytes]:
+    """
+    Read the project files from the archive of an exported environment.
+
+    Parameters
+    ----------
+    source : bytes, str, Path or file object
+        Contents of the archive, path to it or seekable binary file object.
+    members : tuple[str], optional
+        Names of the archive members to read. Other members are ignored. The
+        default is `IMPORT_MEMBERS`.
+    max_size : int, optional
+        Max total uncompressed size of the members. The default is
+        `IMPORT_MAX_SIZE`.
+
+    Returns
+    -------
+    contents : dict[str, bytes]
+        Mapping of member names to their contents.
+
+    Raises
+    ------
+    ValueError
+        If the archive is not valid, is too big or has no `pixi.toml`.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    contents = {}
+    total_size = 0
+    try:
+        with zipfile.ZipFile(source, "r") as zf:
+            for info in zf.infolist():
+                if info.filename not in members:
+                    logger.debug(f"Ignoring {info.filename} from import archive")
+                    continue
+
+                # The declared size is checked first, but the data actually
+                # decompressed is also counted, since it can be forged.
+                if total_size + info.file_size > max_size:
+                    raise ValueError(f"Import archive is bigger than {max_size} bytes")
+                chunks = []
+                with zf.open(info) as member:
+                    for chunk in iter(lambda: member.read(1024 * 1024), b""):
+                        total_size += len(chunk)
+                        if total_size > max_size:
+                            raise ValueError(
+                                f"Import archive is bigger than {max_size} bytes"
+                            )
+                        chunks.append(chunk)
+                contents[info.filename] = b"".join(chunks)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile) as error:
+        raise ValueError(f"Invalid import archive: {error}")
+
+    if "pixi.toml" not in contents:
+        raise ValueError("The import archive doesn't contain a pixi.toml file")
+    return contents
+
+
+@functools.lru_cache(maxsize=8192)
+def _read_about_json(package_path):
+    """
+    Read the `about.json` metadata of a package extracted in the Pixi cache.
+
+    Extracted packages are immutable, so their metadata can be kept in memory for
+    the lifetime of the process. Errors are not cached since a package can be
+    extracted later on.
+    """
+    return AboutJson.from_package_directory(package_path)
+
+
+def _read_manifest_dependencies(manifest_path, platform):
+    """
+    Get the names of the dependencies declared in a Pixi manifest.
+
+    Parameters
+    ----------
+    manifest_path : Path
+        Path to the `pixi.toml` file.
+    platform : str
+        Platform for which to also take into account target specific dependencies.
+
+    Returns
+    -------
+    dependencies : set[str]
+        Lowercase names of the conda and PyPI dependencies in the manifest.
+    """
+    try:
+        with open(manifest_path, "rb") as manifest_file:
+            manifest = tomllib.load(manifest_file)
+    except (OSError, tomllib.TOMLDecodeError) as error:
+        logger.debug(f"Unable to read {manifest_path}: {error}")
+        return set()
+
+    tables = [manifest, manifest.get("target", {}).get(platform, {})]
+    dependencies = set()
+    for table in tables:
+        for key in ["dependencies", "pypi-dependencies"]:
+            dependencies.update(name.lower() for name in table.get(key, {}))
+
+    return dependencies
+
+
+def set_manifest_name(manifest_path, name):
+    """
+    Set the workspace name in a Pixi manifest, keeping the rest of the file.
+
+    Parameters
+    ----------
+    manifest_path : Path
+        Path to the `pixi.toml` file.
+    name : str
+        New name of the workspace.
+
+    Returns
+    -------
+    bool
+        True if the name was found and replaced.
+    """
+    with open(manifest_path, encoding="utf-8") as manifest_file:
+        lines = manifest_file.read().splitlines(keepends=True)
+
+    table = None
+    for index, line in enumerate(lines):
+        header = _TOML_TABLE_REGEX.match(line)
+        if header:
+            table = header.group(1).strip()
+            continue
+
+        if table in ("workspace", "project") and _TOML_NAME_REGEX.match(line):
+            newline = line[len(line.rstrip("\r\n")) :]
+            lines[index] = f"name = {json.dumps(name)}{newline}"
+            with open(
+                manifest_path, "w", encoding="utf-8", newline=""
+            ) as manifest_file:
+                manifest_file.write("".join(lines))
+            return True
+
+    return False
+
 
 class PixiInterface(BackendInstance):
     ID = "pixi"
-
-    def __init__(self, environment_path, envs_directory, bin_directory):
-        super().__init__(environment_path, envs_directory, bin_directory)
-
-        # We use this to save the Pixi packages cache directory
-        self._cache_dir = None
-
-    @property
-    def python_executable_path(self):
+    EXECUTABLE_NAME = "pixi"
+    PACKAGE_CACHE_VARIABLE = "PIXI_CACHE_DIR"
+    PACKAGE_CACHE_NAME = "pixi"
+    PREFIX_SCAN_DIRECTORIES = (
+        ".pixi/envs/default/bin",
+        ".pixi/envs/default/Scripts",
+    )
+
+    def get_python_executable_path(self, environment_path):
         pixi_env_dir = Path() / ".pixi" / "envs" / "default"
 
         if os.name == "nt":
             python_executable_path = (
-                Path(self.environment_path) / pixi_env_dir / "python.exe"
+                Path(environment_path) / pixi_env_dir / "python.exe"
             )
         else:
             python_executable_path = (
-                Path(self.environment_path) / pixi_env_dir / "bin" / "python"
+                Path(environment_path) / pixi_env_dir / "bin" / "python"
             )
 
         return str(python_executable_path)
@@ -51,11 +243,17 @@ def validate(self):
             self.external_executable = self.find_backend_executable(exec_name="pixi")
 
         if self.external_executable:
+            if self.get_cached_validation(self.external_executable) is not None:
+                return True
+
             command = [self.external_executable, "--version"]
             try:
-                result = run_command(command, capture_output=True)
+                result = run_command(command, capture_output=True, streamable=False)
                 version = result.stdout.split()[1]
                 if parse(version) >= parse("0.47.0"):
+                    self.set_cached_validation(
+                        self.external_executable, dict(version=version)
+                    )
                     return True
             except subprocess.CalledProcessError as error:
                 logger.error(error.stderr.strip())
@@ -65,49 +263,10 @@ def validate(self):
         return False
 
     def install_backend_executable(self):
-        install_script = f"install{'.ps1' if os.name == 'nt' else '.sh'}"
-        path_to_install_script = Path(self.bin_directory) / install_script
-
-        # Download script to install Pixi
-        req = requests.get(f"https://pixi.sh/{install_script}")
-        with open(str(path_to_install_script), "w") as f:
-            f.write(req.text)
-
-        # Env vars to control how Pixi is installed
-        env = os.environ.copy()
-        env["PIXI_HOME"] = str(Path(self.bin_directory).parent)
-        env["PIXI_NO_PATH_UPDATE"] = "true"
-
-        # Install Pixi
-        if os.name == "nt":
-            install_command = [
-                "powershell.exe",
-                "-ExecutionPolicy",
-                "Bypass",
-                "-File",
-                str(path_to_install_script),
-            ]
-        else:
-            install_command = ["sh", install_script]
-
-        try:
-            run_command(
-                install_command,
-                run_env=env,
-                cwd=self.bin_directory,
-            )
-        except subprocess.CalledProcessError as error:
-            logger.error(error.stderr.strip())
-            return
-        except Exception as error:
-            logger.error(error, exc_info=True)
-            return
-
-        # Cleanup
         try:
-            os.remove(path_to_install_script)
-        except Exception:
-            pass
+            bootstrap_executable("pixi", self.bin_directory)
+        except BootstrapError as error:
+            logger.error(error)
 
     def create_environment(self, packages=None, channels=None, force=False):
         # We need to run `pixi init` first
@@ -132,7 +291,7 @@ def create_environment(self, packages=None, channels=None, force=False):
                 init_command += ["-c"] + [channel]
 
         try:
-            result = run_command(init_command, capture_output=True)
+            result = self.run_command(init_command, capture_output=True)
             output = result.stdout or result.stderr
             logger.info(output.strip())
         except subprocess.CalledProcessError as error:
@@ -149,7 +308,7 @@ def create_environment(self, packages=None, channels=None, force=False):
 
             command = [self.external_executable, "add"] + packages
             try:
-                result = run_command(
+                result = self.run_command(
                     command, capture_output=True, cwd=self.environment_path
                 )
                 output = (result.stdout or result.stderr).strip()
@@ -163,119 +322,113 @@ def create_environment(self, packages=None, channels=None, force=False):
                 logger.error(error, exc_info=True)
                 return BackendActionResult(status=False, output=str(error))
 
-    def delete_environment(self, force=False):
-        # There is no command in Pixi to remove an env, so we rely on the OS
-        # for that.
-        # TODO: Add validation on Windows when the env is in use
-        command = [
-            "rmdir" if os.name == "nt" else "rm",
-            "/S" if os.name == "nt" else "-r",  # Remove all files and subdirs
-            "/Q" if os.name == "nt" else "-f",  # Don't ask
-            self.environment_path,
-        ]
+    def clone_environment(self, target_path, force=False):
+        result = super().clone_environment(target_path, force=force)
+        if not result["status"]:
+            return result
 
+        # The workspace is named after the directory it was created in, so use
+        # the name of the clone instead of the one of the source
+        manifest_path = Path(target_path) / "pixi.toml"
         try:
-            result = run_command(command, capture_output=True)
-            logger.info(f"Deleting environment located at {self.environment_path}")
-            return BackendActionResult(status=True, output=result.stdout)
-        except subprocess.CalledProcessError as error:
-            error_text = error.stderr.strip()
-            logger.error(error_text)
-            return BackendActionResult(status=False, output=error_text)
-        except Exception as error:
-            logger.error(error, exc_info=True)
-            return BackendActionResult(status=False, output=str(error))
+            if not set_manifest_name(manifest_path, Path(target_path).name):
+                logger.debug(f"No workspace name found in {manifest_path}")
+        except OSError as error:
+            logger.warning(
+                f"Unable to rename the workspace in {manifest_path}: {error}"
+            )
+        return result
 
-    def export_environment(self, export_file_path=None):
+    def get_package_files(self):
+        pixi_env_dir = Path(".pixi") / "envs" / "default"
+        package_files = conda_meta.read_package_files(
+            Path(self.environment_path) / pixi_env_dir
+        )
+        return {str(pixi_env_dir / path): mode for path, mode in package_files.items()}
+
+    def export_environment(self, export_file_path=None, lock=False):
+        # The export always includes pixi.lock, so `lock` doesn't change it
         env_path = Path(self.environment_path)
+        temp_path = None
 
         try:
-            # Use a temp zip file if necessary
-            remove_zip_file = False
+            # Save the archive in the exports directory if no path was given, so
+            # it can be downloaded later
+            export_id = None
             if export_file_path is None:
-                export_file_path = str(env_path / f"export_{env_path.name}.zip")
-                remove_zip_file = True
-
-            # Group pixi files into a single zip one
-            with zipfile.ZipFile(export_file_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                export_file_path = new_export_path(self.exports_directory, ".zip")
+                export_id = export_file_path.name
+
+            # Group pixi files into a single zip one. Files are compressed in
+            # chunks and the archive is only moved to its final path when it's
+            # complete.
+            export_file_path = Path(export_file_path)
+            temp_path = export_file_path.with_name(export_file_path.name + ".tmp")
+            with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as zf:
                 zf.write(str(env_path / "pixi.toml"), arcname="pixi.toml")
                 zf.write(str(env_path / "pixi.lock"), arcname="pixi.lock")
-
-            # Read zip file contents to send them to the frontend
-            with open(export_file_path, "rb") as file:
-                zip_content = file.read()
-
-            # Remove temp zip file
-            if remove_zip_file:
-                try:
-                    Path(export_file_path).unlink()
-                except Exception:
-                    pass
-            else:
-                logger.info(f"Environment exported to {export_file_path}")
-
-            return BackendActionResult(status=True, output=zip_content)
+            os.replace(temp_path, export_file_path)
+
+            logger.info(f"Environment exported to {export_file_path}")
+            return BackendActionResult(
+                status=True,
+                output=ExportInfo(
+                    path=str(export_file_path),
+                    size=export_file_path.stat().st_size,
+                    export_id=export_id,
+                ),
+            )
         except Exception as error:
             logger.error(error, exc_info=True)
+            if temp_path is not None:
+                temp_path.unlink(missing_ok=True)
             return BackendActionResult(status=False, output=str(error))
 
     def import_environment(self, import_file_path, force=False):
-        # Create directory where the environment will be installed
         env_path = Path(self.environment_path)
         if env_path.is_dir():
             msg = "An environment with the selected name already exists"
             logger.info(msg)
             return BackendActionResult(status=False, output=msg)
-        else:
-            env_path.mkdir(parents=True)
 
-        # Validations for the zip file
-        remove_import_file = False
-        if isinstance(import_file_path, bytes):
-            # Create temp zip file if we receive bytes, which can be sent from the
-            # frontend as the contents of the file itself
-            remove_import_file = True
-            import_file_contents = import_file_path
-            import_file_path = str(Path(self.envs_directory) / (env_path.name + ".zip"))
-            with open(import_file_path, "wb") as file:
-                file.write(import_file_contents)
-        else:
-            # Check the import file exists
-            if not Path(import_file_path).is_file():
-                msg = "The import file you passed doesn't exist"
-                logger.info(msg)
-                return BackendActionResult(status=False, output=msg)
+        # Bytes can be sent from the frontend as the contents of the file itself
+        if (
+            isinstance(import_file_path, (str, Path))
+            and not Path(import_file_path).is_file()
+        ):
+            msg = "The import file you passed doesn't exist"
+            logger.info(msg)
+            return BackendActionResult(status=False, output=msg)
 
-        # Uncompress zip file
+        # Read the project files from the archive, without extracting it
         try:
-            with zipfile.ZipFile(import_file_path, "r") as zf:
-                zf.extractall(path=str(env_path))
+            contents = read_import_archive(import_file_path)
         except Exception as error:
             logger.error(error, exc_info=True)
-
-            if remove_import_file:
-                try:
-                    os.remove(str(import_file_path))
-                except Exception:
-                    pass
-
             msg = (
                 f"There was an error uncompressing the import file. The error is: "
                 f"{error}"
             )
             return BackendActionResult(status=False, output=msg)
 
-        # Remove temp file if necessary
-        if remove_import_file:
-            try:
-                Path(import_file_path).unlink()
-            except Exception:
-                pass
+        # Create directory where the environment will be installed
+        try:
+            env_path.mkdir(parents=True)
+            for name, content in contents.items():
+                (env_path / name).write_bytes(content)
+        except FileExistsError:
+            msg = "An environment with the selected name already exists"
+            logger.info(msg)
+            return BackendActionResult(status=False, output=msg)
+        except Exception as error:
+            logger.error(error, exc_info=True)
+            shutil.rmtree(env_path, ignore_errors=True)
+            return BackendActionResult(status=False, output=str(error))
 
         # Create the environment
         command = [self.external_executable, "install"]
         try:
-            result = run_command(
+            result = self.run_command(
                 command, capture_output=True, cwd=self.environment_path
             )
             output = (result.stdout or result.stderr).strip()
@@ -306,7 +459,7 @@ def install_packages(
             ] + channels
 
             try:
-                result = run_command(
+                result = self.run_command(
                     channels_command,
                     capture_output=capture_output,
                     cwd=self.environment_path,
@@ -324,7 +477,7 @@ def install_packages(
         command = [self.external_executable, "add"] + packages
 
         try:
-            result = run_command(
+            result = self.run_command(
                 command, capture_output=capture_output, cwd=self.environment_path
             )
 
@@ -346,7 +499,7 @@ def uninstall_packages(self, packages, force=False, capture_output=False):
         command = [self.external_executable, "remove"] + packages
 
         try:
-            result = run_command(
+            result = self.run_command(
                 command, capture_output=capture_output, cwd=self.environment_path
             )
 
@@ -368,7 +521,7 @@ def update_packages(self, packages, force=False, capture_output=False):
         command = [self.external_executable, "upgrade"] + packages
 
         try:
-            result = run_command(
+            result = self.run_command(
                 command, capture_output=capture_output, cwd=self.environment_path
             )
 
@@ -388,37 +541,51 @@ def update_packages(self, packages, force=False, capture_output=False):
             return BackendActionResult(status=False, output=str(error))
 
     def list_packages(self):
-        # All packages
-        command = [self.external_executable, "list"]
-        result = run_command(command, capture_output=True, cwd=self.environment_path)
-        result_lines = result.stdout.split("\n")
-
-        # Requsted packages
-        requested_command = [self.external_executable, "list", "--explicit"]
-        result_requested = run_command(
-            requested_command, capture_output=True, cwd=self.environment_path
+        env_path = Path(self.environment_path)
+        platform = str(Platform.current())
+
+        # Installed packages are the ones locked for the current platform in
+        # the default environment
+        try:
+            lock_file = LockFile.from_path(str(env_path / "pixi.lock"))
+            environment = lock_file.default_environment()
+            conda_records = {
+                str(records_platform): records
+                for records_platform, records in (
+                    environment.conda_repodata_records().items()
+                )
+            }.get(platform, [])
+            pypi_packages = {
+                str(packages_platform): packages
+                for packages_platform, packages in environment.pypi_packages().items()
+            }.get(platform, [])
+        except Exception as error:
+            logger.error(error, exc_info=True)
+            return BackendActionResult(status=False, output=str(error))
+
+        # Requested packages are the ones declared in the manifest
+        packages_requested = _read_manifest_dependencies(
+            env_path / "pixi.toml", platform
         )
-        packages_requested = result_requested.stdout.split("\n")[1:-1]
-        packages_requested = [package.split()[0] for package in packages_requested]
 
         formatted_packages = []
         formatted_list = dict(
             environment=self.environment_path, packages=formatted_packages
         )
 
-        for package in result_lines[1:-1]:
-            package_info = package.split()
-            package_name = package_info[0]
-            package_version = package_info[1]
-            package_build = package_info[2]
-            package_channel = package_info[5]
-            package_requested = package_name in packages_requested
-
-            package_dir = package_name + "-" + package_version + "-" + package_build
-            package_full_info = self._get_package_info(package_dir)
-            package_description = (
-                package_full_info.description or package_full_info.summary
-            )
+        packages_full_info = self._get_packages_info(
+            [
+                f"{record.name.normalized}-{record.version}-{record.build}"
+                for record in conda_records
+            ]
+        )
+        for record, package_full_info in zip(conda_records, packages_full_info):
+            package_name = record.name.normalized
+            package_description = None
+            if package_full_info is not None:
+                package_description = (
+                    package_full_info.description or package_full_info.summary
+                )
 
             # Only take the first sentence of the description and replace eols by
             # spaces
@@ -429,18 +596,36 @@ def list_packages(self):
 
             formatted_package = dict(
                 name=package_name,
-                version=package_version,
-                build=package_build,
-                channel=package_channel,
+                version=str(record.version),
+                build=record.build,
+                channel=conda_meta.channel_name(record.channel),
                 description=package_description,
-                requested=package_requested,
+                requested=package_name in packages_requested,
+            )
+            formatted_packages.append(formatted_package)
+
+        for package in pypi_packages:
+            package_name = str(package.name)
+            formatted_package = dict(
+                name=package_name,
+                version=str(package.version),
+                build=None,
+                channel="pypi",
+                description=None,
+                requested=package_name.lower() in packages_requested,
             )
             formatted_packages.append(formatted_package)
 
-        logger.info(result.stdout.strip())
+        formatted_packages.sort(key=lambda package: package["name"])
+        for package in formatted_packages:
+            logger.info(
+                f"{package['name']} {package['version']} {package['build'] or ''} "
+                f"{package['channel']}"
+            )
+
         return BackendActionResult(status=True, output=formatted_list)
 
-    def list_environments(self):
+    def list_environments(self, details=False):
         environments = {}
 
         logger.info(f"# {self.ID} environments")
@@ -448,8 +633,121 @@ def list_environments(self):
             environments[env_dir_path.name] = str(env_dir_path)
             logger.info(f"{env_dir_path.name} - {str(env_dir_path)}")
 
+        if details:
+            environments = self.get_environments_info(environments)
         return BackendActionResult(status=True, output=environments)
 
+    def get_environment_markers(self, environment_path):
+        return [
+            environment_path / "pixi.toml",
+            environment_path / "pixi.lock",
+            environment_path / ".pixi" / "envs" / "default" / "conda-meta",
+        ]
+
+    def describe_environment(self, environment_path):
+        prefix = environment_path / ".pixi" / "envs" / "default"
+
+        # PyPI packages are installed next to the conda ones, so they are
+        # counted from `site-packages` skipping the ones installed by conda.
+        package_count = conda_meta.count_records(prefix) + count_distributions(
+            find_site_packages(prefix), exclude_installers=("conda",)
+        )
+
+        return EnvironmentInfo(
+            path=str(environment_path),
+            python_version=conda_meta.python_version(prefix),
+            package_count=package_count,
+            disk_size=directory_size(environment_path),
+            last_modified=last_modified(self.get_environment_markers(environment_path)),
+            healthy=Path(self.get_python_executable_path(environment_path)).is_file(),
+        )
+
+    @property
+    def _cache_dir(self):
+        """Pixi packages cache directory."""
+        return self.package_cache_path
+
+    @property
+    def _default_cache_dir(self):
+        """
+        Default Pixi packages cache directory, used when Pixi runs without
+        `PIXI_CACHE_DIR`.
+
+        Environments created before the shared package cache was used have
+        their packages there. It's obtained from `pixi info` only once per bin
+        directory and saved in `DEFAULT_CACHE_DIR_INFO_FILENAME`, so new
+        instances don't need to run Pixi again.
+        """
+        if os.environ.get("PIXI_CACHE_DIR"):
+            # Pixi always used that directory
+            return None
+
+        with _default_cache_dirs_lock:
+            if self.bin_directory in _default_cache_dirs:
+                return _default_cache_dirs[self.bin_directory]
+
+            cache_dir = None
+            cache_dir_info_path = (
+                Path(self.bin_directory) / DEFAULT_CACHE_DIR_INFO_FILENAME
+            )
+            try:
+                with open(cache_dir_info_path) as cache_dir_info_file:
+                    cache_dir = json.load(cache_dir_info_file)["cache_dir"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+            if cache_dir is None:
+                try:
+                    # The module `run_command` is used because the instance one
+                    # sets `PIXI_CACHE_DIR` to the shared cache
+                    result = run_command(
+                        [self.external_executable, "info", "--json"],
+                        capture_output=True,
+                        streamable=False,
+                    )
+                    cache_dir = json.loads(result.stdout).get("cache_dir")
+                except (subprocess.CalledProcessError, OSError, ValueError) as error:
+                    logger.error(error, exc_info=True)
+                    return None
+
+                try:
+                    with open(cache_dir_info_path, "w") as cache_dir_info_file:
+                        json.dump(dict(cache_dir=cache_dir), cache_dir_info_file)
+                except OSError:
+                    pass
+
+            _default_cache_dirs[self.bin_directory] = cache_dir
+            return cache_dir
+
+    def get_environment_packages(self):
+        prefix = Path(self.environment_path) / ".pixi" / "envs" / "default"
+        packages = {
+            record_path.stem for record_path in (prefix / "conda-meta").glob("*.json")
+        }
+        for site_packages in find_site_packages(prefix):
+            for dist_info in site_packages.glob("*.dist-info"):
+                try:
+                    installer = (dist_info / "INSTALLER").read_text().strip()
+                except OSError:
+                    installer = None
+                if installer != "conda":
+                    packages.add(dist_info.name)
+        return packages
+
+    def get_package_cache_entries(self, since=None):
+        # Conda packages are saved in `pkgs` and PyPI wheels are unpacked by uv
+        # in its archive directory
+        cache_path = Path(self.package_cache_path)
+        entries = list_cache_entries(cache_path / "pkgs", since=since)
+        try:
+            for entry in os.scandir(cache_path / "uv-cache" / "archive-v0"):
+                if since is not None and entry.stat().st_mtime < since:
+                    continue
+                entries[f"uv-cache/{entry.name}"] = Path(entry.path)
+        except OSError:
+            pass
+        return entries
+
     def _get_package_info(self, package_dir):
         """
         Get package information from the Pixi packages cache.
@@ -464,19 +762,41 @@ def _get_package_info(self, package_dir):
         package_info : AboutJson
             Py-rattler object with metadata about the package.
         """
-        info = None
+        cache_dir = self._cache_dir
+        if cache_dir is None:
+            return
 
-        if self._cache_dir is None:
-            try:
-                command = [self.external_executable, "info", "--json"]
-                result = run_command(command, capture_output=True)
-                self._cache_dir = json.loads(result.stdout).get("cache_dir")
-            except subprocess.CalledProcessError as error:
-                logger.error(error, exc_info=True)
-                return
+        package_path = Path(cache_dir) / "pkgs" / package_dir
+        if not package_path.is_dir():
+            # Environments created before the shared cache was used
+            default_cache_dir = self._default_cache_dir
+            if default_cache_dir and Path(default_cache_dir) != Path(cache_dir):
+                package_path = Path(default_cache_dir) / "pkgs" / package_dir
 
-        if self._cache_dir is not None:
-            absolute_package_dir = Path(self._cache_dir) / "pkgs" / package_dir
-            info = AboutJson.from_package_directory(str(absolute_package_dir))
+        try:
+            return _read_about_json(str(package_path))
+        except Exception as error:
+            logger.debug(f"Unable to read metadata from {package_path}: {error}")
+
+    def _get_packages_info(self, package_dirs):
+        """
+        Get information of several packages from the Pixi packages cache.
+
+        Parameters
+        ----------
+        package_dirs : list[str]
+            Packages directory names in the Pixi packages cache.
+
+        Returns
+        -------
+        packages_info : list[AboutJson | None]
+            Py-rattler objects with metadata about the packages, in the same order
+            of `package_dirs`.
+        """
+        if not package_dirs or self._cache_dir is None:
+            return [None] * len(package_dirs)
 
-        return info
+        with ThreadPoolExecutor(
+            max_workers=min(ABOUT_JSON_MAX_WORKERS, len(package_dirs))
+        ) as executor:
+            return list(executor.map(self._get_package_info, package_dirs))
@@ -0,0 +1,221 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Trash area where deleted environments are purged in the background.
+
+Deleting an environment renames its directory into the `trash` directory of
+the backends root, which is atomic and immediate, so the environment is gone
+for all other operations as soon as the delete returns. The actual removal of
+its files is done by a background purger thread.
+
+Since entries stay in the trash until they are fully removed, a purge that was
+interrupted (e.g. because the process exited or crashed) is resumed the next
+time the purger runs for that trash directory.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import errno
+import logging
+import os
+from pathlib import Path
+import shutil
+import threading
+from typing import TypedDict
+import uuid
+
+from envs_manager.backends.env_index import directory_size
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Name of the trash directory in the backends root path
+TRASH_DIRECTORY_NAME = "trash"
+
+# Number of threads used to remove the files of a trash entry
+PURGE_MAX_WORKERS = int(os.environ.get("ENVS_MANAGER_PURGE_MAX_WORKERS", 4))
+
+# Running purger threads per trash directory
+_purgers: dict[str, threading.Thread] = {}
+
+# Entries that the last purger of each trash directory failed to remove
+_failed_entries: dict[str, set[Path]] = {}
+_purgers_lock = threading.Lock()
+
+
+class TrashInfo(TypedDict):
+    """Dictionary with the contents of a trash directory."""
+
+    directory: str
+    """Path to the trash directory."""
+
+    entries: int
+    """Number of environments waiting to be purged."""
+
+    size: int
+    """Size in bytes of the environments waiting to be purged."""
+
+    purging: bool
+    """Whether a purger thread is running in this process."""
+
+
+class Trash:
+    """
+    Trash directory of a backends root path.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Path to the trash directory.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def move(self, path: str | Path) -> Path | None:
+        """
+        Move `path` to the trash.
+
+        Returns
+        -------
+        trash_path : Path or None
+            Path of the trash entry, or None if `path` is in another file
+            system, so it couldn't be renamed and was removed right away.
+        """
+        path = Path(path)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        trash_path = self.directory / f"{path.name}-{uuid.uuid4().hex}"
+        try:
+            os.rename(path, trash_path)
+        except OSError as error:
+            if error.errno != errno.EXDEV:
+                raise
+            logger.info(f"{path} is not in the trash file system, removing it")
+            shutil.rmtree(path)
+            return None
+        return trash_path
+
+    def entries(self) -> list[Path]:
+        """Get the entries waiting to be purged."""
+        try:
+            return [Path(entry.path) for entry in os.scandir(self.directory)]
+        except OSError:
+            return []
+
+    def info(self) -> TrashInfo:
+        """Get the number of entries and size of the trash."""
+        entries = self.entries()
+        return TrashInfo(
+            directory=str(self.directory),
+            entries=len(entries),
+            size=sum(
+                directory_size(entry) if entry.is_dir() else entry.lstat().st_size
+                for entry in entries
+            ),
+            purging=self.is_purging(),
+        )
+
+    def is_purging(self) -> bool:
+        """Check if a purger thread is running for this trash directory."""
+        with _purgers_lock:
+            purger = _purgers.get(str(self.directory))
+            return purger is not None and purger.is_alive()
+
+    def purge(self, wait: bool = False):
+        """
+        Start a background thread to remove the trash entries.
+
+        Only one purger runs per trash directory. If one is already running, it
+        also picks up the entries added since it started.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Wait until the trash is empty. The default is False.
+        """
+        with _purgers_lock:
+            purger = _purgers.get(str(self.directory))
+            if purger is None or not purger.is_alive():
+                purger = threading.Thread(
+                    target=self._purge,
+                    name=f"envs-manager-purger-{self.directory.name}",
+                    daemon=True,
+                )
+                _purgers[str(self.directory)] = purger
+                purger.start()
+
+        if wait:
+            purger.join()
+            # Entries added while the purger was finishing. The ones it failed
+            # to remove are left for the next purge.
+            with _purgers_lock:
+                failed = _failed_entries.get(str(self.directory), set())
+            if set(self.entries()) - failed:
+                self.purge(wait=True)
+
+    def _purge(self):
+        failed = set()
+        while True:
+            # Stop when only the entries that failed are left
+            entries = [entry for entry in self.entries() if entry not in failed]
+            if not entries:
+                with _purgers_lock:
+                    _failed_entries[str(self.directory)] = failed
+                return
+
+            for entry in entries:
+                try:
+                    purge_tree(entry)
+                except FileNotFoundError:
+                    # Purged at the same time by another process. If some of
+                    # its files are left, they are purged in the next loop.
+                    continue
+                except OSError as error:
+                    # Files in use (e.g. on Windows) are retried on next purge
+                    logger.error(f"Unable to purge {entry}: {error}")
+                    failed.add(entry)
+
+
+def purge_tree(path: str | Path, max_workers: int = PURGE_MAX_WORKERS):
+    """
+    Remove a directory tree, removing its subtrees in parallel.
+
+    The tree is walked breadth first until there are enough subdirectories to
+    keep `max_workers` threads busy, and then each of them is removed in a
+    thread.
+    """
+    path = Path(path)
+    if path.is_symlink() or not path.is_dir():
+        path.unlink()
+        return
+
+    frontier = [path]
+    while frontier and len(frontier) < 4 * max_workers:
+        directory = frontier.pop(0)
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                frontier.append(Path(entry.path))
+            else:
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(
+            executor.map(
+                lambda subtree: shutil.rmtree(subtree, ignore_errors=True), frontier
+            )
+        )
+
+    # Remove the directories left from the walk and anything that failed above
+    shutil.rmtree(path)
@@ -2,40 +2,87 @@
 #
 # SPDX-License-Identifier: MIT
 
+import json
 import logging
 import os
-import shutil
 import subprocess
 from pathlib import Path
 
 from envs_manager.backends.api import (
     BackendActionResult,
     BackendInstance,
-    get_package_info,
-    run_command,
 )
+from envs_manager.backends.env_index import (
+    EnvironmentInfo,
+    count_distributions,
+    directory_size,
+    find_site_packages,
+    last_modified,
+)
+from envs_manager.backends.package_cache import ZIP_MAGIC, list_cache_files
 
 
 logger = logging.getLogger("envs-manager")
 
+# Script run with the environment's Python interpreter to get the metadata of
+# its installed distributions. A distribution is considered as requested when
+# its `.dist-info` directory has a REQUESTED file (see PEP 376), which is
+# created by pip for packages that were explicitly installed.
+LIST_PACKAGES_SCRIPT = """
+import json
+from importlib import metadata
+
+packages = {}
+for dist in metadata.distributions():
+    name = dist.metadata["Name"]
+    if not name or name.lower() in packages:
+        continue
+    packages[name.lower()] = dict(
+        name=name,
+        version=dist.version,
+        summary=dist.metadata["Summary"],
+        requested=dist.read_text("REQUESTED") is not None,
+    )
+print(json.dumps(sorted(packages.values(), key=lambda p: p["name"].lower())))
+"""
+
+
+def _read_pyvenv_cfg(environment_path):
+    """Read the `pyvenv.cfg` file of an environment as a dictionary."""
+    config = {}
+    try:
+        with open(Path(environment_path) / "pyvenv.cfg", encoding="utf-8") as cfg:
+            for line in cfg:
+                key, sep, value = line.partition("=")
+                if sep:
+                    config[key.strip()] = value.strip()
+    except OSError:
+        pass
+
+    return config
+
 
 class VEnvInterface(BackendInstance):
     ID = "venv"
+    PACKAGE_CACHE_VARIABLE = "PIP_CACHE_DIR"
+    PACKAGE_CACHE_NAME = "pip"
 
-    def _run_command(self, command, capture_output=True):
+    def _run_command(self, command, capture_output=True, streamable=True):
         run_env = os.environ.copy()
         run_env["PIP_REQUIRE_VIRTUALENV"] = "true"
-        result = run_command(command, capture_output=capture_output, run_env=run_env)
+        result = self.run_command(
+            command,
+            capture_output=capture_output,
+            run_env=run_env,
+            streamable=streamable,
+        )
         return result
 
-    @property
-    def python_executable_path(self):
+    def get_python_executable_path(self, environment_path):
         if os.name == "nt":
-            python_executable_path = (
-                Path(self.environment_path) / "Scripts" / "python.exe"
-            )
+            python_executable_path = Path(environment_path) / "Scripts" / "python.exe"
         else:
-            python_executable_path = Path(self.environment_path) / "bin" / "python"
+            python_executable_path = Path(environment_path) / "bin" / "python"
 
         return str(python_executable_path)
 
@@ -67,13 +114,6 @@ def create_environment(self, packages=None, channels=None, force=False):
                     packages.remove(possible_python)
                 if len(packages) > 0:
                     return self.install_packages(packages=packages)
-                return BackendActionResult(status=True, output=None)
-        except Exception as error:
-            return BackendActionResult(status=False, output=str(error))
-
-    def delete_environment(self, force=False):
-        try:
-            shutil.rmtree(self.environment_path)
             return BackendActionResult(status=True, output=None)
         except Exception as error:
             return BackendActionResult(status=False, output=str(error))
@@ -84,7 +124,10 @@ def activate_environment(self):
     def deactivate_environment(self):
         raise NotImplementedError()
 
-    def export_environment(self, export_file_path=None):
+    def export_environment(self, export_file_path=None, lock=False):
+        if lock:
+            return self._export_lock(export_file_path)
+
         try:
             command = [
                 self.python_executable_path,
@@ -94,7 +137,7 @@ def export_environment(self, export_file_path=None):
                 "--format=freeze",
                 "--not-required",
             ]
-            result = self._run_command(command)
+            result = self._run_command(command, streamable=False)
             if export_file_path:
                 with open(export_file_path, "w") as exported_file:
                     exported_file.write(result.stdout)
@@ -105,7 +148,25 @@ def export_environment(self, export_file_path=None):
         except Exception as error:
             return BackendActionResult(status=False, output=str(error))
 
+    def _export_lock(self, export_file_path=None):
+        from envs_manager.backends import pip_lock
+
+        try:
+            lock = pip_lock.write_lock(
+                self.environment_path, cache_path=self.package_cache_path
+            )
+            if export_file_path:
+                with open(export_file_path, "w") as exported_file:
+                    exported_file.write(lock)
+            logger.info(lock)
+            return BackendActionResult(status=True, output=lock)
+        except Exception as error:
+            logger.error(error)
+            return BackendActionResult(status=False, output=str(error))
+
     def import_environment(self, import_file_path, force=False):
+        from envs_manager.backends import pip_lock
+
         self.create_environment()
         try:
             command = [
@@ -116,6 +177,11 @@ def import_environment(self, import_file_path, force=False):
                 "-r",
                 import_file_path,
             ]
+
+            # Locks already pin every distribution, so dependencies don't need to
+            # be resolved
+            if pip_lock.is_lock(import_file_path):
+                command += ["--no-deps", "--require-hashes"]
             result = self._run_command(command)
             logger.info(result.stdout)
             return BackendActionResult(status=True, output=result.stdout)
@@ -175,31 +241,58 @@ def update_packages(self, packages, force=False, capture_output=False):
             return BackendActionResult(status=False, output=str(error))
 
     def list_packages(self):
-        command = [self.python_executable_path, "-m", "pip", "list"]
-        result = self._run_command(command)
-        result_lines = result.stdout.split("\n")
+        # Run the script in isolated mode so only the packages available in the
+        # environment are listed
+        command = [self.python_executable_path, "-I", "-c", LIST_PACKAGES_SCRIPT]
+        try:
+            result = self._run_command(command, streamable=False)
+            packages = json.loads(result.stdout)
+        except subprocess.CalledProcessError as error:
+            logger.error(error.stderr)
+            return BackendActionResult(status=False, output=error.stderr)
+        except Exception as error:
+            logger.error(error, exc_info=True)
+            return BackendActionResult(status=False, output=str(error))
 
         formatted_packages = []
         formatted_list = dict(
             environment=self.environment_path, packages=formatted_packages
         )
-        for package in result_lines[2:-1]:
-            package_name, package_version = package.split()
-            package_description = get_package_info(package_name)["info"]["summary"]
+        for package in packages:
             formatted_package = dict(
-                name=package_name,
-                version=package_version,
+                name=package["name"],
+                version=package["version"],
                 build=None,
                 channel=None,
-                description=package_description,
-                requested=True,
+                description=package["summary"],
+                requested=package["requested"],
             )
             formatted_packages.append(formatted_package)
+            logger.info(f"{package['name']} {package['version']}")
 
-        logger.info(result.stdout)
         return BackendActionResult(status=True, output=formatted_list)
 
-    def list_environments(self):
+    def get_environment_packages(self):
+        return {
+            dist_info.name
+            for site_packages in find_site_packages(self.environment_path)
+            for dist_info in site_packages.glob("*.dist-info")
+        }
+
+    def get_package_cache_entries(self, since=None):
+        # Downloads are saved in the HTTP cache, whose layout changed in pip
+        # 23.3. It also has index pages and other responses, so only wheels
+        # (zip files) are counted.
+        entries = {}
+        cache_path = Path(self.package_cache_path)
+        for directory, suffix in [("http-v2", ".body"), ("http", "")]:
+            for name, path in list_cache_files(
+                cache_path / directory, suffix, since=since, magic=ZIP_MAGIC
+            ).items():
+                entries[f"{directory}/{name}"] = path
+        return entries
+
+    def list_environments(self, details=False):
         environments = {}
         first_environment = False
         envs_directory = Path(self.envs_directory)
@@ -216,4 +309,21 @@ def list_environments(self):
         if not first_environment:
             logger.info(f"No environments found for {self.ID} in {self.envs_directory}")
 
+        if details:
+            environments = self.get_environments_info(environments)
         return BackendActionResult(status=True, output=environments)
+
+    def get_environment_markers(self, environment_path):
+        # Installing or removing packages adds or removes `.dist-info`
+        # directories, which changes the modification time of `site-packages`.
+        return [environment_path / "pyvenv.cfg"] + find_site_packages(environment_path)
+
+    def describe_environment(self, environment_path):
+        return EnvironmentInfo(
+            path=str(environment_path),
+            python_version=_read_pyvenv_cfg(environment_path).get("version"),
+            package_count=count_distributions(find_site_packages(environment_path)),
+            disk_size=directory_size(environment_path),
+            last_modified=last_modified(self.get_environment_markers(environment_path)),
+            healthy=Path(self.get_python_executable_path(environment_path)).is_file(),
+        )
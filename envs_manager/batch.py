@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Iterator, TypedDict
+
+from envs_manager.manager import (
+    MODIFYING_ACTIONS,
+    Manager,
+    ManagerActionResult,
+    ManagerActions,
+    ManagerOptions,
+)
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# Default number of batch entries that run at the same time
+BATCH_MAX_WORKERS = 4
+
+# Max number of actions that modify environments that can run at the same time
+# per backend. Micromamba and Pixi solves share a package cache per backend
+# root path, so they are limited to avoid corrupting it.
+BATCH_BACKEND_LIMITS = {
+    "conda-like": 1,
+    "pixi": 2,
+}
+
+
+class BatchEntry(TypedDict, total=False):
+    """Action to run as part of a batch."""
+
+    action: str
+    """Value of the `ManagerActions` action to run."""
+
+    options: dict | None
+    """Keyword arguments for the action."""
+
+    backend: str
+    """Backend to use. Defaults to the backend passed to `run_batch`."""
+
+    env_name: str | None
+    """Name of the environment to which the action will be performed."""
+
+    env_directory: str | None
+    """Path to the environment's directory."""
+
+
+class BatchActionResult(ManagerActionResult):
+    """Dictionary to report the result of an action run as part of a batch."""
+
+    action: str
+    """Action that was run."""
+
+    index: int
+    """Position of the entry in the batch."""
+
+
+def run_batch(
+    entries: list[BatchEntry],
+    backend: str,
+    root_path: str | Path | None = None,
+    max_workers: int = BATCH_MAX_WORKERS,
+    backend_limits: dict[str, int] | None = None,
+) -> Iterator[BatchActionResult]:
+    """
+    Run manager actions on several environments in parallel.
+
+    Parameters
+    ----------
+    entries : list[BatchEntry]
+        Actions to run.
+    backend : str
+        Backend to use for entries that don't set one.
+    root_path : str or Path, optional
+        Root path for the managers. The default is None, which means the default
+        backends root path.
+    max_workers : int, optional
+        Max number of entries that run at the same time. The default is
+        `BATCH_MAX_WORKERS`.
+    backend_limits : dict[str, int], optional
+        Max number of actions that modify environments that can run at the same
+        time per backend. The default is `BATCH_BACKEND_LIMITS`.
+
+    Yields
+    ------
+    result : BatchActionResult
+        Result of each entry, in the order they finish.
+
+    Notes
+    -----
+    Entries for the same environment run one after the other in the order they
+    were given, so e.g. an environment can be created and then listed as part of
+    the same batch.
+    """
+    backend_limits = BATCH_BACKEND_LIMITS if backend_limits is None else backend_limits
+    semaphores = {
+        backend_id: threading.BoundedSemaphore(limit)
+        for backend_id, limit in backend_limits.items()
+    }
+
+    def run_entry(index: int, entry: BatchEntry) -> BatchActionResult:
+        entry_backend = entry.get("backend", backend)
+        manager_options = ManagerOptions(
+            backend=entry_backend,
+            root_path=str(root_path),
+            env_name=entry.get("env_name"),
+            env_directory=entry.get("env_directory"),
+        )
+
+        try:
+            action = ManagerActions(entry["action"])
+            semaphore = semaphores.get(entry_backend)
+            if action in MODIFYING_ACTIONS and semaphore is not None:
+                limit = semaphore
+            else:
+                limit = contextlib.nullcontext()
+
+            with limit:
+                manager = Manager(
+                    entry_backend,
+                    root_path=root_path,
+                    env_name=entry.get("env_name"),
+                    env_directory=entry.get("env_directory"),
+                )
+                result = manager.run_action(action, entry.get("options"))
+                if result is None:
+                    # Actions like `activate` don't report a result
+                    result = ManagerActionResult(
+                        status=True, output=None, manager_options=manager_options
+                    )
+        except Exception as error:
+            logger.error(error, exc_info=True)
+            result = ManagerActionResult(
+                status=False, output=str(error), manager_options=manager_options
+            )
+
+        return BatchActionResult(
+            status=result["status"],
+            output=result["output"],
+            manager_options=result["manager_options"],
+            action=entry.get("action"),
+            index=index,
+        )
+
+    # Group entries per environment to run each group sequentially
+    groups: dict[tuple, list[tuple[int, BatchEntry]]] = {}
+    for index, entry in enumerate(entries):
+        key = (
+            entry.get("backend", backend),
+            entry.get("env_name"),
+            entry.get("env_directory"),
+        )
+        groups.setdefault(key, []).append((index, entry))
+
+    results = queue.Queue()
+
+    def run_group(group: list[tuple[int, BatchEntry]]):
+        for index, entry in group:
+            results.put(run_entry(index, entry))
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="envs-manager-batch"
+    ) as executor:
+        for group in groups.values():
+            executor.submit(run_group, group)
+
+        for __ in range(len(entries)):
+            yield results.get()
@@ -3,6 +3,7 @@
 # SPDX-License-Identifier: MIT
 
 import argparse
+import json
 import logging
 import sys
 
@@ -10,11 +11,6 @@
 
 
 def main(args=None):
-    for backend in Manager.BACKENDS.keys():
-        (DEFAULT_BACKENDS_ROOT_PATH / backend / "envs").mkdir(
-            parents=True, exist_ok=True
-        )
-
     parser = argparse.ArgumentParser(
         prog=__name__,
         description="Manage a virtual Python " "environment in a target " "directory.",
@@ -64,6 +60,19 @@ def main(args=None):
         help="Delete a virtual Python environment in the target directory.",
     )
 
+    # Clone env
+    parser_clone = main_subparser.add_parser(
+        "clone",
+        help="Clone the virtual Python environment in the target directory without "
+        "downloading or installing packages.",
+    )
+    parser_clone.add_argument("target_env_name", help="Name of the new environment.")
+    parser_clone.add_argument(
+        "--force",
+        action="store_true",
+        help="Replace the new environment if it already exists.",
+    )
+
     # Activate env
     parser_activate = main_subparser.add_parser(
         "activate",
@@ -84,6 +93,12 @@ def main(args=None):
     parser_export.add_argument(
         "export_file_path", help="File path to export the environment."
     )
+    parser_export.add_argument(
+        "--lock",
+        action="store_true",
+        help="Export the exact packages installed with their hashes, so the "
+        "environment can be imported without solving its dependencies.",
+    )
 
     # Import env
     parser_import = main_subparser.add_parser(
@@ -148,6 +163,78 @@ def main(args=None):
         "list-environments",
         help="List discoverable environments available with the current configuration.",
     )
+    parser_list_environments.add_argument(
+        "--details",
+        action="store_true",
+        help="Show the Python version, number of packages, disk size, last "
+        "modification time and health of each environment.",
+    )
+    parser_list_environments.add_argument(
+        "--all-backends",
+        action="store_true",
+        help="List the environments of all the installed backends.",
+    )
+
+    # Run actions on several environments
+    parser_batch = main_subparser.add_parser(
+        "batch",
+        help="Run actions on several environments in parallel. The actions are "
+        "read from a JSON file with a list of entries like "
+        '{"env_name": "test", "action": "install", "options": {"packages": ["numpy"]}}.',
+    )
+    parser_batch.add_argument(
+        "batch_file_path",
+        help="JSON file with the actions to run. Use '-' to read them from stdin.",
+    )
+    parser_batch.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of actions that can run at the same time.",
+    )
+
+    # Template environments
+    parser_templates = main_subparser.add_parser(
+        "templates",
+        help="Show the state of the template environments used to speed up "
+        "creating environments.",
+    )
+    parser_templates.add_argument(
+        "-f",
+        "--file",
+        help="JSON file with the list of templates. Defaults to the "
+        "ENVS_MANAGER_TEMPLATES environment variable.",
+    )
+    parser_templates.add_argument(
+        "--warm",
+        action="store_true",
+        help="Build the templates that are missing or stale.",
+    )
+
+    # Package cache report
+    parser_cache_report = main_subparser.add_parser(
+        "cache-report",
+        help="Show the size and hit rate of the package cache shared by the "
+        "backends.",
+    )
+    parser_cache_report.add_argument(
+        "--last",
+        type=int,
+        default=100,
+        help="Number of last operations used to compute the hit rate.",
+    )
+
+    # Trash of deleted environments
+    parser_trash = main_subparser.add_parser(
+        "trash",
+        help="Show the size of the deleted environments that are not purged yet.",
+    )
+    parser_trash.add_argument(
+        "--purge",
+        action="store_true",
+        help="Remove the deleted environments and wait until it finishes.",
+    )
 
     options = parser.parse_args(args)
 
@@ -175,12 +262,16 @@ def main(args=None):
             )
         elif options.command == "delete":
             manager.delete_environment()
+        elif options.command == "clone":
+            manager.clone_environment(
+                target_env_name=options.target_env_name, force=options.force
+            )
         elif options.command == "activate":
             manager.activate()
         elif options.command == "deactivate":
             manager.deactivate()
         elif options.command == "export":
-            manager.export_environment(options.export_file_path)
+            manager.export_environment(options.export_file_path, lock=options.lock)
         elif options.command == "import":
             manager.import_environment(options.import_file_path)
         elif options.command == "install":
@@ -192,11 +283,81 @@ def main(args=None):
         elif options.command == "list":
             manager.list()
 
-    if options.command == "list-environments":
+        # The trash purger runs in a daemon thread, so the environments moved
+        # to the trash (e.g. by `delete`) must be removed before exiting
+        trash = manager.backend_instance.trash
+        if trash.is_purging():
+            trash.purge(wait=True)
+
+    if options.command == "list-environments" and options.all_backends:
+        result = Manager.list_all_environments(
+            root_path=DEFAULT_BACKENDS_ROOT_PATH, details=options.details
+        )
+        logger.info(json.dumps(result["output"], indent=2))
+    elif options.command == "list-environments":
         if options.backend:
             backend = options.backend
         else:
             backend = DEFAULT_BACKEND
 
         manager = Manager(backend=backend)
-        manager.list_environments()
+        result = manager.list_environments(details=options.details)
+        if options.details:
+            logger.info(json.dumps(result["output"], indent=2))
+
+    if options.command == "cache-report":
+        manager = Manager(backend=options.backend or DEFAULT_BACKEND)
+        result = manager.cache_report(last=options.last)
+        logger.info(json.dumps(result["output"], indent=2))
+
+    if options.command == "trash":
+        manager = Manager(backend=options.backend or DEFAULT_BACKEND)
+        if options.purge:
+            manager.backend_instance.trash.purge(wait=True)
+        result = manager.trash_info()
+        logger.info(json.dumps(result["output"], indent=2))
+
+    if options.command == "templates":
+        from envs_manager.templates import (
+            TemplatePool,
+            get_template_pool,
+            load_templates,
+        )
+
+        if options.file:
+            pool = TemplatePool(
+                DEFAULT_BACKENDS_ROOT_PATH, load_templates(options.file)
+            )
+        else:
+            pool = get_template_pool(DEFAULT_BACKENDS_ROOT_PATH)
+
+        if pool is None:
+            logger.error("No templates configured")
+            sys.exit(1)
+
+        if options.warm:
+            pool.warm(wait=True)
+        logger.info(json.dumps(pool.stats(), indent=2))
+        pool.shutdown()
+
+    if options.command == "batch":
+        from envs_manager.batch import run_batch
+
+        if options.batch_file_path == "-":
+            entries = json.load(sys.stdin)
+        else:
+            with open(options.batch_file_path) as batch_file:
+                entries = json.load(batch_file)
+
+        all_succeeded = True
+        for result in run_batch(
+            entries,
+            backend=options.backend,
+            root_path=DEFAULT_BACKENDS_ROOT_PATH,
+            max_workers=options.workers,
+        ):
+            all_succeeded = all_succeeded and result["status"]
+            logger.info(json.dumps(result, default=str))
+
+        if not all_succeeded:
+            sys.exit(1)
@@ -0,0 +1,152 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+import logging
+import threading
+import time
+from typing import Any, Callable, TypedDict
+import uuid
+
+
+logger = logging.getLogger("envs-manager")
+
+
+class JobStatus(Enum):
+    """Enum with the possible states of a job."""
+
+    Pending = "pending"
+    Running = "running"
+    Finished = "finished"
+    Failed = "failed"
+
+
+class JobInfo(TypedDict):
+    """Dictionary to report the state of a job."""
+
+    job_id: str
+    """Unique identifier of the job."""
+
+    action: str
+    """Name of the action run by the job."""
+
+    status: str
+    """One of the `JobStatus` values."""
+
+    result: Any
+    """Value returned by the job, if it finished."""
+
+    error: str | None
+    """Error raised by the job, if it failed."""
+
+    submitted_at: float
+    """Time when the job was submitted."""
+
+    finished_at: float | None
+    """Time when the job finished or failed."""
+
+
+class JobQueue:
+    """
+    Run functions in a thread pool and keep track of their state and results.
+
+    Background jobs (`submit`) and functions whose result is awaited (`run`)
+    use separate thread pools, so long background jobs can't keep the awaited
+    ones from running.
+
+    Parameters
+    ----------
+    max_workers : int
+        Max number of functions run with `run` at the same time.
+    retention : float
+        Seconds that results of finished jobs are kept before being discarded.
+    max_jobs : int, optional
+        Max number of background jobs that can run at the same time. The
+        default is None, which uses `max_workers`.
+    """
+
+    def __init__(
+        self, max_workers: int, retention: float = 3600, max_jobs: int | None = None
+    ):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="envs-manager"
+        )
+        self._jobs_executor = ThreadPoolExecutor(
+            max_workers=max_jobs or max_workers, thread_name_prefix="envs-manager-jobs"
+        )
+        self._jobs: dict[str, JobInfo] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, action: str, func: Callable, *args, **kwargs) -> str:
+        """
+        Run `func` in the background.
+
+        Returns
+        -------
+        job_id : str
+            Identifier to get the job state with `get`.
+        """
+        job_id = uuid.uuid4().hex
+        job = JobInfo(
+            job_id=job_id,
+            action=action,
+            status=JobStatus.Pending.value,
+            result=None,
+            error=None,
+            submitted_at=time.time(),
+            finished_at=None,
+        )
+        with self._lock:
+            self._discard_expired_jobs()
+            self._jobs[job_id] = job
+
+        self._jobs_executor.submit(self._run_job, job, func, *args, **kwargs)
+        return job_id
+
+    def run(self, func: Callable, *args, **kwargs) -> Future:
+        """Run `func` in the pool of awaited functions without tracking it as a job."""
+        return self._executor.submit(func, *args, **kwargs)
+
+    def get(self, job_id: str) -> JobInfo | None:
+        """Get a copy of the state of a job or None if it doesn't exist."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return JobInfo(**job) if job is not None else None
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._jobs_executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run_job(self, job: JobInfo, func: Callable, *args, **kwargs):
+        with self._lock:
+            job["status"] = JobStatus.Running.value
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            logger.error(error, exc_info=True)
+            with self._lock:
+                job["status"] = JobStatus.Failed.value
+                job["error"] = str(error)
+                job["finished_at"] = time.time()
+        else:
+            with self._lock:
+                job["status"] = JobStatus.Finished.value
+                job["result"] = result
+                job["finished_at"] = time.time()
+
+    def _discard_expired_jobs(self):
+        now = time.time()
+        expired_jobs = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None
+            and now - job["finished_at"] > self.retention
+        ]
+        for job_id in expired_jobs:
+            del self._jobs[job_id]
@@ -3,25 +3,48 @@
 # SPDX-License-Identifier: MIT
 
 from __future__ import annotations
+import asyncio
 import json
+from pathlib import Path
 import typing as t
 
-from traitlets import Unicode
+from traitlets import Dict, Float, Integer, List, Unicode
 from tornado import web
+from tornado.iostream import StreamClosedError
 from jupyter_server.auth.decorator import authorized
 from jupyter_server.extension.application import ExtensionApp
 from jupyter_server.base.handlers import JupyterHandler
 
+from envs_manager.backends.bootstrap import set_artifacts_source
+from envs_manager.backends.exports import (
+    EXPORT_ID_REGEX,
+    EXPORTS_DIRECTORY_NAME,
+    get_export_path,
+)
+from envs_manager.backends.trash import TRASH_DIRECTORY_NAME, Trash
+from envs_manager.jobs import JobQueue
 from envs_manager.manager import (
     DEFAULT_BACKENDS_ROOT_PATH,
     DEFAULT_BACKEND,
     Manager,
     ManagerActions,
+    ManagerPool,
+)
+from envs_manager.templates import (
+    TEMPLATES_MAX_AGE,
+    TEMPLATES_MAX_SIZE,
+    TEMPLATES_REFRESH_INTERVAL,
+    TemplatePool,
+    set_template_pool,
 )
 
 
+# Size of the chunks sent when downloading exported environments
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+
 class EnvManagerHandler(JupyterHandler):
-    """Handler to list available environments."""
+    """Handler to run environment manager actions."""
 
     _handler_action_regex = (
         rf"(?P<action>{'|'.join(action.value for action in ManagerActions)})"
@@ -29,9 +52,17 @@ class EnvManagerHandler(JupyterHandler):
 
     auth_resource = "envs_manager"
 
-    def get_manager(self) -> Manager:
-        """Get the environment manager instance."""
-        return Manager(
+    @property
+    def jobs(self) -> JobQueue:
+        return self.settings["envs_manager_jobs"]
+
+    @property
+    def managers(self) -> ManagerPool:
+        return self.settings["envs_manager_managers"]
+
+    def get_manager_options(self) -> dict[str, t.Any]:
+        """Get the arguments to create the manager from the request."""
+        return dict(
             backend=self.get_argument("backend", None)
             or self.settings["envs_manager_config"]["default_backend"],
             root_path=self.settings["envs_manager_config"]["root_path"],
@@ -39,30 +70,222 @@ def get_manager(self) -> Manager:
             env_directory=self.get_argument("env_directory", None),
         )
 
+    def get_manager(self) -> Manager:
+        """Get the environment manager instance."""
+        return self.managers.get(**self.get_manager_options())
+
     def get_options(self) -> dict[str, t.Any]:
         return self.get_json_body() or {}
 
+    def get_action_runner(self, action: str) -> t.Callable[[], t.Any]:
+        """
+        Get a function that runs `action` with the request arguments.
+
+        The manager is created by the returned function, so that creating it
+        (which can validate or even install the backend) also happens outside the
+        server event loop.
+        """
+        managers = self.managers
+        manager_options = self.get_manager_options()
+        action_options = self.get_options()
+
+        def run_action():
+            manager = managers.get(**manager_options)
+            return manager.run_action(ManagerActions(action), action_options)
+
+        return run_action
+
     def write_json(self, data, status=200):
         self.set_status(status)
         self.set_header("Content-Type", "application/json")
         self.finish(json.dumps(data))
 
+    @authorized
+    @web.authenticated
+    async def post(self, action: str):
+        # Actions run in the extension thread pool and the handler waits for
+        # them without blocking the server, so other requests can be served in
+        # the meantime.
+        try:
+            run_action = self.get_action_runner(action)
+            result = await asyncio.wrap_future(self.jobs.run(run_action))
+            self.write_json(result, status=200)
+        except Exception as e:
+            self.set_status(501)
+            self.finish(str(e))
+            self.log_exception(type(e), e, e.__traceback__)
+
+
+class EnvManagerJobsHandler(EnvManagerHandler):
+    """Handler to run environment manager actions in the background."""
+
     @authorized
     @web.authenticated
     def post(self, action: str):
         try:
-            manager = self.get_manager()
+            run_action = self.get_action_runner(action)
+            job_id = self.jobs.submit(action, run_action)
+            self.write_json({"job_id": job_id}, status=202)
+        except Exception as e:
+            self.set_status(501)
+            self.finish(str(e))
+            self.log_exception(type(e), e, e.__traceback__)
+
+
+class EnvManagerStreamHandler(EnvManagerHandler):
+    """
+    Handler to run environment manager actions streaming their output.
+
+    The response uses the server-sent events format: an `output` event is sent
+    for each output line of the action and a final `result` event contains the
+    action result.
+    """
+
+    _lines: asyncio.Queue[str | None] | None = None
+    _connection_closed = False
+
+    def write_event(self, event: str, data: t.Any):
+        self.write(f"event: {event}\ndata: {json.dumps(data)}\n\n")
+
+    def on_connection_close(self):
+        # The action can't be cancelled once it's running, so it keeps running
+        # in the pool but its output is not sent anymore
+        self._connection_closed = True
+        if self._lines is not None:
+            self._lines.put_nowait(None)
+        super().on_connection_close()
+
+    @authorized
+    @web.authenticated
+    async def post(self, action: str):
+        try:
+            manager_options = self.get_manager_options()
             action_options = self.get_options()
-            self.write_json(
-                manager.run_action(ManagerActions(action), action_options),
-                status=200,
+        except Exception as e:
+            self.set_status(501)
+            self.finish(str(e))
+            self.log_exception(type(e), e, e.__traceback__)
+            return
+
+        managers = self.managers
+        loop = asyncio.get_running_loop()
+        lines: asyncio.Queue[str | None] = asyncio.Queue()
+        self._lines = lines
+
+        def on_output(line):
+            if not self._connection_closed:
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+
+        def run_action():
+            try:
+                manager = managers.get(**manager_options)
+                return manager.run_action(
+                    ManagerActions(action), action_options, on_output=on_output
+                )
+            finally:
+                loop.call_soon_threadsafe(lines.put_nowait, None)
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        future = asyncio.wrap_future(self.jobs.run(run_action))
+
+        try:
+            while True:
+                line = await lines.get()
+                if line is None or self._connection_closed:
+                    break
+                self.write_event("output", line)
+                await self.flush()
+        except StreamClosedError:
+            self._connection_closed = True
+
+        if self._connection_closed:
+            self.log.info(f"Client disconnected, {action} keeps running unstreamed")
+            return
+
+        try:
+            result = await future
+            self.write_event("result", result)
+        except Exception as e:
+            self.write_event("error", str(e))
+            self.log_exception(type(e), e, e.__traceback__)
+        self.finish()
+
+
+class EnvManagerAllEnvironmentsHandler(EnvManagerHandler):
+    """Handler to list the environments of all the installed backends."""
+
+    @authorized
+    @web.authenticated
+    async def get(self):
+        try:
+            details = self.get_argument("details", "false").lower() == "true"
+            result = await asyncio.wrap_future(
+                self.jobs.run(
+                    Manager.list_all_environments,
+                    root_path=self.settings["envs_manager_config"]["root_path"],
+                    details=details,
+                    managers=self.managers,
+                )
             )
+            self.write_json(result, status=200)
         except Exception as e:
             self.set_status(501)
             self.finish(str(e))
             self.log_exception(type(e), e, e.__traceback__)
 
 
+class EnvManagerTemplatesHandler(EnvManagerHandler):
+    """Handler to get the state and metrics of the template environments pool."""
+
+    @authorized
+    @web.authenticated
+    def get(self):
+        templates = self.settings.get("envs_manager_templates")
+        if templates is None:
+            raise web.HTTPError(404, "No template environments are configured")
+        self.write_json(templates.stats(), status=200)
+
+
+class EnvManagerExportHandler(EnvManagerHandler):
+    """Handler to download an exported environment archive in chunks."""
+
+    @authorized
+    @web.authenticated
+    async def get(self, export_id: str):
+        exports_directory = (
+            Path(self.settings["envs_manager_config"]["root_path"])
+            / EXPORTS_DIRECTORY_NAME
+        )
+        path = get_export_path(exports_directory, export_id)
+        if path is None:
+            raise web.HTTPError(404, f"Export {export_id} not found")
+
+        self.set_header("Content-Type", "application/zip")
+        self.set_header("Content-Disposition", f'attachment; filename="{export_id}"')
+        self.set_header("Content-Length", str(path.stat().st_size))
+        with open(path, "rb") as export_file:
+            while True:
+                chunk = export_file.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.write(chunk)
+                await self.flush()
+        self.finish()
+
+
+class EnvManagerJobStatusHandler(EnvManagerHandler):
+    """Handler to get the state and result of a background action."""
+
+    @authorized
+    @web.authenticated
+    def get(self, job_id: str):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise web.HTTPError(404, f"Job {job_id} not found")
+        self.write_json(job, status=200)
+
+
 class EnvManagerApp(ExtensionApp):
     """Jupyter extension for managing environments."""
 
@@ -82,9 +305,146 @@ class EnvManagerApp(ExtensionApp):
         help="Default backend to use for managing environments.",
     )
 
+    max_workers = Integer(
+        4,
+        config=True,
+        help="Max number of manager actions that can run at the same time, "
+        "without counting the background ones.",
+    )
+
+    max_jobs = Integer(
+        4,
+        config=True,
+        help="Max number of background manager actions (submitted to the jobs "
+        "endpoints) that can run at the same time.",
+    )
+
+    job_retention = Float(
+        3600,
+        config=True,
+        help="Seconds to keep the results of background actions after they finish.",
+    )
+
+    manager_pool_size = Integer(
+        32,
+        config=True,
+        help="Max number of manager instances kept to be reused between requests.",
+    )
+
+    manager_idle_timeout = Float(
+        600,
+        config=True,
+        help="Seconds after which an unused manager instance is discarded.",
+    )
+
+    templates = List(
+        Dict(),
+        default_value=[],
+        config=True,
+        help="Template environments kept pre-built to speed up creating "
+        "environments with the same packages. Each one is a dictionary with "
+        "`name`, `backend`, `packages` and (optionally) `channels` keys.",
+    )
+
+    template_max_age = Float(
+        TEMPLATES_MAX_AGE,
+        config=True,
+        help="Seconds after which template environments are rebuilt.",
+    )
+
+    template_refresh_interval = Float(
+        TEMPLATES_REFRESH_INTERVAL,
+        config=True,
+        help="Seconds between the checks for stale templates to rebuild. Use 0 "
+        "to only check them when they are used.",
+    )
+
+    template_pool_size = Integer(
+        TEMPLATES_MAX_SIZE,
+        config=True,
+        help="Max number of template environments kept built.",
+    )
+
+    bootstrap_artifacts = Unicode(
+        "",
+        config=True,
+        help="Local directory or file:// URL with the Micromamba and Pixi "
+        "artifacts used to install the backend executables before downloading "
+        "them. Defaults to the ENVS_MANAGER_BOOTSTRAP_ARTIFACTS environment "
+        "variable.",
+    )
+
     handlers = [
+        (rf"{extension_url}/templates", EnvManagerTemplatesHandler),
+        (rf"{extension_url}/environments", EnvManagerAllEnvironmentsHandler),
+        (
+            rf"{extension_url}/exports/(?P<export_id>{EXPORT_ID_REGEX})",
+            EnvManagerExportHandler,
+        ),
+        (
+            rf"{extension_url}/jobs/(?P<job_id>[0-9a-f]{{32}})",
+            EnvManagerJobStatusHandler,
+        ),
+        (
+            rf"{extension_url}/jobs/{EnvManagerHandler._handler_action_regex}",
+            EnvManagerJobsHandler,
+        ),
+        (
+            rf"{extension_url}/stream/{EnvManagerHandler._handler_action_regex}",
+            EnvManagerStreamHandler,
+        ),
         (
             rf"{extension_url}/{EnvManagerHandler._handler_action_regex}",
             EnvManagerHandler,
         ),
     ]  # type: ignore[list-item]
+
+    def initialize_settings(self):
+        if self.bootstrap_artifacts:
+            set_artifacts_source(self.bootstrap_artifacts)
+
+        self.settings["envs_manager_jobs"] = JobQueue(
+            max_workers=self.max_workers,
+            retention=self.job_retention,
+            max_jobs=self.max_jobs,
+        )
+        self.settings["envs_manager_managers"] = ManagerPool(
+            max_size=self.manager_pool_size,
+            idle_timeout=self.manager_idle_timeout,
+        )
+
+        # Resume purging environments deleted before a restart or crash
+        trash = Trash(Path(self.root_path) / TRASH_DIRECTORY_NAME)
+        if trash.entries():
+            trash.purge()
+
+        if self.templates:
+            templates = TemplatePool(
+                self.root_path,
+                self.templates,
+                max_age=self.template_max_age,
+                max_size=self.template_pool_size,
+                refresh_interval=self.template_refresh_interval,
+                background=True,
+            )
+            set_template_pool(self.root_path, templates)
+            templates.warm()
+            templates.start_refresh()
+            self.settings["envs_manager_templates"] = templates
+
+    async def stop_extension(self):
+        jobs = self.settings.get("envs_manager_jobs")
+        if jobs is not None:
+            jobs.shutdown()
+
+        managers = self.settings.get("envs_manager_managers")
+        if managers is not None:
+            managers.clear()
+
+        templates = self.settings.get("envs_manager_templates")
+        if templates is not None:
+            templates.shutdown()
+            set_template_pool(self.root_path, None)
+
+        if self.bootstrap_artifacts:
+            set_artifacts_source(None)
@@ -0,0 +1,130 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Inter-process locks for environments.
+
+Locks are implemented with OS file locks (`flock` on Unix and `msvcrt.locking`
+on Windows), which the OS releases automatically when the process holding them
+exits. That means a crashed process can't leave a stale lock behind: lock files
+may remain on disk, but they are not locked anymore and are reused by the next
+process that needs them.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+from pathlib import Path
+import time
+from typing import Iterator
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+# Default seconds to wait for an environment lock
+LOCK_TIMEOUT = float(os.environ.get("ENVS_MANAGER_LOCK_TIMEOUT", 600))
+
+# Seconds to wait between attempts to get a lock
+LOCK_POLL_INTERVAL = 0.1
+
+
+class LockTimeoutError(TimeoutError):
+    """Raised when a lock couldn't be acquired in the given time."""
+
+
+def _try_lock(fd: int, shared: bool) -> bool:
+    if os.name == "nt":
+        # Windows byte range locks don't support shared mode, so readers are
+        # also exclusive there.
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+    else:
+        mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        try:
+            fcntl.flock(fd, mode | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+
+def _unlock(fd: int):
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class EnvironmentLock:
+    """
+    Reader/writer lock for an environment shared between processes.
+
+    Any number of shared (reader) holders can have the lock at the same time,
+    while an exclusive (writer) holder has it for itself.
+
+    Parameters
+    ----------
+    locks_directory : str or Path
+        Directory where lock files are saved.
+    environment_path : str or Path
+        Path to the environment to lock.
+    """
+
+    def __init__(self, locks_directory: str | Path, environment_path: str | Path):
+        self.environment_path = str(Path(environment_path).absolute())
+        digest = hashlib.sha1(self.environment_path.encode("utf-8")).hexdigest()
+        self.path = Path(locks_directory) / (
+            f"{Path(self.environment_path).name}-{digest[:16]}.lock"
+        )
+
+    @contextlib.contextmanager
+    def hold(
+        self, shared: bool = False, timeout: float | None = LOCK_TIMEOUT
+    ) -> Iterator[None]:
+        """
+        Context manager to hold the lock.
+
+        Parameters
+        ----------
+        shared : bool, optional
+            Get the lock in shared mode instead of exclusive mode. The default is
+            False.
+        timeout : float or None, optional
+            Seconds to wait for the lock. None means waiting forever. The default
+            is `LOCK_TIMEOUT`.
+
+        Raises
+        ------
+        LockTimeoutError
+            If the lock couldn't be acquired before `timeout`.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not _try_lock(fd, shared):
+                if deadline is not None and time.monotonic() >= deadline:
+                    mode = "shared" if shared else "exclusive"
+                    raise LockTimeoutError(
+                        f"Timed out after {timeout} seconds waiting for an "
+                        f"{mode} lock on {self.environment_path}. Another "
+                        f"operation is running on this environment."
+                    )
+                time.sleep(LOCK_POLL_INTERVAL)
+
+            try:
+                yield
+            finally:
+                _unlock(fd)
+        finally:
+            os.close(fd)
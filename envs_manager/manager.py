@@ -3,16 +3,29 @@
 # SPDX-License-Identifier: MIT
 
 from __future__ import annotations
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import importlib
+import logging
 import os
 from pathlib import Path
-from typing import TypedDict
+import queue
+import threading
+import time
+from typing import Callable, Iterator, TypedDict
 from enum import Enum
 
-from envs_manager.backends.api import BackendActionResult, BackendInstance
-from envs_manager.backends.venv_interface import VEnvInterface
-from envs_manager.backends.conda_like_interface import CondaLikeInterface
-from envs_manager.backends.pixi_interface import PixiInterface
+from envs_manager.backends import package_cache
+from envs_manager.backends.api import (
+    BackendActionResult,
+    BackendInstance,
+    output_callback,
+)
+from envs_manager.locks import LOCK_TIMEOUT, EnvironmentLock, LockTimeoutError
+
 
+logger = logging.getLogger("envs-manager")
 
 DEFAULT_BACKENDS_ROOT_PATH = Path(
     os.environ.get(
@@ -22,6 +35,41 @@
 DEFAULT_BACKEND = os.environ.get("ENV_BACKEND", "venv")
 DEFAULT_ENVS_ROOT_PATH = DEFAULT_BACKENDS_ROOT_PATH / DEFAULT_BACKEND / "envs"
 
+# Value of the `backend` manager option in results for all backends
+ALL_BACKENDS = "all"
+
+
+class BackendsRegistry(Mapping):
+    """
+    Mapping of backend IDs to backend classes.
+
+    Backend modules (and their dependencies) are only imported the first time
+    their class is requested, so using a backend doesn't require importing the
+    others.
+
+    Parameters
+    ----------
+    backends : dict[str, str]
+        Mapping of backend IDs to `<module>:<class name>` import paths.
+    """
+
+    def __init__(self, backends: dict[str, str]):
+        self._import_paths = backends
+        self._classes: dict[str, type[BackendInstance]] = {}
+
+    def __getitem__(self, backend: str) -> type[BackendInstance]:
+        if backend not in self._classes:
+            module_name, class_name = self._import_paths[backend].split(":")
+            module = importlib.import_module(module_name)
+            self._classes[backend] = getattr(module, class_name)
+        return self._classes[backend]
+
+    def __iter__(self):
+        return iter(self._import_paths)
+
+    def __len__(self):
+        return len(self._import_paths)
+
 
 class ManagerActions(Enum):
     """Enum with the possible actions that can be performed by the manager."""
@@ -38,6 +86,21 @@ class ManagerActions(Enum):
     ListPackages = "list"
     ListEnvironments = "list_environments"
     CreateKernelSpec = "create_kernelspec"
+    CloneEnvironment = "clone_environment"
+    CacheReport = "cache_report"
+    TrashInfo = "trash_info"
+
+
+# Actions that modify the environment they are run on
+MODIFYING_ACTIONS = {
+    ManagerActions.CreateEnvironment,
+    ManagerActions.CloneEnvironment,
+    ManagerActions.DeleteEnvironment,
+    ManagerActions.ImportEnvironment,
+    ManagerActions.InstallPackages,
+    ManagerActions.UninstallPackages,
+    ManagerActions.UpdatePackages,
+}
 
 
 class ManagerOptions(TypedDict):
@@ -66,16 +129,73 @@ class ManagerActionResult(BackendActionResult):
     """Options that were used to create the manager."""
 
 
+class ActionStreamEvent(TypedDict):
+    """Dictionary to report the progress of an action run with `stream_action`."""
+
+    event: str
+    """Either `output` for an output line or `result` for the action result."""
+
+    data: str | ManagerActionResult
+    """Output line or action result."""
+
+
+def environment_action(shared: bool = False, track_cache_usage: bool = False):
+    """
+    Decorator to hold the environment lock while a manager action runs.
+
+    Parameters
+    ----------
+    shared : bool, optional
+        Hold the lock in shared mode, which is enough for actions that only read
+        the environment. The default is False.
+    track_cache_usage : bool, optional
+        Save the package cache usage of the action, for actions that install
+        packages. The default is False.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self: Manager, *args, **kwargs):
+            if not self.env_directory:
+                return method(self, *args, **kwargs)
+
+            try:
+                with self.environment_lock.hold(
+                    shared=shared, timeout=self.lock_timeout
+                ):
+                    if not track_cache_usage:
+                        return method(self, *args, **kwargs)
+
+                    with package_cache.track_cache_usage(
+                        self.backend_instance, method.__name__
+                    ):
+                        return method(self, *args, **kwargs)
+            except LockTimeoutError as error:
+                return ManagerActionResult(
+                    status=False,
+                    output=str(error),
+                    manager_options=self._manager_options,
+                )
+
+        return wrapper
+
+    return decorator
+
+
 class Manager:
     """
     Class to handle different Python environment and package manager implementations.
     """
 
-    BACKENDS = {
-        VEnvInterface.ID: VEnvInterface,
-        CondaLikeInterface.ID: CondaLikeInterface,
-        PixiInterface.ID: PixiInterface,
-    }
+    BACKENDS = BackendsRegistry(
+        {
+            "venv": "envs_manager.backends.venv_interface:VEnvInterface",
+            "conda-like": (
+                "envs_manager.backends.conda_like_interface:CondaLikeInterface"
+            ),
+            "pixi": "envs_manager.backends.pixi_interface:PixiInterface",
+        }
+    )
 
     def __init__(
         self,
@@ -119,19 +239,105 @@ def __init__(
             env_directory=str(self.env_directory),
         )
 
-    def run_action(self, action: ManagerActions, action_options: dict | None = None):
-        method = getattr(self, action.value)
-        if action_options is not None:
-            return method(**action_options)
-        else:
-            return method()
+        # Seconds to wait for other operations on the environment to finish
+        self.lock_timeout: float | None = LOCK_TIMEOUT
+        self.environment_lock = (
+            EnvironmentLock(Path(self.root_path) / "locks", self.env_directory)
+            if self.env_directory
+            else None
+        )
 
+    def run_action(
+        self,
+        action: ManagerActions,
+        action_options: dict | None = None,
+        on_output: Callable[[str], None] | None = None,
+    ):
+        """
+        Run a manager action.
+
+        Parameters
+        ----------
+        action : ManagerActions
+            Action to run.
+        action_options : dict, optional
+            Keyword arguments for the action. The default is None.
+        on_output : Callable[[str], None], optional
+            Function called with each output line of the commands run by the
+            backend as soon as it's available. The default is None.
+        """
+        method = getattr(self, action.value)
+        with output_callback(on_output):
+            if action_options is not None:
+                return method(**action_options)
+            else:
+                return method()
+
+    def stream_action(
+        self, action: ManagerActions, action_options: dict | None = None
+    ) -> Iterator[ActionStreamEvent]:
+        """
+        Run a manager action in a thread and yield its output while it runs.
+
+        Parameters
+        ----------
+        action : ManagerActions
+            Action to run.
+        action_options : dict, optional
+            Keyword arguments for the action. The default is None.
+
+        Yields
+        ------
+        event : ActionStreamEvent
+            An `output` event per output line and a final `result` event with the
+            action result.
+        """
+        events = queue.Queue()
+
+        def run():
+            try:
+                result = self.run_action(
+                    action,
+                    action_options,
+                    on_output=lambda line: events.put(
+                        ActionStreamEvent(event="output", data=line)
+                    ),
+                )
+            except Exception as error:
+                result = ManagerActionResult(
+                    status=False,
+                    output=str(error),
+                    manager_options=self._manager_options,
+                )
+            events.put(ActionStreamEvent(event="result", data=result))
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        while True:
+            event = events.get()
+            yield event
+            if event["event"] == "result":
+                break
+        thread.join()
+
+    @environment_action(track_cache_usage=True)
     def create_environment(
         self,
         packages: list[str] | None = None,
         channels: list[str] | None = None,
         force: bool = False,
     ) -> ManagerActionResult:
+        from envs_manager.templates import get_template_pool
+
+        # Use a pre-built template environment if there is one for the spec
+        template_pool = get_template_pool(self.root_path)
+        if template_pool is not None and not Path(self.env_directory).exists():
+            backend_result = template_pool.create_environment(
+                self.backend_instance.ID, self.backend_instance, packages, channels
+            )
+            if backend_result is not None:
+                return self._backend_to_manager_result(backend_result)
+
         if channels:
             backend_result = self.backend_instance.create_environment(
                 packages, channels=channels, force=force
@@ -143,24 +349,71 @@ def create_environment(
 
         return self._backend_to_manager_result(backend_result)
 
+    @environment_action()
     def delete_environment(self, force: bool = False) -> ManagerActionResult:
         backend_result = self.backend_instance.delete_environment(force=force)
         return self._backend_to_manager_result(backend_result)
 
+    @environment_action(shared=True)
+    def clone_environment(
+        self,
+        target_env_name: str | None = None,
+        target_env_directory: str | None = None,
+        force: bool = False,
+    ) -> ManagerActionResult:
+        """
+        Clone the environment without downloading or installing packages.
+
+        Parameters
+        ----------
+        target_env_name : str, optional
+            Name of the new environment, which is created in the backend envs
+            directory. The default is None.
+        target_env_directory : str, optional
+            Path to the new environment. It's used instead of `target_env_name`
+            if given. The default is None.
+        force : bool, optional
+            Replace the target environment if it already exists. The default is
+            False.
+        """
+        if target_env_directory:
+            target_path = Path(target_env_directory)
+        elif target_env_name:
+            target_path = Path(self.backend_instance.envs_directory) / target_env_name
+        else:
+            return ManagerActionResult(
+                status=False,
+                output="A target environment name or directory is required",
+                manager_options=self._manager_options,
+            )
+
+        target_lock = EnvironmentLock(Path(self.root_path) / "locks", target_path)
+        try:
+            with target_lock.hold(timeout=self.lock_timeout):
+                backend_result = self.backend_instance.clone_environment(
+                    str(target_path), force=force
+                )
+        except LockTimeoutError as error:
+            backend_result = BackendActionResult(status=False, output=str(error))
+
+        return self._backend_to_manager_result(backend_result)
+
     def activate(self):
         self.backend_instance.activate_environment()
 
     def deactivate(self):
         self.backend_instance.deactivate_environment()
 
+    @environment_action(shared=True)
     def export_environment(
-        self, export_file_path: str | None = None
+        self, export_file_path: str | None = None, lock: bool = False
     ) -> ManagerActionResult:
         backend_result = self.backend_instance.export_environment(
-            export_file_path=export_file_path
+            export_file_path=export_file_path, lock=lock
         )
         return self._backend_to_manager_result(backend_result)
 
+    @environment_action(track_cache_usage=True)
     def import_environment(
         self, import_file_path: str, force: bool = False
     ) -> ManagerActionResult:
@@ -169,6 +422,7 @@ def import_environment(
         )
         return self._backend_to_manager_result(backend_result)
 
+    @environment_action(track_cache_usage=True)
     def install(
         self,
         packages: list[str] | None = None,
@@ -190,6 +444,7 @@ def install(
 
         return self._backend_to_manager_result(backend_result)
 
+    @environment_action()
     def uninstall(
         self, packages: list[str], force: bool = False, capture_output: bool = False
     ) -> ManagerActionResult:
@@ -198,6 +453,7 @@ def uninstall(
         )
         return self._backend_to_manager_result(backend_result)
 
+    @environment_action(track_cache_usage=True)
     def update(
         self, packages: list[str], force: bool = False, capture_output: bool = False
     ) -> ManagerActionResult:
@@ -206,14 +462,127 @@ def update(
         )
         return self._backend_to_manager_result(backend_result)
 
+    @environment_action(shared=True)
     def list(self) -> ManagerActionResult:
         backend_result = self.backend_instance.list_packages()
         return self._backend_to_manager_result(backend_result)
 
-    def list_environments(self) -> ManagerActionResult:
-        backend_result = self.backend_instance.list_environments()
+    def list_environments(self, details: bool = False) -> ManagerActionResult:
+        backend_result = self.backend_instance.list_environments(details=details)
         return self._backend_to_manager_result(backend_result)
 
+    @classmethod
+    def list_all_environments(
+        cls,
+        root_path: str | Path | None = None,
+        details: bool = False,
+        managers: ManagerPool | None = None,
+    ) -> ManagerActionResult:
+        """
+        List the environments of all the backends concurrently.
+
+        Backends whose executable is not installed in `root_path` are skipped,
+        so this never downloads a backend executable.
+
+        Parameters
+        ----------
+        root_path : str or Path, optional
+            Backends root path. The default is `DEFAULT_BACKENDS_ROOT_PATH`.
+        details : bool, optional
+            Return the metadata of each environment instead of only its path.
+            The default is False.
+        managers : ManagerPool, optional
+            Pool from which managers are taken. If None, new managers are
+            created. The default is None.
+
+        Returns
+        -------
+        ManagerActionResult
+            Result with the output of `list_environments` for each backend. If
+            it fails for a backend, its output is the error message and the
+            result status is False.
+        """
+        root_path = DEFAULT_BACKENDS_ROOT_PATH if root_path is None else root_path
+
+        backends = []
+        for backend in cls.BACKENDS:
+            try:
+                backend_class = cls.BACKENDS[backend]
+            except ImportError as error:
+                logger.debug(f"Skipping {backend} backend: {error}")
+                continue
+
+            bin_directory = Path(root_path) / backend / "bin"
+            if backend_class.is_installed(bin_directory):
+                backends.append(backend)
+            else:
+                logger.debug(f"Skipping {backend} backend because it's not installed")
+
+        def list_environments(backend):
+            try:
+                if managers is not None:
+                    manager = managers.get(backend, root_path=root_path)
+                else:
+                    manager = cls(backend, root_path=root_path)
+                return manager.list_environments(details=details)
+            except Exception as error:
+                return BackendActionResult(status=False, output=str(error))
+
+        with ThreadPoolExecutor(max_workers=max(len(backends), 1)) as executor:
+            results = dict(zip(backends, executor.map(list_environments, backends)))
+
+        return ManagerActionResult(
+            status=all(result["status"] for result in results.values()),
+            output={backend: result["output"] for backend, result in results.items()},
+            manager_options=ManagerOptions(
+                backend=ALL_BACKENDS,
+                root_path=str(root_path),
+                env_name=None,
+                env_directory=None,
+            ),
+        )
+
+    def cache_report(self, last: int = 100) -> ManagerActionResult:
+        """
+        Report the size, per backend usage and hit rate of the package cache.
+
+        Parameters
+        ----------
+        last : int, optional
+            Number of last operations used to compute the hit rate. The default
+            is 100.
+        """
+        cache_directory = self.backend_instance.cache_directory
+        backends = {}
+        for backend in self.BACKENDS:
+            try:
+                backend_class = self.BACKENDS[backend]
+            except ImportError:
+                continue
+            backends[backend] = backend_class.get_package_cache_path(cache_directory)
+
+        report = package_cache.cache_report(cache_directory, backends, last=last)
+        return ManagerActionResult(
+            status=True, output=report, manager_options=self._manager_options
+        )
+
+    def trash_info(self, purge: bool = False) -> ManagerActionResult:
+        """
+        Report the number and size of deleted environments not purged yet.
+
+        Parameters
+        ----------
+        purge : bool, optional
+            Start purging them in the background if they aren't being purged
+            already. The default is False.
+        """
+        trash = self.backend_instance.trash
+        if purge:
+            trash.purge()
+        return ManagerActionResult(
+            status=True, output=trash.info(), manager_options=self._manager_options
+        )
+
     def _backend_to_manager_result(
         self,
         backend_result: BackendActionResult,
@@ -223,3 +592,85 @@ def _backend_to_manager_result(
             output=backend_result["output"],
             manager_options=self._manager_options,
         )
+
+
+class ManagerPool:
+    """
+    Pool of manager instances to reuse them between requests.
+
+    Managers are keyed by the options used to create them, so repeated requests
+    for the same backend and environment reuse an already validated backend
+    instance (and any caches it has).
+
+    Parameters
+    ----------
+    max_size : int
+        Max number of managers kept in the pool. The least recently used ones
+        are discarded when it's exceeded.
+    idle_timeout : float
+        Seconds after which a manager that hasn't been used is discarded.
+    """
+
+    def __init__(self, max_size: int = 32, idle_timeout: float = 600):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._managers: dict[tuple, tuple[Manager, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        backend: str,
+        root_path: str | Path | None = None,
+        env_name: str | None = None,
+        env_directory: str | Path | None = None,
+    ) -> Manager:
+        """Get a manager for the given options, creating it if necessary."""
+        key = (
+            backend,
+            str(root_path) if root_path else None,
+            env_name,
+            str(env_directory) if env_directory else None,
+        )
+
+        with self._lock:
+            self._discard_idle_managers()
+            if key in self._managers:
+                manager, __ = self._managers.pop(key)
+                self._managers[key] = (manager, time.monotonic())
+                return manager
+
+        # Managers are created without holding the lock because that can take
+        # a while (e.g. if the backend executable needs to be installed).
+        manager = Manager(
+            backend,
+            root_path=root_path,
+            env_name=env_name,
+            env_directory=env_directory,
+        )
+
+        with self._lock:
+            if key in self._managers:
+                manager, __ = self._managers.pop(key)
+            self._managers[key] = (manager, time.monotonic())
+            while len(self._managers) > self.max_size:
+                del self._managers[next(iter(self._managers))]
+
+        return manager
+
+    def clear(self):
+        with self._lock:
+            self._managers.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._managers)
+
+    def _discard_idle_managers(self):
+        now = time.monotonic()
+        idle_keys = [
+            key
+            for key, (__, last_used) in self._managers.items()
+            if now - last_used > self.idle_timeout
+        ]
+        for key in idle_keys:
+            del self._managers[key]
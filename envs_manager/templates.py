@@ -0,0 +1,549 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Pool of pre-built template environments.
+
+Templates are environments built in the background for commonly requested
+package specs. When an environment is created with a spec that includes the
+packages of a template, the template is cloned (see
+`BackendInstance.clone_environment`) and only the missing packages are installed,
+instead of building the environment from scratch.
+
+Templates are saved in `<root>/<backend>/templates/<template key>/<build id>`,
+where the key is derived from the template spec, so changing a spec creates a new
+template. Each template directory has a `template.json` file with the build
+that is currently used, so stale templates can be rebuilt while the previous
+build keeps being used. Pools of long-lived processes (like the Jupyter
+extension) also build missing and stale templates in the background when they
+are requested, and check periodically for stale templates to rebuild (see
+`TemplatePool.start_refresh`), so they are kept fresh even if they are not used.
+Other processes only use the templates that are already built, since they would
+have to wait for those builds before exiting.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import threading
+import time
+from typing import TypedDict
+import uuid
+
+from envs_manager.backends.api import BackendActionResult, BackendInstance
+from envs_manager.locks import EnvironmentLock, LockTimeoutError
+from envs_manager.manager import Manager
+
+
+logger = logging.getLogger("envs-manager")
+
+
+# JSON file with a list of `TemplateSpec`s to use by default
+TEMPLATES_FILE = os.environ.get("ENVS_MANAGER_TEMPLATES")
+
+# Seconds after which a template is rebuilt to pick up new package versions
+TEMPLATES_MAX_AGE = float(
+    os.environ.get("ENVS_MANAGER_TEMPLATES_MAX_AGE", 7 * 24 * 60 * 60)
+)
+
+# Seconds between the checks for stale templates. Use 0 to disable the checks.
+TEMPLATES_REFRESH_INTERVAL = float(
+    os.environ.get("ENVS_MANAGER_TEMPLATES_REFRESH_INTERVAL", 60 * 60)
+)
+
+# Max number of templates kept built. The most used ones are kept.
+TEMPLATES_MAX_SIZE = int(os.environ.get("ENVS_MANAGER_TEMPLATES_MAX_SIZE", 8))
+
+TEMPLATE_INFO_FILENAME = "template.json"
+
+# venv environments always use the Python of the interpreter creating them, so
+# Python specs are ignored for them (as `VEnvInterface.create_environment` does).
+_PYTHON_SPEC_REGEX = re.compile(r"^python([=<>!~\s].*)?$")
+
+_pools: dict[str, TemplatePool] = {}
+_pools_lock = threading.Lock()
+
+
+class TemplateSpec(TypedDict):
+    """Dictionary with the spec of a template environment."""
+
+    name: str
+    """Name to identify the template in the pool stats."""
+
+    backend: str
+    """Backend used to build the template."""
+
+    packages: list[str]
+    """Packages installed in the template."""
+
+    channels: list[str]
+    """Channels from where packages are installed (only for conda backends)."""
+
+
+class TemplateStats(TypedDict):
+    """Dictionary to report the state of a template."""
+
+    name: str
+    """Template name."""
+
+    key: str
+    """Identifier derived from the template spec."""
+
+    backend: str
+    """Backend used to build the template."""
+
+    ready: bool
+    """True if the template is built and can be used."""
+
+    stale: bool
+    """True if the template is older than the pool `max_age`."""
+
+    built_at: float | None
+    """Time when the template was built."""
+
+    hits: int
+    """Number of environments created from the template."""
+
+
+def _normalize_packages(backend: str, packages: list[str] | None) -> frozenset[str]:
+    normalized = {"".join(package.split()).lower() for package in packages or []}
+    if backend == "venv":
+        normalized = {
+            package for package in normalized if not _PYTHON_SPEC_REGEX.match(package)
+        }
+    return frozenset(normalized)
+
+
+def template_key(template: TemplateSpec) -> str:
+    """Get the identifier of a template from its spec."""
+    spec = dict(
+        backend=template["backend"],
+        packages=sorted(_normalize_packages(template["backend"], template["packages"])),
+        channels=list(template.get("channels") or []),
+    )
+    return hashlib.sha1(json.dumps(spec).encode("utf-8")).hexdigest()[:16]
+
+
+class TemplatePool:
+    """
+    Pool of template environments used to speed up environment creation.
+
+    Parameters
+    ----------
+    root_path : str or Path
+        Backends root path.
+    templates : list[TemplateSpec]
+        Specs of the templates.
+    max_age : float, optional
+        Seconds after which templates are rebuilt. The default is
+        `TEMPLATES_MAX_AGE`.
+    max_size : int, optional
+        Max number of templates kept built. The default is `TEMPLATES_MAX_SIZE`.
+    refresh_interval : float, optional
+        Seconds between the checks for stale templates done after calling
+        `start_refresh`. The default is `TEMPLATES_REFRESH_INTERVAL`.
+    background : bool, optional
+        Build missing and stale templates in the background when they are
+        requested. Only for long-lived processes, since the builds must finish
+        before the process exits. The default is False.
+    """
+
+    def __init__(
+        self,
+        root_path: str | Path,
+        templates: list[TemplateSpec],
+        max_age: float = TEMPLATES_MAX_AGE,
+        max_size: int = TEMPLATES_MAX_SIZE,
+        refresh_interval: float = TEMPLATES_REFRESH_INTERVAL,
+        background: bool = False,
+    ):
+        self.root_path = Path(root_path)
+        self.background = background
+        self.max_age = max_age
+        self.max_size = max_size
+        self.refresh_interval = refresh_interval
+        self.templates = {
+            template_key(template): TemplateSpec(
+                name=template.get("name") or ", ".join(template["packages"]),
+                backend=template["backend"],
+                packages=list(template["packages"]),
+                channels=list(template.get("channels") or []),
+            )
+            for template in templates
+        }
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="envs-manager-templates"
+        )
+        self._building: dict[str, Future] = {}
+        self._refresh_thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._hits = {key: 0 for key in self.templates}
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "builds": 0,
+            "build_failures": 0,
+            "refreshes": 0,
+        }
+
+    def create_environment(
+        self,
+        backend: str,
+        backend_instance: BackendInstance,
+        packages: list[str] | None = None,
+        channels: list[str] | None = None,
+    ) -> BackendActionResult | None:
+        """
+        Create an environment from a template, if there is one for the spec.
+
+        Parameters
+        ----------
+        backend : str
+            Backend of the environment.
+        backend_instance : BackendInstance
+            Backend instance for the environment to create.
+        packages : list[str], optional
+            Packages requested for the environment. The default is None.
+        channels : list[str], optional
+            Channels requested for the environment. The default is None.
+
+        Returns
+        -------
+        BackendActionResult or None
+            Result of the action or None if no template could be used, in which
+            case the environment must be created from scratch.
+        """
+        requested = _normalize_packages(backend, packages)
+        key = template_path = info = None
+        for candidate in self._match(backend, requested, channels):
+            template_path, info = self._read_info(candidate)
+            if template_path is not None:
+                key = candidate
+                break
+
+            # Build it so it can be used next time
+            if self.background:
+                self._schedule_build(candidate)
+
+        if key is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        template = self.templates[key]
+        if self.background and info["built_at"] + self.max_age < time.time():
+            self._schedule_build(key, refresh=True)
+
+        template_lock = EnvironmentLock(self.root_path / "locks", template_path)
+        try:
+            # Builds are only removed while holding their lock exclusively, so
+            # holding it here prevents that during the clone.
+            with template_lock.hold(shared=True, timeout=0):
+                template_manager = Manager(
+                    backend, root_path=self.root_path, env_directory=template_path
+                )
+                result = template_manager.backend_instance.clone_environment(
+                    backend_instance.environment_path
+                )
+        except LockTimeoutError:
+            result = BackendActionResult(status=False, output="Template is busy")
+
+        if not result["status"]:
+            logger.debug(f"Unable to use template {template['name']}: {result}")
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        with self._lock:
+            self._counters["hits"] += 1
+            self._hits[key] += 1
+
+        logger.info(f"Created environment from template {template['name']}")
+        delta = [
+            package
+            for package in packages or []
+            if "".join(package.split()).lower()
+            in requested - _normalize_packages(backend, template["packages"])
+        ]
+        if not delta:
+            return BackendActionResult(status=True, output=None)
+
+        if channels:
+            result = backend_instance.install_packages(delta, channels=channels)
+        else:
+            result = backend_instance.install_packages(delta)
+
+        if not result["status"]:
+            backend_instance.delete_environment()
+        return result
+
+    def warm(self, wait: bool = False) -> list[Future]:
+        """
+        Build the templates that are missing or stale in the background.
+
+        Only the `max_size` most used templates are built, and the other ones
+        are removed.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Wait for the builds to finish. The default is False.
+
+        Returns
+        -------
+        futures : list[Future]
+            Futures of the scheduled builds.
+        """
+        with self._lock:
+            order = list(self.templates)
+            warm_keys = sorted(
+                order, key=lambda key: (-self._hits[key], order.index(key))
+            )
+            warm_keys = warm_keys[: self.max_size]
+
+        futures = []
+        for key in order:
+            if key not in warm_keys:
+                self._remove_template(key)
+                continue
+
+            path, info = self._read_info(key)
+            if path is None:
+                futures.append(self._schedule_build(key))
+            elif info["built_at"] + self.max_age < time.time():
+                futures.append(self._schedule_build(key, refresh=True))
+
+        if wait:
+            for future in futures:
+                future.result()
+        return futures
+
+    def start_refresh(self):
+        """
+        Check for missing or stale templates every `refresh_interval` seconds
+        in a background thread, and rebuild them.
+        """
+        if self.refresh_interval <= 0:
+            return
+
+        with self._lock:
+            if self._refresh_thread is not None or self._stopped.is_set():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh,
+                name="envs-manager-templates-refresh",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _refresh(self):
+        while not self._stopped.wait(self.refresh_interval):
+            try:
+                self.warm()
+            except Exception as error:
+                logger.error(f"Unable to refresh templates: {error}", exc_info=True)
+
+    def stats(self) -> dict:
+        """
+        Get the pool metrics.
+
+        Returns
+        -------
+        stats : dict
+            Counters of `hits` (environments created from a template), `misses`
+            (creations that didn't use a template), `builds`, `build_failures`
+            and `refreshes` (rebuilds of stale templates), and the state of each
+            template in `templates`.
+        """
+        templates = []
+        for key, template in self.templates.items():
+            path, info = self._read_info(key)
+            templates.append(
+                TemplateStats(
+                    name=template["name"],
+                    key=key,
+                    backend=template["backend"],
+                    ready=path is not None,
+                    stale=path is not None
+                    and info["built_at"] + self.max_age < time.time(),
+                    built_at=info["built_at"] if info else None,
+                    hits=self._hits[key],
+                )
+            )
+
+        with self._lock:
+            return dict(self._counters, templates=templates)
+
+    def shutdown(self, wait: bool = False):
+        self._stopped.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _match(
+        self, backend: str, requested: frozenset[str], channels: list[str] | None
+    ) -> list[str]:
+        """
+        Get the templates whose packages are included in the request, sorted
+        from most to least packages.
+        """
+        candidates = []
+        for key, template in self.templates.items():
+            template_packages = _normalize_packages(backend, template["packages"])
+            if (
+                template["backend"] == backend
+                and template["channels"] == list(channels or [])
+                and template_packages <= requested
+            ):
+                candidates.append((len(template_packages), key))
+
+        candidates.sort(key=lambda candidate: -candidate[0])
+        return [key for __, key in candidates]
+
+    def _template_directory(self, key: str) -> Path:
+        return self.root_path / self.templates[key]["backend"] / "templates" / key
+
+    def _read_info(self, key: str) -> tuple[Path | None, dict | None]:
+        """Get the path and info of the current build of a template."""
+        info_path = self._template_directory(key) / TEMPLATE_INFO_FILENAME
+        try:
+            with open(info_path) as info_file:
+                info = json.load(info_file)
+            path = self._template_directory(key) / info["build_id"]
+            if path.is_dir():
+                return path, info
+        except (OSError, ValueError, KeyError):
+            pass
+        return None, None
+
+    def _schedule_build(self, key: str, refresh: bool = False) -> Future:
+        with self._lock:
+            future = self._building.get(key)
+            if future is None or future.done():
+                future = self._executor.submit(self._build, key, refresh)
+                self._building[key] = future
+        return future
+
+    def _build(self, key: str, refresh: bool = False):
+        template = self.templates[key]
+        template_directory = self._template_directory(key)
+        build_id = uuid.uuid4().hex[:12]
+        build_path = template_directory / build_id
+
+        # Other processes using the same root path could be building it too
+        build_lock = EnvironmentLock(self.root_path / "locks", template_directory)
+        try:
+            with build_lock.hold(timeout=0):
+                logger.info(f"Building template {template['name']}")
+                manager = Manager(
+                    template["backend"],
+                    root_path=self.root_path,
+                    env_directory=build_path,
+                )
+                result = manager.backend_instance.create_environment(
+                    list(template["packages"]),
+                    channels=template["channels"] or None,
+                    force=True,
+                )
+
+                if not result["status"]:
+                    logger.error(
+                        f"Unable to build template {template['name']}: "
+                        f"{result['output']}"
+                    )
+                    if build_path.is_dir():
+                        manager.backend_instance.delete_environment()
+                    with self._lock:
+                        self._counters["build_failures"] += 1
+                    return
+
+                info = dict(build_id=build_id, built_at=time.time(), spec=template)
+                info_path = template_directory / TEMPLATE_INFO_FILENAME
+                temp_path = info_path.with_suffix(".tmp")
+                with open(temp_path, "w") as info_file:
+                    json.dump(info, info_file)
+                os.replace(temp_path, info_path)
+
+                with self._lock:
+                    self._counters["builds"] += 1
+                    if refresh:
+                        self._counters["refreshes"] += 1
+
+                self._remove_builds(key, keep=build_id)
+        except LockTimeoutError:
+            logger.debug(f"Template {template['name']} is being built elsewhere")
+
+    def _remove_builds(self, key: str, keep: str | None = None):
+        """Remove the builds of a template that are not in use."""
+        template_directory = self._template_directory(key)
+        if not template_directory.is_dir():
+            return
+
+        for build_path in template_directory.iterdir():
+            if not build_path.is_dir() or build_path.name == keep:
+                continue
+
+            lock = EnvironmentLock(self.root_path / "locks", build_path)
+            try:
+                with lock.hold(timeout=0):
+                    # Removed by the backend, which also unregisters it (e.g.
+                    # conda-like builds are registered by micromamba)
+                    manager = Manager(
+                        self.templates[key]["backend"],
+                        root_path=self.root_path,
+                        env_directory=build_path,
+                    )
+                    result = manager.backend_instance.delete_environment()
+                    if not result["status"]:
+                        logger.error(
+                            f"Unable to remove template build {build_path}: "
+                            f"{result['output']}"
+                        )
+            except LockTimeoutError:
+                # It's being cloned, so it'll be removed in a later build
+                pass
+
+    def _remove_template(self, key: str):
+        (self._template_directory(key) / TEMPLATE_INFO_FILENAME).unlink(missing_ok=True)
+        self._remove_builds(key)
+
+
+def load_templates(templates_file: str | Path) -> list[TemplateSpec]:
+    """Load a list of template specs from a JSON file."""
+    with open(templates_file) as file:
+        return json.load(file)
+
+
+def set_template_pool(root_path: str | Path, pool: TemplatePool | None):
+    """Set the template pool used by managers for `root_path`."""
+    with _pools_lock:
+        if pool is None:
+            _pools.pop(os.path.abspath(root_path), None)
+        else:
+            _pools[os.path.abspath(root_path)] = pool
+
+
+def get_template_pool(root_path: str | Path) -> TemplatePool | None:
+    """
+    Get the template pool used by managers for `root_path`.
+
+    If no pool was set with `set_template_pool`, one is created with the
+    templates in `TEMPLATES_FILE` (if set). It only uses the templates that are
+    already built, without building any in the background.
+    """
+    with _pools_lock:
+        pool = _pools.get(os.path.abspath(root_path))
+        if pool is None and TEMPLATES_FILE:
+            try:
+                pool = TemplatePool(root_path, load_templates(TEMPLATES_FILE))
+                _pools[os.path.abspath(root_path)] = pool
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                logger.error(f"Unable to load templates from {TEMPLATES_FILE}: {error}")
+        return pool
@@ -0,0 +1,31 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+from envs_manager.batch import run_batch
+
+
+def test_run_batch(tmp_path):
+    entries = [
+        {"env_name": "env_a", "action": "create_environment"},
+        {"env_name": "env_b", "action": "list_environments"},
+        {"env_name": "env_a", "action": "list"},
+        {"env_name": "env_a", "action": "unknown_action"},
+    ]
+
+    results = list(run_batch(entries, backend="venv", root_path=tmp_path))
+    results = {result["index"]: result for result in results}
+
+    assert len(results) == 4
+    assert results[0]["status"]
+    assert results[1]["status"]
+
+    # Entries for the same environment run in order, so the environment is
+    # available when listing its packages
+    assert results[2]["status"]
+    packages = [package["name"] for package in results[2]["output"]["packages"]]
+    assert "pip" in packages
+
+    assert not results[3]["status"]
+    assert results[3]["action"] == "unknown_action"
+    assert results[3]["manager_options"]["env_name"] == "env_a"
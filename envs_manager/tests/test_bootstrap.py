@@ -0,0 +1,276 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import os
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+from envs_manager.backends.bootstrap import (
+    BootstrapError,
+    bootstrap_executable,
+    download,
+    extract_members,
+    load_manifest,
+    pin_manifest,
+    set_artifacts_source,
+)
+
+
+def make_tarball(members):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:bz2") as tar:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = 0o755
+            tar.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+@pytest.fixture
+def server():
+    """
+    HTTP server with range requests support serving `server.files` and
+    redirecting the paths in `server.redirects`.
+    """
+    files = {}
+    redirects = {}
+    requests_log = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            content = files.get(self.path)
+            range_header = self.headers.get("Range")
+            requests_log.append((self.path, range_header))
+            if self.path in redirects:
+                self.send_response(302)
+                self.send_header("Location", redirects[self.path])
+                self.end_headers()
+                return
+            if content is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            if range_header:
+                start = int(range_header.split("=")[1].rstrip("-"))
+                if start >= len(content):
+                    self.send_response(416)
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                content = content[start:]
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.files = files
+    httpd.redirects = redirects
+    httpd.requests_log = requests_log
+    yield httpd
+    httpd.shutdown()
+
+
+def test_download_resume(tmp_path, server):
+    content = os.urandom(3 * 1024 * 1024)
+    server.files["/file"] = content
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    # Simulate a previous interrupted download
+    path = tmp_path / "file"
+    (tmp_path / "file.part").write_bytes(content[:1000])
+
+    download(f"{server.url}/file", path, sha256=sha256)
+
+    assert path.read_bytes() == content
+    assert not (tmp_path / "file.part").exists()
+    assert server.requests_log == [("/file", "bytes=1000-")]
+
+
+def test_download_hash_mismatch(tmp_path, server):
+    server.files["/file"] = b"content"
+
+    with pytest.raises(BootstrapError):
+        download(f"{server.url}/file", tmp_path / "file", sha256="0" * 64)
+
+    assert not (tmp_path / "file").exists()
+    assert not (tmp_path / "file.part").exists()
+
+
+def test_download_unpinned(tmp_path, server):
+    server.files["/file"] = b"content"
+
+    # Files without a pinned hash are installed unverified by default
+    download(f"{server.url}/file", tmp_path / "file")
+    assert (tmp_path / "file").read_bytes() == b"content"
+
+    # Or refused before downloading them if pinned hashes are required
+    with pytest.raises(BootstrapError):
+        download(f"{server.url}/file", tmp_path / "other", require_pinned=True)
+    assert len(server.requests_log) == 1
+    assert not (tmp_path / "other").exists()
+
+
+def test_pin_manifest(tmp_path, server):
+    tarball = make_tarball({"bin/micromamba": b"binary"})
+    server.files["/micromamba-1.5.10-0.tar.bz2"] = tarball
+    server.redirects["/micromamba/1.5.10"] = "/micromamba-1.5.10-0.tar.bz2"
+    server.files["/pixi.tar.gz"] = b"pixi"
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            {
+                "version": 1,
+                "tools": {
+                    "micromamba": {
+                        "linux-64": [
+                            {
+                                "url": f"{server.url}/micromamba/1.5.10",
+                                "sha256": None,
+                                "members": ["bin/micromamba"],
+                            }
+                        ]
+                    },
+                    "pixi": {
+                        "linux-64": [
+                            {
+                                "url": f"{server.url}/pixi.tar.gz",
+                                "sha256": None,
+                                "members": ["pixi"],
+                            }
+                        ]
+                    },
+                },
+            }
+        )
+    )
+
+    pin_manifest(manifest_path, tools=["micromamba"])
+
+    # Redirects are replaced with the URL of the pinned file
+    manifest = load_manifest(manifest_path)
+    artifact = manifest["tools"]["micromamba"]["linux-64"][0]
+    assert artifact["url"] == f"{server.url}/micromamba-1.5.10-0.tar.bz2"
+    assert artifact["sha256"] == hashlib.sha256(tarball).hexdigest()
+    assert manifest["tools"]["pixi"]["linux-64"][0]["sha256"] is None
+
+    paths = bootstrap_executable(
+        "micromamba", tmp_path / "bin", platform_name="linux-64", manifest=manifest
+    )
+    assert paths == [tmp_path / "bin" / "micromamba"]
+
+
+def test_extract_members(tmp_path):
+    archive = tmp_path / "archive.tar.bz2"
+    archive.write_bytes(
+        make_tarball({"bin/tool": b"tool", "info/index.json": b"{}", "a.dll": b""})
+    )
+
+    paths = extract_members(archive, ["bin/tool", "*.dll"], tmp_path / "bin")
+
+    assert sorted(path.name for path in paths) == ["a.dll", "tool"]
+    assert (tmp_path / "bin" / "tool").read_bytes() == b"tool"
+    assert not (tmp_path / "bin" / "index.json").exists()
+    if os.name != "nt":
+        assert os.access(tmp_path / "bin" / "tool", os.X_OK)
+
+    zip_archive = tmp_path / "archive.zip"
+    with zipfile.ZipFile(zip_archive, "w") as archive:
+        archive.writestr("tool.exe", b"exe")
+    extract_members(zip_archive, ["tool.exe"], tmp_path / "bin")
+    assert (tmp_path / "bin" / "tool.exe").read_bytes() == b"exe"
+
+    with pytest.raises(BootstrapError):
+        extract_members(zip_archive, ["missing"], tmp_path / "bin")
+
+
+def test_bootstrap_executable(tmp_path, server):
+    tarball = make_tarball({"bin/micromamba": b"binary", "info/files": b""})
+    server.files["/micromamba/1.5.10"] = tarball
+    manifest = {
+        "version": 1,
+        "tools": {
+            "micromamba": {
+                "linux-64": [
+                    {
+                        "url": f"{server.url}/micromamba/1.5.10",
+                        "sha256": hashlib.sha256(tarball).hexdigest(),
+                        "members": ["bin/micromamba"],
+                    }
+                ]
+            }
+        },
+    }
+
+    paths = bootstrap_executable(
+        "micromamba", tmp_path, platform_name="linux-64", manifest=manifest
+    )
+
+    assert paths == [tmp_path / "micromamba"]
+    assert sorted(os.listdir(tmp_path)) == ["micromamba"]
+
+    with pytest.raises(BootstrapError):
+        bootstrap_executable(
+            "micromamba", tmp_path, platform_name="win-64", manifest=manifest
+        )
+
+
+@pytest.mark.parametrize("as_url", [False, True])
+def test_bootstrap_executable_offline(tmp_path, as_url):
+    artifacts_directory = tmp_path / "artifacts"
+    artifacts_directory.mkdir()
+    tarball = make_tarball({"pixi": b"binary"})
+    (artifacts_directory / "pixi-x86_64-unknown-linux-musl.tar.gz").write_bytes(tarball)
+    manifest = {
+        "version": 1,
+        "tools": {
+            "pixi": {
+                "linux-64": [
+                    {
+                        # Unreachable URL, so only the local artifact can be used
+                        "url": "http://127.0.0.1:9/pixi.tar.gz",
+                        "sha256": hashlib.sha256(tarball).hexdigest(),
+                        "members": ["pixi"],
+                        "filename": "pixi-x86_64-unknown-linux-musl.tar.gz",
+                    }
+                ]
+            }
+        },
+    }
+
+    set_artifacts_source(
+        artifacts_directory.as_uri() if as_url else artifacts_directory
+    )
+    try:
+        bin_directory = tmp_path / "bin"
+        paths = bootstrap_executable(
+            "pixi", bin_directory, platform_name="linux-64", manifest=manifest
+        )
+        assert paths == [bin_directory / "pixi"]
+        assert (bin_directory / "pixi").read_bytes() == b"binary"
+
+        # Local artifacts are verified like downloaded ones
+        manifest["tools"]["pixi"]["linux-64"][0]["sha256"] = "0" * 64
+        with pytest.raises(BootstrapError):
+            bootstrap_executable(
+                "pixi", bin_directory, platform_name="linux-64", manifest=manifest
+            )
+    finally:
+        set_artifacts_source(None)
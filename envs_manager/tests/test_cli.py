@@ -12,6 +12,7 @@
     "",
     "create",
     "delete",
+    "clone",
     "activate",
     "deactivate",
     "export",
@@ -21,6 +22,10 @@
     "update",
     "list",
     "list-environments",
+    "batch",
+    "templates",
+    "cache-report",
+    "trash",
 ]
 
 BACKENDS = [
@@ -112,3 +117,13 @@ def test_cli(tmp_path, backend):
     )
     assert f"Using ENV_BACKEND: {backend_value}" in str(list_env_packages)
     assert package_list_env_result in str(list_env_packages)
+
+    # Check environment deletion, which purges the trash before exiting
+    subprocess.check_output(
+        " ".join(
+            ["envs-manager", f"-b={backend_value}", f"-e={list_env_result}", "delete"]
+        ),
+        shell=True,
+    )
+    assert not (backends_root_path / backend_value / "envs" / list_env_result).exists()
+    assert not list((backends_root_path / "trash").iterdir())
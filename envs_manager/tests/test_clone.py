@@ -0,0 +1,164 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from envs_manager.backends import conda_meta
+from envs_manager.backends.clone import clone_prefix, replace_prefix_binary
+from envs_manager.manager import Manager
+
+
+def test_replace_prefix_binary():
+    data = b"a/old/prefix/lib\0\0\0\0\0b/old/prefix\0\0\0\0"
+
+    shorter = replace_prefix_binary(data, b"/old/prefix", b"/new")
+    assert shorter == b"a/new/lib" + b"\0" * 12 + b"b/new" + b"\0" * 11
+
+    longer = replace_prefix_binary(data, b"/old/prefix", b"/old/prefix12")
+    assert longer == b"a/old/prefix12/lib\0\0\0b/old/prefix12\0\0"
+
+    with pytest.raises(ValueError):
+        replace_prefix_binary(data, b"/old/prefix", b"/old/prefix1234")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Uses Unix paths and symlinks")
+def test_clone_prefix(tmp_path):
+    source = tmp_path / "source"
+    target = tmp_path / "target"
+    prefix = str(source).encode()
+
+    (source / "conda-meta").mkdir(parents=True)
+    (source / "bin").mkdir()
+    (source / "etc").mkdir()
+    (source / "lib").mkdir()
+    (source / "conda-meta" / "history").write_bytes(b"# cmd: create -p " + prefix)
+    (source / "conda-meta" / "pkg-1.0-0.json").write_text(
+        json.dumps(
+            {
+                "name": "pkg",
+                "paths_data": {
+                    "paths": [
+                        {"_path": "etc/config", "prefix_placeholder": "/opt/ph"},
+                        {
+                            "_path": "lib/libpkg.so",
+                            "prefix_placeholder": "/opt/ph",
+                            "file_mode": "binary",
+                        },
+                        {"_path": "lib/data.txt"},
+                    ]
+                },
+            }
+        )
+    )
+    (source / "etc" / "config").write_bytes(b"prefix=" + prefix + b"/share\n")
+    (source / "lib" / "libpkg.so").write_bytes(
+        b"\x7fELF" + prefix + b"/lib\0" + b"\0" * 64
+    )
+    (source / "lib" / "data.txt").write_bytes(b"data")
+    (source / "lib" / "site.pth").write_bytes(b"extra\n")
+    (source / "bin" / "tool").write_bytes(b"#!" + prefix + b"/bin/python\n")
+    (source / "bin" / "tool").chmod(0o755)
+    (source / "bin" / "python").symlink_to(source / "bin" / "tool")
+    (source / "lib" / "link.txt").symlink_to("data.txt")
+
+    package_files = conda_meta.read_package_files(source)
+    assert package_files == {
+        "etc/config": "text",
+        "lib/libpkg.so": "binary",
+        "lib/data.txt": None,
+    }
+
+    counts = clone_prefix(
+        source,
+        target,
+        prefix_files={path: mode for path, mode in package_files.items() if mode},
+        scan_directories=("bin",),
+        linkable_files={"lib/data.txt"},
+    )
+
+    new_prefix = str(target).encode()
+    assert counts["rewritten"] == 4
+    assert (target / "conda-meta" / "history").read_bytes().endswith(new_prefix)
+    assert (target / "etc" / "config").read_bytes() == (
+        b"prefix=" + new_prefix + b"/share\n"
+    )
+    libpkg = (target / "lib" / "libpkg.so").read_bytes()
+    assert libpkg.startswith(b"\x7fELF" + new_prefix + b"/lib\0")
+    assert len(libpkg) == (source / "lib" / "libpkg.so").stat().st_size
+    assert (target / "bin" / "tool").read_bytes() == (
+        b"#!" + new_prefix + b"/bin/python\n"
+    )
+    assert os.access(target / "bin" / "tool", os.X_OK)
+    assert os.readlink(target / "bin" / "python") == str(target / "bin" / "tool")
+    assert os.readlink(target / "lib" / "link.txt") == "data.txt"
+    assert (target / "lib" / "data.txt").read_bytes() == b"data"
+
+    # The source environment is left untouched
+    assert (source / "etc" / "config").read_bytes() == (
+        b"prefix=" + prefix + b"/share\n"
+    )
+
+    # Files that are not package payload are never hardlinked, so modifying
+    # them in place in the clone doesn't change the source
+    assert not os.path.samefile(
+        source / "lib" / "site.pth", target / "lib" / "site.pth"
+    )
+    with open(target / "lib" / "site.pth", "ab") as pth_file:
+        pth_file.write(b"more\n")
+    assert (source / "lib" / "site.pth").read_bytes() == b"extra\n"
+
+
+def test_clone_venv(tmp_path):
+    manager = Manager("venv", root_path=str(tmp_path), env_name="source")
+    subprocess.run(
+        [sys.executable, "-m", "venv", "--without-pip", str(manager.env_directory)],
+        check=True,
+    )
+
+    result = manager.clone_environment(target_env_name="target")
+    assert result["status"], result["output"]
+
+    target = tmp_path / "venv" / "envs" / "target"
+    assert result["output"]["hardlink"] == 0
+    assert str(manager.env_directory) not in (target / "pyvenv.cfg").read_text()
+    if os.name != "nt":
+        assert str(target) in (target / "bin" / "activate").read_text()
+
+    clone_manager = Manager("venv", root_path=str(tmp_path), env_name="target")
+    prefix = subprocess.run(
+        [
+            clone_manager.backend_instance.python_executable_path,
+            "-c",
+            "import sys; print(sys.prefix)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    assert os.path.samefile(prefix, target)
+
+    # Existing environments are not replaced unless forced
+    assert not manager.clone_environment(target_env_name="target")["status"]
+    assert manager.clone_environment(target_env_name="target", force=True)["status"]
+
+
+def test_set_manifest_name(tmp_path):
+    pixi_interface = pytest.importorskip("envs_manager.backends.pixi_interface")
+
+    manifest_path = tmp_path / "pixi.toml"
+    manifest_path.write_text(
+        '[workspace]\nchannels = ["conda-forge"]\nname = "0123abcd"\n\n'
+        '[dependencies]\nname = "*"\n'
+    )
+
+    assert pixi_interface.set_manifest_name(manifest_path, "target")
+    assert manifest_path.read_text() == (
+        '[workspace]\nchannels = ["conda-forge"]\nname = "target"\n\n'
+        '[dependencies]\nname = "*"\n'
+    )
@@ -0,0 +1,156 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import json
+
+import pytest
+
+from envs_manager.backends import conda_meta
+
+
+HISTORY = """\
+==> 2024-01-01 00:00:00 <==
+# cmd: micromamba create -p /envs/test python==3.10 packaging -c conda-forge
++https://conda.anaconda.org/conda-forge/linux-64::python-3.10.0-h0_0
+# update specs: ["python==3.10", "conda-forge::packaging"]
+==> 2024-01-02 00:00:00 <==
+# cmd: conda remove -p /envs/test packaging
+# remove specs: ['packaging']
+==> 2024-01-03 00:00:00 <==
+# update specs: ['numpy[version=">=1.20"]']
+"""
+
+
+@pytest.fixture
+def conda_prefix(tmp_path):
+    prefix = tmp_path / "env"
+    pkgs_dir = tmp_path / "pkgs" / "python-3.10.0-h0_0"
+    (pkgs_dir / "info").mkdir(parents=True)
+    (pkgs_dir / "info" / "about.json").write_text(
+        json.dumps({"summary": "General purpose programming language"})
+    )
+
+    meta_dir = prefix / "conda-meta"
+    meta_dir.mkdir(parents=True)
+    (meta_dir / "history").write_text(HISTORY)
+    (meta_dir / "python-3.10.0-h0_0.json").write_text(
+        json.dumps(
+            {
+                "name": "python",
+                "version": "3.10.0",
+                "build": "h0_0",
+                "channel": "https://conda.anaconda.org/conda-forge/linux-64",
+                "extracted_package_dir": str(pkgs_dir),
+            }
+        )
+    )
+    (meta_dir / "numpy-1.26.0-py310_0.json").write_text(
+        json.dumps(
+            {
+                "name": "numpy",
+                "version": "1.26.0",
+                "build": "py310_0",
+                "channel": "conda-forge",
+            }
+        )
+    )
+    return prefix
+
+
+def test_read_records(conda_prefix):
+    records = conda_meta.read_records(conda_prefix)
+
+    assert [record["name"] for record in records] == ["numpy", "python"]
+    assert records[0]["about"] == {}
+    assert records[1]["about"]["summary"] == "General purpose programming language"
+    assert conda_meta.read_records(conda_prefix.parent / "missing") is None
+
+
+def test_read_requested_specs(conda_prefix):
+    assert conda_meta.read_requested_specs(conda_prefix) == {
+        "python": "python==3.10",
+        "numpy": 'numpy[version=">=1.20"]',
+    }
+
+
+@pytest.mark.parametrize(
+    "channel,expected",
+    [
+        ("conda-forge", "conda-forge"),
+        ("https://conda.anaconda.org/conda-forge/linux-64", "conda-forge"),
+        ("https://repo.example.com/channels/internal/noarch", "internal"),
+        (None, None),
+    ],
+)
+def test_channel_name(channel, expected):
+    assert conda_meta.channel_name(channel) == expected
+
+
+def test_explicit_lock(conda_prefix, tmp_path):
+    # Without URLs the packages can't be locked
+    with pytest.raises(ValueError):
+        conda_meta.explicit_lock(conda_prefix)
+
+    meta_dir = conda_prefix / "conda-meta"
+    for record_path, url, depends in [
+        (
+            "python-3.10.0-h0_0.json",
+            "https://conda.anaconda.org/conda-forge/linux-64/python-3.10.0-h0_0.conda",
+            [],
+        ),
+        (
+            "numpy-1.26.0-py310_0.json",
+            "https://conda.anaconda.org/conda-forge/linux-64/"
+            "numpy-1.26.0-py310_0.conda",
+            ["python >=3.10,<3.11.0a0"],
+        ),
+    ]:
+        record = json.loads((meta_dir / record_path).read_text())
+        record.update(url=url, md5="0" * 32, depends=depends)
+        (meta_dir / record_path).write_text(json.dumps(record))
+
+    # A distribution installed with pip, next to one from a conda package
+    site_packages = conda_prefix / "lib" / "python3.10" / "site-packages"
+    (site_packages / "numpy-1.26.0.dist-info").mkdir(parents=True)
+    (site_packages / "requests-2.31.0.dist-info").mkdir()
+    record_path = meta_dir / "numpy-1.26.0-py310_0.json"
+    record = json.loads(record_path.read_text())
+    record["files"] = ["lib/python3.10/site-packages/numpy-1.26.0.dist-info/RECORD"]
+    record_path.write_text(json.dumps(record))
+
+    # The platform comes from the packages, not from the running system
+    lock = conda_meta.explicit_lock(conda_prefix, "osx-arm64")
+    assert "# platform: linux-64" in lock.splitlines()
+    assert conda_meta.read_pip_distributions(conda_prefix) == ["requests==2.31.0"]
+    assert "# Not locked, installed with pip: requests==2.31.0" in lock.splitlines()
+
+    # Dependencies come first
+    urls = [line for line in lock.splitlines() if not line.startswith(("#", "@"))]
+    assert urls == [
+        "https://conda.anaconda.org/conda-forge/linux-64/python-3.10.0-h0_0.conda#"
+        + "0" * 32,
+        "https://conda.anaconda.org/conda-forge/linux-64/numpy-1.26.0-py310_0.conda#"
+        + "0" * 32,
+    ]
+
+    lock_path = tmp_path / "lock.txt"
+    lock_path.write_text(lock)
+    assert conda_meta.read_explicit_lock_platform(lock_path) == "linux-64"
+
+    env_file_path = tmp_path / "environment.yml"
+    env_file_path.write_text("name: test\ndependencies:\n  - python\n")
+    assert conda_meta.read_explicit_lock_platform(env_file_path) is None
+
+
+def test_unregister_environment(tmp_path):
+    environments_file = tmp_path / "environments.txt"
+    env = tmp_path / "envs" / "test"
+    other_env = tmp_path / "envs" / "other"
+    environments_file.write_text(f"{other_env}\n{env}\n")
+
+    assert conda_meta.unregister_environment(env, environments_file)
+    assert environments_file.read_text() == f"{other_env}\n"
+
+    assert not conda_meta.unregister_environment(env, environments_file)
+    assert not conda_meta.unregister_environment(env, tmp_path / "missing.txt")
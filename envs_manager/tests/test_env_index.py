@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import subprocess
+import sys
+
+from envs_manager.backends.env_index import (
+    EnvironmentIndex,
+    EnvironmentInfo,
+    directory_size,
+)
+from envs_manager.manager import Manager
+
+
+def test_environment_index(tmp_path):
+    env_paths = {}
+    for name in ["env1", "env2"]:
+        env_paths[name] = tmp_path / "envs" / name
+        env_paths[name].mkdir(parents=True)
+        (env_paths[name] / "marker").write_text("")
+
+    described = []
+
+    def describe(env_path):
+        described.append(env_path.name)
+        return EnvironmentInfo(
+            path=str(env_path),
+            python_version="3.10",
+            package_count=len(described),
+            disk_size=0,
+            last_modified=None,
+            healthy=True,
+        )
+
+    def get_markers(env_path):
+        return [env_path / "marker"]
+
+    index = EnvironmentIndex(tmp_path / "envs-index.json")
+    environments = {name: str(path) for name, path in env_paths.items()}
+
+    info = index.update(environments, get_markers, describe)
+    assert described == ["env1", "env2"]
+    assert info["env2"]["package_count"] == 2
+
+    # Entries are reused while markers don't change
+    info = EnvironmentIndex(tmp_path / "envs-index.json").update(
+        environments, get_markers, describe
+    )
+    assert described == ["env1", "env2"]
+    assert info["env1"]["path"] == str(env_paths["env1"])
+
+    # Only the modified environment is described again
+    marker = env_paths["env2"] / "marker"
+    stat = marker.stat()
+    os.utime(marker, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    info = index.update(environments, get_markers, describe)
+    assert described == ["env1", "env2", "env2"]
+    assert info["env2"]["package_count"] == 3
+
+    # Removed environments are dropped from the index
+    del environments["env1"]
+    assert list(index.update(environments, get_markers, describe)) == ["env2"]
+    assert list(index._load()) == [str(env_paths["env2"])]
+
+
+def test_directory_size(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "file").write_bytes(b"x" * 10)
+    (tmp_path / "sub" / "file").write_bytes(b"x" * 5)
+    os.link(tmp_path / "file", tmp_path / "sub" / "link")
+
+    assert directory_size(tmp_path) == 15
+
+
+def test_venv_list_environments_details(tmp_path):
+    manager = Manager("venv", root_path=str(tmp_path))
+    env_path = tmp_path / "venv" / "envs" / "test_env"
+    subprocess.run([sys.executable, "-m", "venv", "--without-pip", str(env_path)])
+
+    result = manager.list_environments(details=True)
+    assert result["status"]
+
+    info = result["output"]["test_env"]
+    assert info["path"] == str(env_path)
+    assert info["python_version"].startswith("{}.{}".format(*sys.version_info[:2]))
+    assert info["healthy"]
+    assert info["disk_size"] > 0
+    assert info["last_modified"] is not None
+
+    assert manager.list_environments()["output"] == {"test_env": str(env_path)}
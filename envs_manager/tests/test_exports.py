@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import io
+import os
+import zipfile
+
+import pytest
+
+from envs_manager.backends.exports import (
+    get_export_path,
+    new_export_path,
+    remove_expired_exports,
+)
+from envs_manager.backends.pixi_interface import PixiInterface, read_import_archive
+
+
+def test_exports_directory(tmp_path):
+    path = new_export_path(tmp_path, ".zip")
+    path.write_bytes(b"zip")
+
+    assert get_export_path(tmp_path, path.name) == path
+    assert get_export_path(tmp_path, "0" * 32 + ".zip") is None
+    assert get_export_path(tmp_path, "../" + path.name) is None
+
+    os.utime(path, (0, 0))
+    remove_expired_exports(tmp_path)
+    assert not path.exists()
+
+
+def test_pixi_export_environment(tmp_path):
+    # The export only needs the project files, not the Pixi executable
+    backend_instance = object.__new__(PixiInterface)
+    backend_instance.environment_path = str(tmp_path / "pixi" / "envs" / "test_env")
+    backend_instance.bin_directory = str(tmp_path / "pixi" / "bin")
+    env_path = tmp_path / "pixi" / "envs" / "test_env"
+    env_path.mkdir(parents=True)
+    (env_path / "pixi.toml").write_text("[workspace]\n")
+    (env_path / "pixi.lock").write_text("version: 6\n" * 10000)
+
+    export_file_path = tmp_path / "export.zip"
+    result = backend_instance.export_environment(str(export_file_path))
+    assert result["status"], result["output"]
+    assert result["output"] == {
+        "path": str(export_file_path),
+        "size": export_file_path.stat().st_size,
+        "export_id": None,
+    }
+    with zipfile.ZipFile(export_file_path) as zf:
+        assert sorted(zf.namelist()) == ["pixi.lock", "pixi.toml"]
+
+    # Without a path, the archive is saved to be downloaded with its ID
+    result = backend_instance.export_environment()
+    assert result["status"], result["output"]
+    export_id = result["output"]["export_id"]
+    assert get_export_path(tmp_path / "exports", export_id) == (
+        tmp_path / "exports" / export_id
+    )
+    assert os.listdir(tmp_path / "exports") == [export_id]
+
+
+def test_read_import_archive():
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("pixi.toml", "[workspace]\n")
+        zf.writestr("pixi.lock", "version: 6\n")
+        zf.writestr("../outside.txt", "ignored")
+
+    contents = read_import_archive(data.getvalue())
+    assert contents == {"pixi.toml": b"[workspace]\n", "pixi.lock": b"version: 6\n"}
+
+    # Archives that decompress to more than the limit are rejected
+    with pytest.raises(ValueError):
+        read_import_archive(data.getvalue(), max_size=15)
+
+    bomb = io.BytesIO()
+    with zipfile.ZipFile(bomb, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("pixi.toml", b"\0" * 10 * 1024 * 1024)
+    assert len(bomb.getvalue()) < 100 * 1024
+    with pytest.raises(ValueError):
+        read_import_archive(bomb.getvalue(), max_size=1024 * 1024)
+
+    with pytest.raises(ValueError):
+        read_import_archive(b"not a zip file")
+
+
+def test_pixi_import_environment_invalid(tmp_path):
+    backend_instance = object.__new__(PixiInterface)
+    backend_instance.environment_path = str(tmp_path / "test_env")
+
+    result = backend_instance.import_environment(b"not a zip file")
+
+    assert not result["status"]
+    assert not (tmp_path / "test_env").exists()
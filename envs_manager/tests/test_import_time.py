@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import subprocess
+import sys
+
+import pytest
+
+
+# Dependencies that take a while to import and are only needed by some backends
+# or actions
+HEAVY_MODULES = ["rattler", "requests", "urllib3", "packaging"]
+
+# Max ratio between the import time of envs-manager and the one of `json`,
+# measured in the same process so it doesn't depend on the machine speed. It's
+# usually below 20, while importing `requests` eagerly alone takes 30 to 45
+# times longer than `json`.
+MAX_IMPORT_TIME_RATIO = 40
+
+# Runs of each import, to take the best one and avoid failing due to noise
+IMPORT_TIME_RUNS = 3
+
+
+def get_import_times(code, *args):
+    """
+    Run `code` with `python -X importtime` and return the cumulative import time
+    (in microseconds) of each imported module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        __, cumulative, module = line.split("|")
+        import_times[module.strip()] = int(cumulative)
+    return import_times
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import envs_manager.cli",
+        (
+            "import sys; from envs_manager.manager import Manager; "
+            "Manager('venv', root_path=sys.argv[1]).list_environments()"
+        ),
+    ],
+)
+def test_import_time(code, tmp_path, record_property):
+    ratios = []
+    for __ in range(IMPORT_TIME_RUNS):
+        # `json` is imported first as a baseline
+        import_times = get_import_times(f"import json; {code}", str(tmp_path))
+
+        for module in HEAVY_MODULES:
+            assert module not in import_times, f"{module} imported by: {code}"
+
+        total = max(
+            cumulative
+            for module, cumulative in import_times.items()
+            if module.startswith("envs_manager")
+        )
+        ratios.append((total / import_times["json"], total))
+
+    # Reported in the test results (e.g. with --junitxml) to follow its trend
+    ratio, total = min(ratios)
+    record_property("envs_manager_import_time_ms", round(total / 1000, 1))
+    record_property("envs_manager_import_time_ratio", round(ratio, 1))
+    assert ratio < MAX_IMPORT_TIME_RATIO, (
+        f"Importing envs-manager takes {ratio:.1f} times longer than json "
+        f"({total / 1000:.1f} ms) with: {code}"
+    )
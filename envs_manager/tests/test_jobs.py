@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import threading
+
+from envs_manager.jobs import JobQueue, JobStatus
+from envs_manager.tests.utils import wait_until
+
+
+def job_finished(jobs, job_id):
+    return jobs.get(job_id)["status"] in (
+        JobStatus.Finished.value,
+        JobStatus.Failed.value,
+    )
+
+
+def test_job_queue():
+    jobs = JobQueue(max_workers=2)
+    release = threading.Event()
+
+    blocked_job = jobs.submit("blocked", release.wait)
+    job_id = jobs.submit("add", lambda a, b: a + b, 1, 2)
+    failed_job = jobs.submit("fail", lambda: 1 / 0)
+
+    # Jobs don't wait for others to finish when there are free workers
+    wait_until(job_finished, jobs=jobs, job_id=job_id)
+    assert jobs.get(job_id)["result"] == 3
+    assert jobs.get(blocked_job)["status"] == JobStatus.Running.value
+
+    release.set()
+    wait_until(job_finished, jobs=jobs, job_id=blocked_job)
+    wait_until(job_finished, jobs=jobs, job_id=failed_job)
+    assert jobs.get(failed_job)["status"] == JobStatus.Failed.value
+    assert "division by zero" in jobs.get(failed_job)["error"]
+    assert jobs.get("unknown") is None
+
+    jobs.shutdown()
+
+
+def test_job_queue_retention():
+    jobs = JobQueue(max_workers=1, retention=0)
+
+    job_id = jobs.submit("noop", lambda: None)
+    wait_until(job_finished, jobs=jobs, job_id=job_id)
+    jobs.submit("noop", lambda: None)
+
+    assert jobs.get(job_id) is None
+    jobs.shutdown()
+
+
+def test_job_queue_run_not_blocked_by_jobs():
+    jobs = JobQueue(max_workers=1, max_jobs=1)
+    release = threading.Event()
+
+    blocked_job = jobs.submit("blocked", release.wait)
+
+    # Awaited functions don't wait for background jobs to free a worker
+    assert jobs.run(lambda: 42).result(timeout=5) == 42
+    assert jobs.get(blocked_job)["status"] == JobStatus.Running.value
+
+    release.set()
+    jobs.shutdown()
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from envs_manager.locks import EnvironmentLock, LockTimeoutError
+from envs_manager.manager import Manager
+
+
+def test_exclusive_lock(tmp_path):
+    lock = EnvironmentLock(tmp_path / "locks", tmp_path / "env")
+    other_lock = EnvironmentLock(tmp_path / "locks", tmp_path / "env")
+
+    with lock.hold():
+        with pytest.raises(LockTimeoutError):
+            with other_lock.hold(shared=True, timeout=0.2):
+                pass
+
+    with other_lock.hold(timeout=0.2):
+        pass
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Shared locks are exclusive on Windows")
+def test_shared_lock(tmp_path):
+    lock = EnvironmentLock(tmp_path / "locks", tmp_path / "env")
+    other_lock = EnvironmentLock(tmp_path / "locks", tmp_path / "env")
+
+    with lock.hold(shared=True):
+        with other_lock.hold(shared=True, timeout=0.2):
+            pass
+        with pytest.raises(LockTimeoutError):
+            with other_lock.hold(timeout=0.2):
+                pass
+
+
+def test_different_environments(tmp_path):
+    lock = EnvironmentLock(tmp_path / "locks", tmp_path / "env1")
+    other_lock = EnvironmentLock(tmp_path / "locks", tmp_path / "env2")
+
+    with lock.hold():
+        with other_lock.hold(timeout=0.2):
+            pass
+
+
+def test_stale_lock(tmp_path):
+    """Locks of processes that died without releasing them can be acquired."""
+    lock = EnvironmentLock(tmp_path / "locks", tmp_path / "env")
+    script = textwrap.dedent(
+        f"""
+        import os
+        from envs_manager.locks import EnvironmentLock
+
+        lock = EnvironmentLock({str(tmp_path / "locks")!r}, {str(tmp_path / "env")!r})
+        with lock.hold():
+            print("locked", flush=True)
+            os._exit(1)
+        """
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True
+    )
+    assert process.stdout.strip() == "locked"
+    assert lock.path.exists()
+
+    with lock.hold(timeout=0.2):
+        pass
+
+
+def test_manager_lock_timeout(tmp_path):
+    manager = Manager(
+        "venv", root_path=str(tmp_path), env_name="test_manager_lock_timeout"
+    )
+    manager.lock_timeout = 0.2
+
+    with manager.environment_lock.hold():
+        result = manager.install(packages=["packaging"])
+
+    assert not result["status"]
+    assert "Timed out" in result["output"]
@@ -4,7 +4,6 @@
 
 import os
 from pathlib import Path
-import time
 import subprocess
 import sys
 import zipfile
@@ -14,7 +13,8 @@
 from rattler import LockFile, Platform
 
 from envs_manager.backends.conda_like_interface import CondaLikeInterface
-from envs_manager.manager import Manager
+from envs_manager.manager import Manager, ManagerPool
+from envs_manager.tests.utils import wait_until
 
 
 TESTS_DIR = Path(__file__).parent.absolute()
@@ -197,13 +197,6 @@
 ]
 
 
-def wait_until(condition, interval=0.1, timeout=1, **kwargs):
-    start = time.time()
-    while not condition(**kwargs) and time.time() - start < timeout:
-        time.sleep(interval)
-    assert condition(**kwargs)
-
-
 def package_installed(manager_instance, installed_packages):
     list_result = manager_instance.list()
     package_list = list_result["output"]
@@ -519,3 +512,44 @@ def test_manager_backends_import_export(
                     generated_export.add(generated_line.strip())
 
     assert generated_export == expected_export
+
+
+def test_manager_pool(tmp_path):
+    pool = ManagerPool(max_size=2, idle_timeout=600)
+
+    manager = pool.get("venv", root_path=tmp_path, env_name="test_env")
+    assert pool.get("venv", root_path=tmp_path, env_name="test_env") is manager
+    assert pool.get("venv", root_path=tmp_path, env_name="other_env") is not manager
+
+    # Least recently used managers are discarded when the pool is full
+    pool.get("venv", root_path=tmp_path)
+    assert len(pool) == 2
+    assert pool.get("venv", root_path=tmp_path, env_name="test_env") is not manager
+
+    # Idle managers are discarded
+    pool.idle_timeout = -1
+    manager = pool.get("venv", root_path=tmp_path)
+    assert pool.get("venv", root_path=tmp_path) is not manager
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Uses a shell script as fake Pixi")
+def test_list_all_environments(tmp_path):
+    # Fake Pixi executable, so the backend is considered installed
+    pixi_bin_directory = tmp_path / "pixi" / "bin"
+    pixi_bin_directory.mkdir(parents=True)
+    pixi_executable = pixi_bin_directory / "pixi"
+    pixi_executable.write_text("#!/bin/sh\necho pixi 0.50.0\n")
+    pixi_executable.chmod(0o755)
+    (tmp_path / "pixi" / "envs" / "pixi_env").mkdir(parents=True)
+    (tmp_path / "venv" / "envs" / "venv_env").mkdir(parents=True)
+
+    result = Manager.list_all_environments(root_path=tmp_path)
+
+    assert result["status"]
+    assert result["output"] == {
+        "venv": {"venv_env": str(tmp_path / "venv" / "envs" / "venv_env")},
+        "pixi": {"pixi_env": str(tmp_path / "pixi" / "envs" / "pixi_env")},
+    }
+
+    # Backends that are not installed are skipped without installing them
+    assert not (tmp_path / "conda-like").exists()
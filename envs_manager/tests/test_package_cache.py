@@ -0,0 +1,199 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from envs_manager.backends.package_cache import (
+    CacheUsage,
+    CacheUsageLog,
+    ZIP_MAGIC,
+    cache_report,
+    list_cache_entries,
+    list_cache_files,
+)
+from envs_manager.backends.pixi_interface import (
+    DEFAULT_CACHE_DIR_INFO_FILENAME,
+    PixiInterface,
+)
+from envs_manager.manager import Manager
+
+
+def test_list_cache_entries(tmp_path):
+    (tmp_path / "python-3.10.0-h0_0" / "info").mkdir(parents=True)
+    (tmp_path / "python-3.10.0-h0_0" / "info" / "index.json").write_text("{}")
+    (tmp_path / "python-3.10.0-h0_0.conda").write_bytes(b"")
+    (tmp_path / "zlib-1.2-0.tar.bz2").write_bytes(b"")
+    (tmp_path / "numpy-1.26.0-py310_0" / "info").mkdir(parents=True)
+    (tmp_path / "numpy-1.26.0-py310_0" / "info" / "index.json").write_text("{}")
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "urls.txt").write_text("")
+
+    entries = list_cache_entries(tmp_path)
+
+    # The repodata `cache` directory is not a package
+    assert entries == {
+        "python-3.10.0-h0_0": tmp_path / "python-3.10.0-h0_0.conda",
+        "zlib-1.2-0": tmp_path / "zlib-1.2-0.tar.bz2",
+        "numpy-1.26.0-py310_0": tmp_path / "numpy-1.26.0-py310_0",
+    }
+
+
+def test_list_cache_files_since(tmp_path):
+    old_file = tmp_path / "a" / "b" / "old.body"
+    new_file = tmp_path / "a" / "b" / "new.body"
+    old_file.parent.mkdir(parents=True)
+    old_file.write_bytes(b"")
+    new_file.write_bytes(b"")
+    (tmp_path / "a" / "other").write_bytes(b"")
+    start = time.time()
+    os.utime(old_file, (start - 60, start - 60))
+
+    assert list_cache_files(tmp_path, ".body") == {
+        os.path.join("a", "b", "old.body"): old_file,
+        os.path.join("a", "b", "new.body"): new_file,
+    }
+    assert list_cache_files(tmp_path, ".body", since=start - 1) == {
+        os.path.join("a", "b", "new.body"): new_file,
+    }
+
+    # Only wheels, not index pages
+    new_file.write_bytes(ZIP_MAGIC + b"wheel")
+    assert list_cache_files(tmp_path, ".body", magic=ZIP_MAGIC) == {
+        os.path.join("a", "b", "new.body"): new_file,
+    }
+
+
+def test_cache_usage_log(tmp_path):
+    log = CacheUsageLog(tmp_path / "usage.jsonl", max_size=2)
+    for index in range(5):
+        log.append(
+            CacheUsage(
+                backend="venv",
+                action="install",
+                installed=index,
+                downloaded=0,
+                downloaded_bytes=0,
+                time=0,
+            )
+        )
+
+    assert [entry["installed"] for entry in log.read()] == [3, 4]
+    assert [entry["installed"] for entry in log.read(last=1)] == [4]
+
+
+def test_cache_report(tmp_path):
+    log = CacheUsageLog(tmp_path / "cache-usage.jsonl")
+    for backend, installed, downloaded in [
+        ("venv", 4, 4),
+        ("venv", 4, 0),
+        ("pixi", 2, 1),
+    ]:
+        log.append(
+            CacheUsage(
+                backend=backend,
+                action="create_environment",
+                installed=installed,
+                downloaded=downloaded,
+                downloaded_bytes=downloaded * 10,
+                time=0,
+            )
+        )
+    (tmp_path / "pip").mkdir()
+    (tmp_path / "pip" / "wheel").write_bytes(b"0" * 10)
+
+    report = cache_report(
+        tmp_path, {"venv": tmp_path / "pip", "pixi": tmp_path / "pixi"}
+    )
+
+    assert report["operations"] == 3
+    assert report["hits"] == 5
+    assert report["misses"] == 5
+    assert report["hit_rate"] == 0.5
+    assert report["downloaded_bytes"] == 50
+    assert report["backends"]["venv"]["hit_rate"] == 0.5
+    assert report["backends"]["venv"]["size"] >= 10
+    assert report["backends"]["pixi"]["hits"] == 1
+    assert report["backends"]["pixi"]["size"] == 0
+
+    # Only the last operations are used for the hit rate
+    report = cache_report(tmp_path, {}, last=1)
+    assert report["operations"] == 1
+    assert report["hit_rate"] == 0.5
+
+
+def test_track_cache_usage(tmp_path):
+    manager = Manager("venv", root_path=str(tmp_path), env_name="test_env")
+    subprocess.run(
+        [sys.executable, "-m", "venv", "--without-pip", str(manager.env_directory)],
+        check=True,
+    )
+
+    # Entries saved in the cache before the operation are not counted
+    http_cache = tmp_path / "cache" / "pip" / "http-v2" / "a" / "b"
+    http_cache.mkdir(parents=True)
+    (http_cache / "old.body").write_bytes(ZIP_MAGIC + b"old")
+    os.utime(http_cache / "old.body", (time.time() - 60, time.time() - 60))
+
+    # Fake an install that downloads an index page and a wheel, and adds two
+    # distributions to the environment
+    def install(packages, channels=None, force=False, capture_output=False):
+        (http_cache / "index.body").write_bytes(b"<html></html>")
+        (http_cache / "new.body").write_bytes(ZIP_MAGIC + b"new")
+        site_packages = next(manager.env_directory.glob("**/site-packages"))
+        (site_packages / "fake-1.0.dist-info").mkdir()
+        (site_packages / "fake-1.0.dist-info" / "METADATA").write_text(
+            "Name: fake\nVersion: 1.0\n"
+        )
+        (site_packages / "other-1.0.dist-info").mkdir()
+        (site_packages / "other-1.0.dist-info" / "METADATA").write_text(
+            "Name: other\nVersion: 1.0\n"
+        )
+        return dict(status=True, output="")
+
+    manager.backend_instance.install_packages = install
+    assert manager.install(packages=["fake"])["status"]
+
+    report = manager.cache_report()["output"]
+    assert report["operations"] == 1
+    assert report["backends"]["venv"]["operations"] == 1
+    assert report["backends"]["venv"]["hits"] == 1
+    assert report["backends"]["venv"]["misses"] == 1
+    assert report["backends"]["venv"]["downloaded_bytes"] == len(ZIP_MAGIC) + 3
+    assert report["backends"]["venv"]["directory"] == str(tmp_path / "cache" / "pip")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Uses a shell script as Pixi")
+def test_pixi_package_info_default_cache(tmp_path):
+    # Package of an environment created before the shared cache was used
+    default_cache = tmp_path / "default-cache"
+    package_dir = default_cache / "pkgs" / "python-3.10.0-h0_0"
+    (package_dir / "info").mkdir(parents=True)
+    (package_dir / "info" / "about.json").write_text(
+        json.dumps({"summary": "General purpose programming language"})
+    )
+
+    bin_directory = tmp_path / "pixi" / "bin"
+    bin_directory.mkdir(parents=True)
+    pixi = bin_directory / "pixi"
+    pixi.write_text(
+        f"#!{sys.executable}\n"
+        f"import json\n"
+        f"print(json.dumps({{'cache_dir': {str(default_cache)!r}}}))\n"
+    )
+    pixi.chmod(0o755)
+
+    backend_instance = object.__new__(PixiInterface)
+    backend_instance.bin_directory = str(bin_directory)
+    backend_instance.external_executable = str(pixi)
+
+    about = backend_instance._get_package_info("python-3.10.0-h0_0")
+    assert about.summary == "General purpose programming language"
+    assert (bin_directory / DEFAULT_CACHE_DIR_INFO_FILENAME).is_file()
+    assert backend_instance._get_package_info("missing-1.0-0") is None
@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+from envs_manager.backends import api, package_info_cache
+from envs_manager.backends.package_info_cache import PackageInfoCache
+
+
+class FakeResponse:
+    def __init__(self, json_data, status_code=200, headers=None):
+        self._json_data = json_data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self._json_data
+
+
+@pytest.fixture
+def fake_requests(monkeypatch):
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        calls.append((url, headers or {}))
+        if headers and headers.get("If-None-Match") == "etag-pip":
+            return FakeResponse(None, status_code=304)
+        if "pypi.org" in url and "/pip/" in url:
+            return FakeResponse(
+                {"info": {"summary": "pip summary"}, "releases": {"1.0": []}},
+                headers={"ETag": "etag-pip"},
+            )
+        if "pypi.org" in url:
+            return FakeResponse({"message": "Not Found"}, status_code=404)
+        return FakeResponse({"summary": "conda summary"})
+
+    monkeypatch.setattr(api.get_session(), "get", fake_get)
+    return calls
+
+
+def test_package_info_cache_hits(tmp_path, fake_requests):
+    cache = PackageInfoCache(tmp_path / "cache.sqlite3")
+
+    for _ in range(2):
+        assert api.get_package_info("pip", cache=cache) == {
+            "info": {"summary": "pip summary"}
+        }
+        assert api.get_package_info("libzlib", channel="conda-forge", cache=cache) == {
+            "info": {"summary": "conda summary"}
+        }
+        assert api.get_package_info("libzlib", cache=cache) is None
+
+    # Second round of queries is served from the cache, including the negative
+    # result for `libzlib` on PyPI
+    assert len(fake_requests) == 3
+    assert cache.stats() == dict(
+        hits=5, misses=3, revalidations=0, network_requests=3, entries=3
+    )
+
+    # Cache is persisted on disk
+    cache = PackageInfoCache(tmp_path / "cache.sqlite3")
+    assert api.get_package_info("pip", cache=cache)
+    assert cache.stats()["network_requests"] == 0
+
+
+def test_package_info_cache_revalidation(tmp_path, fake_requests):
+    cache = PackageInfoCache(tmp_path / "cache.sqlite3", ttl=0)
+
+    api.get_package_info("pip", cache=cache)
+    info = api.get_package_info("pip", cache=cache)
+
+    assert info == {"info": {"summary": "pip summary"}}
+    assert fake_requests[-1][1] == {"If-None-Match": "etag-pip"}
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_package_info_cache_eviction(tmp_path, monkeypatch):
+    cache = PackageInfoCache(tmp_path / "cache.sqlite3", max_entries=2)
+
+    # The eviction order must not depend on the clock resolution
+    monkeypatch.setattr(package_info_cache.time, "time", lambda: 1000.0)
+
+    cache.put("a", "", {"info": {}})
+    cache.put("b", "", {"info": {}})
+    cache.get("a")
+    cache.put("c", "", {"info": {}})
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_get_packages_info(tmp_path, fake_requests):
+    cache = PackageInfoCache(tmp_path / "cache.sqlite3")
+
+    packages_info = api.get_packages_info(
+        [("pip", None), ("libzlib", "conda-forge"), ("libzlib", None)],
+        cache=cache,
+        max_workers=3,
+    )
+
+    assert packages_info == [
+        {"info": {"summary": "pip summary"}},
+        {"info": {"summary": "conda summary"}},
+        None,
+    ]
@@ -0,0 +1,126 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import zipfile
+
+import pytest
+
+from envs_manager.backends import pip_lock
+
+
+def make_distribution(site_packages, name, version, direct_url=False):
+    dist_info = site_packages / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(f"Name: {name}\nVersion: {version}\n")
+    if direct_url:
+        (dist_info / "direct_url.json").write_text('{"url": "file:///src"}')
+
+
+@pytest.fixture
+def prefix(tmp_path):
+    prefix = tmp_path / "env"
+    site_packages = prefix / "lib" / "python3.11" / "site-packages"
+    make_distribution(site_packages, "Cached-Package", "1.0")
+    make_distribution(site_packages, "remote", "2.0.0")
+    make_distribution(site_packages, "local", "0.1", direct_url=True)
+    return prefix
+
+
+def test_write_lock(prefix, tmp_path, monkeypatch):
+    # Wheel saved in the pip HTTP cache
+    body = tmp_path / "cache" / "http-v2" / "a" / "b" / "0123.body"
+    body.parent.mkdir(parents=True)
+    with zipfile.ZipFile(body, "w") as wheel:
+        wheel.writestr("cached_package/__init__.py", "")
+        wheel.writestr("cached_package-1.0.dist-info/METADATA", "")
+    cached_hash = hashlib.sha256(body.read_bytes()).hexdigest()
+
+    requested = []
+    offline = False
+
+    def get_release_hashes(name, version):
+        requested.append((name, version))
+        if offline:
+            raise OSError("Index unreachable")
+        return {"b" * 64, "a" * 64}
+
+    monkeypatch.setattr(pip_lock, "get_release_hashes", get_release_hashes)
+
+    lock = pip_lock.write_lock(prefix, cache_path=tmp_path / "cache")
+
+    # Index hashes are used for every distribution, and cached ones are added
+    first_hash, second_hash, last_hash = sorted([cached_hash, "a" * 64, "b" * 64])
+    assert sorted(requested) == [("Cached-Package", "1.0"), ("remote", "2.0.0")]
+    assert lock.splitlines()[2:] == [
+        "# Not locked, not installed from an index: local==0.1",
+        "Cached-Package==1.0 \\",
+        f"    --hash=sha256:{first_hash} \\",
+        f"    --hash=sha256:{second_hash} \\",
+        f"    --hash=sha256:{last_hash}",
+        "remote==2.0.0 \\",
+        f"    --hash=sha256:{'a' * 64} \\",
+        f"    --hash=sha256:{'b' * 64}",
+    ]
+
+    # Without the index, only the cache can be used
+    offline = True
+    with pytest.raises(ValueError, match="remote==2.0.0"):
+        pip_lock.write_lock(prefix, cache_path=tmp_path / "cache")
+    (prefix / "lib" / "python3.11" / "site-packages" / "remote-2.0.0.dist-info").rename(
+        tmp_path / "remote.dist-info"
+    )
+    lock = pip_lock.write_lock(prefix, cache_path=tmp_path / "cache")
+    assert lock.splitlines()[2:] == [
+        "# Not locked, not installed from an index: local==0.1",
+        "# Only hashes of this platform, the index couldn't be reached: "
+        "Cached-Package==1.0",
+        "Cached-Package==1.0 \\",
+        f"    --hash=sha256:{cached_hash}",
+    ]
+
+    lock_path = tmp_path / "lock.txt"
+    lock_path.write_text(lock)
+    assert pip_lock.is_lock(lock_path)
+
+    requirements_path = tmp_path / "requirements.txt"
+    requirements_path.write_text("numpy==2.0.0\n# --hash in a comment\n")
+    assert not pip_lock.is_lock(requirements_path)
+
+
+def test_write_lock_missing_hashes(prefix, monkeypatch):
+    monkeypatch.setattr(pip_lock, "get_release_hashes", lambda name, version: set())
+
+    with pytest.raises(ValueError, match="remote==2.0.0"):
+        pip_lock.write_lock(prefix)
+
+
+def test_get_release_hashes(monkeypatch):
+    page = f"""<html><body>
+    <a href="../../packages/remote-2.0.0-py3-none-any.whl#sha256={'a' * 64}">w</a>
+    <a href="https://files.example/remote-2.0.tar.gz#sha256={'b' * 64}">s</a>
+    <a href="../../packages/remote-2.0.1-py3-none-any.whl#sha256={'c' * 64}">w</a>
+    <a href="../../packages/remote-2.0.0-py2-none-any.whl#md5=0123">w</a>
+    </body></html>"""
+    requested = []
+
+    class Response:
+        text = page
+
+        def raise_for_status(self):
+            pass
+
+    class Session:
+        def get(self, url, timeout):
+            requested.append(url)
+            return Response()
+
+    monkeypatch.setattr(pip_lock, "get_session", lambda: Session())
+
+    hashes = pip_lock.get_release_hashes(
+        "Remote", "2.0.0", index_url="https://index.example/simple/"
+    )
+
+    assert requested == ["https://index.example/simple/remote/"]
+    assert hashes == {"a" * 64, "b" * 64}
@@ -0,0 +1,60 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import subprocess
+import sys
+
+import pytest
+
+from envs_manager.backends.api import output_callback, run_command
+
+
+PRINT_LINES = [sys.executable, "-c", "for i in range(3): print(i)"]
+
+
+def test_run_command_output_callback():
+    lines = []
+    with output_callback(lines.append):
+        result = run_command(PRINT_LINES)
+        assert result.stdout == "0\n1\n2\n"
+        assert lines == ["0", "1", "2"]
+
+        # The output of commands that are not streamable is not sent to the callback
+        result = run_command(PRINT_LINES, streamable=False)
+        assert result.stdout == "0\n1\n2\n"
+        assert len(lines) == 3
+
+    run_command(PRINT_LINES)
+    assert len(lines) == 3
+
+
+def test_run_command_output_callback_result():
+    command = [
+        sys.executable,
+        "-c",
+        "import sys; print('out'); print('err', file=sys.stderr); "
+        "[print(i) for i in range(2000)]",
+    ]
+    expected = run_command(command)
+
+    # The result is the same with a callback: stdout and stderr are kept
+    # separate and untruncated
+    lines = []
+    with output_callback(lines.append):
+        result = run_command(command)
+    assert result.stdout == expected.stdout
+    assert result.stderr == expected.stderr == "err\n"
+    assert sorted(lines) == sorted(expected.stdout.splitlines() + ["err"])
+
+    failing_command = [
+        sys.executable,
+        "-c",
+        "import sys; print('out'); sys.exit('failed')",
+    ]
+    with output_callback(lines.append):
+        with pytest.raises(subprocess.CalledProcessError) as error:
+            run_command(failing_command)
+    assert error.value.returncode == 1
+    assert error.value.stdout == "out\n"
+    assert error.value.stderr == "failed\n"
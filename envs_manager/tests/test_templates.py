@@ -0,0 +1,130 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import subprocess
+
+import pytest
+
+from envs_manager.manager import Manager
+from envs_manager.templates import (
+    TemplatePool,
+    get_template_pool,
+    set_template_pool,
+    template_key,
+)
+from envs_manager.tests.utils import wait_until
+
+
+@pytest.fixture
+def template_pool(tmp_path):
+    pool = TemplatePool(
+        tmp_path,
+        [
+            {"name": "base", "backend": "venv", "packages": []},
+            {"name": "not-built", "backend": "venv", "packages": ["packaging"]},
+        ],
+        max_size=1,
+        background=True,
+    )
+    set_template_pool(tmp_path, pool)
+    yield pool
+    set_template_pool(tmp_path, None)
+    pool.shutdown(wait=True)
+
+
+def test_template_key():
+    assert template_key(
+        {"backend": "venv", "packages": ["Packaging", "python=3.10"]}
+    ) == template_key({"backend": "venv", "packages": ["packaging"]})
+    assert template_key({"backend": "pixi", "packages": ["python"]}) != template_key(
+        {"backend": "pixi", "packages": []}
+    )
+
+
+def test_create_environment_from_template(tmp_path, template_pool):
+    # Only the most used templates are built
+    template_pool.warm(wait=True)
+    stats = template_pool.stats()
+    assert [template["ready"] for template in stats["templates"]] == [True, False]
+    assert stats["builds"] == 1
+
+    manager = Manager("venv", root_path=str(tmp_path), env_name="test_env")
+    result = manager.create_environment(packages=["python"])
+    assert result["status"], result["output"]
+
+    prefix = subprocess.run(
+        [
+            manager.backend_instance.python_executable_path,
+            "-c",
+            "import sys; print(sys.prefix)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    assert os.path.samefile(prefix, manager.env_directory)
+
+    stats = template_pool.stats()
+    assert stats["hits"] == 1
+    assert stats["templates"][0]["hits"] == 1
+
+    # Stale templates are rebuilt in the background while still being used
+    template_pool.max_age = 0
+    manager = Manager("venv", root_path=str(tmp_path), env_name="other_env")
+    assert manager.create_environment()["status"]
+    template_pool.warm(wait=True)
+
+    stats = template_pool.stats()
+    assert stats["hits"] == 2
+    assert stats["refreshes"] >= 1
+    template_directory = tmp_path / "venv" / "templates" / stats["templates"][0]["key"]
+    assert len([path for path in template_directory.iterdir() if path.is_dir()]) == 1
+
+
+def test_create_environment_without_template(tmp_path, template_pool):
+    manager = Manager("venv", root_path=str(tmp_path), env_name="test_env")
+    result = template_pool.create_environment(
+        "venv", manager.backend_instance, packages=["python"], channels=["other"]
+    )
+
+    assert result is None
+    assert template_pool.stats()["misses"] == 1
+
+
+def test_create_environment_without_background_builds(tmp_path):
+    pool = TemplatePool(
+        tmp_path, [{"name": "packaging", "backend": "venv", "packages": ["packaging"]}]
+    )
+    manager = Manager("venv", root_path=str(tmp_path), env_name="test_env")
+
+    # Missing templates are not built, so short-lived processes (like the CLI)
+    # don't wait for those builds before exiting
+    result = pool.create_environment(
+        "venv", manager.backend_instance, packages=["packaging"]
+    )
+    assert result is None
+    assert not pool._building
+    assert not (tmp_path / "venv" / "templates").exists()
+    pool.shutdown(wait=True)
+
+
+def test_template_pool_root_path(tmp_path, template_pool):
+    # Equivalent paths get the same pool
+    assert get_template_pool(str(tmp_path) + os.sep) is template_pool
+    assert get_template_pool(tmp_path / "venv" / "..") is template_pool
+
+
+def test_template_pool_refresh(tmp_path):
+    pool = TemplatePool(
+        tmp_path,
+        [{"name": "base", "backend": "venv", "packages": []}],
+        refresh_interval=0.1,
+    )
+    pool.start_refresh()
+
+    # Missing templates are built without being requested
+    wait_until(lambda: pool.stats()["builds"] >= 1, timeout=120)
+    assert pool.stats()["templates"][0]["ready"]
+    pool.shutdown(wait=True)
@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from envs_manager.backends import trash as trash_module
+from envs_manager.backends.trash import Trash, purge_tree
+from envs_manager.manager import Manager
+
+
+def make_tree(path, width=3, depth=3):
+    path.mkdir(parents=True)
+    (path / "file").write_bytes(b"0" * 100)
+    if depth:
+        for index in range(width):
+            make_tree(path / f"dir{index}", width, depth - 1)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Creating symlinks requires privileges")
+def test_purge_tree(tmp_path):
+    tree = tmp_path / "tree"
+    make_tree(tree)
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "keep").write_text("keep")
+    (tree / "dir0" / "link").symlink_to(outside, target_is_directory=True)
+
+    purge_tree(tree, max_workers=2)
+
+    assert not tree.exists()
+    assert (outside / "keep").read_text() == "keep"
+
+
+def test_trash(tmp_path):
+    trash = Trash(tmp_path / "trash")
+    make_tree(tmp_path / "env")
+
+    trash_path = trash.move(tmp_path / "env")
+
+    assert not (tmp_path / "env").exists()
+    assert trash_path.parent == tmp_path / "trash"
+    info = trash.info()
+    assert info["entries"] == 1
+    assert info["size"] >= 40 * 100
+
+    trash.purge(wait=True)
+    assert trash.info()["entries"] == 0
+    assert not trash.is_purging()
+
+
+def test_trash_purge_failed_entry(tmp_path, monkeypatch):
+    trash = Trash(tmp_path / "trash")
+    for name in ("env0", "locked", "env1"):
+        make_tree(tmp_path / name)
+        trash.move(tmp_path / name)
+
+    def purge_tree(path):
+        if path.name.startswith("locked"):
+            raise PermissionError(f"{path} is in use")
+        original_purge_tree(path)
+
+    # The entries after the failing one are still purged, and the purger stops
+    # when only the failing one is left
+    original_purge_tree = trash_module.purge_tree
+    monkeypatch.setattr(trash_module, "purge_tree", purge_tree)
+    trash.purge(wait=True)
+    entries = trash.entries()
+    assert [entry.name.split("-")[0] for entry in entries] == ["locked"]
+
+    # It's retried by the next purge
+    monkeypatch.setattr(trash_module, "purge_tree", original_purge_tree)
+    trash.purge(wait=True)
+    assert trash.entries() == []
+
+
+def test_trash_purge_concurrent(tmp_path, monkeypatch):
+    trash = Trash(tmp_path / "trash")
+    make_tree(tmp_path / "env")
+    trash.move(tmp_path / "env")
+
+    # Another process removes the entry while it's being purged
+    def purge_tree(path):
+        original_purge_tree(path)
+        raise FileNotFoundError(f"{path} was removed")
+
+    original_purge_tree = trash_module.purge_tree
+    monkeypatch.setattr(trash_module, "purge_tree", purge_tree)
+    trash.purge(wait=True)
+
+    assert trash.entries() == []
+    assert trash_module._failed_entries[str(trash.directory)] == set()
+
+
+def test_delete_environment(tmp_path):
+    manager = Manager("venv", root_path=str(tmp_path), env_name="test_env")
+    subprocess.run(
+        [sys.executable, "-m", "venv", "--without-pip", str(manager.env_directory)],
+        check=True,
+    )
+
+    # Simulate a purge interrupted by a crash
+    make_tree(tmp_path / "trash" / "old_env-0")
+
+    result = manager.delete_environment()
+    assert result["status"], result["output"]
+    assert not manager.env_directory.exists()
+    assert "test_env" not in manager.list_environments()["output"]
+
+    manager.backend_instance.trash.purge(wait=True)
+    info = manager.trash_info()["output"]
+    assert info["entries"] == 0
+    assert info["size"] == 0
+
+    assert not manager.delete_environment()["status"]
@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import stat
+
+import pytest
+
+from envs_manager.backends import api, conda_like_interface
+from envs_manager.manager import Manager
+
+
+@pytest.fixture
+def fake_micromamba(tmp_path, monkeypatch):
+    bin_directory = tmp_path / "conda-like" / "bin"
+    bin_directory.mkdir(parents=True)
+    executable = bin_directory / "micromamba"
+    executable.write_text("#!/bin/sh\necho 1.5.10\n")
+    executable.chmod(executable.stat().st_mode | stat.S_IEXEC)
+
+    calls = []
+
+    def run_command(command, *args, **kwargs):
+        calls.append(command)
+        return api.run_command(command, *args, **kwargs)
+
+    monkeypatch.setattr(conda_like_interface, "run_command", run_command)
+    return executable, calls
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Uses a shell script as executable")
+def test_validation_cache(tmp_path, fake_micromamba):
+    executable, calls = fake_micromamba
+
+    manager = Manager("conda-like", root_path=tmp_path, env_name="test")
+    assert manager.backend_instance.executable_variant == "micromamba"
+    assert len(calls) == 1
+
+    # Validation is cached in memory and on disk
+    api._validation_cache.clear()
+    manager = Manager("conda-like", root_path=tmp_path, env_name="test")
+    assert manager.backend_instance.executable_variant == "micromamba"
+    assert len(calls) == 1
+
+    # Changing the executable invalidates the cache
+    executable.write_text("#!/bin/sh\necho 1.5.8\n")
+    Manager("conda-like", root_path=tmp_path, env_name="test")
+    assert len(calls) == 2
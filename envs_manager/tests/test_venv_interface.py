@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+import subprocess
+import sys
+
+from envs_manager.manager import Manager
+
+
+def make_distribution(site_packages, name, version, requested=False):
+    dist_info = site_packages / f"{name}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+        f"Summary: The {name} package\n"
+    )
+    if requested:
+        (dist_info / "REQUESTED").write_text("")
+
+
+def test_list_packages(tmp_path, monkeypatch):
+    manager = Manager("venv", root_path=str(tmp_path), env_name="test_env")
+    subprocess.run(
+        [sys.executable, "-m", "venv", "--without-pip", str(manager.env_directory)],
+        check=True,
+    )
+    site_packages = next(manager.env_directory.glob("**/site-packages"))
+    make_distribution(site_packages, "requested_pkg", "1.0", requested=True)
+    make_distribution(site_packages, "dependency_pkg", "2.0")
+
+    # An older copy of a distribution later in sys.path is shadowed
+    shadowed = tmp_path / "shadowed"
+    make_distribution(shadowed, "dependency_pkg", "1.0", requested=True)
+    (site_packages / "shadowed.pth").write_text(str(shadowed))
+
+    # Distributions outside the environment are not listed, since the listing
+    # runs in isolated mode
+    outside = tmp_path / "outside"
+    make_distribution(outside, "outside_pkg", "1.0")
+    monkeypatch.setenv("PYTHONPATH", str(outside))
+
+    result = manager.list()
+    assert result["status"], result["output"]
+    assert result["output"]["packages"] == [
+        dict(
+            name="dependency_pkg",
+            version="2.0",
+            build=None,
+            channel=None,
+            description="The dependency_pkg package",
+            requested=False,
+        ),
+        dict(
+            name="requested_pkg",
+            version="1.0",
+            build=None,
+            channel=None,
+            description="The requested_pkg package",
+            requested=True,
+        ),
+    ]
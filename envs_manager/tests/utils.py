@@ -0,0 +1,14 @@
+# SPDX-FileCopyrightText: 2022-present Spyder Development Team and envs-manager contributors
+#
+# SPDX-License-Identifier: MIT
+
+"""Helpers shared by the tests."""
+
+import time
+
+
+def wait_until(condition, interval=0.1, timeout=1, **kwargs):
+    start = time.time()
+    while not condition(**kwargs) and time.time() - start < timeout:
+        time.sleep(interval)
+    assert condition(**kwargs)